@@ -1,46 +1,85 @@
+# Imported first so its clock also covers the imports below
+from src.utils.startup_timer import startup_timer
 import pygame
 import math
 import os
-import random
-import time
+import argparse
 import sys
+import time
 from src.ui.ui_manager import UIManager
+from src.ui.perf_overlay import PerfOverlay
+from src.ui.text_cache import text_cache
+from src.ui.overlay_cache import overlay_cache
+from src.ui.compositor import compositor
 from src.entities.monster import Monster
 from src.entities.monster_manager import MonsterManager
 from src.entities.health_heart import HealthHeart
 from src.entities.map_manager import MapManager
+from src.entities.particle_system import particles
 from src.game.game_state import GameState, GameStateManager
-from src.game.special_areas import SpecialAreaManager, SpecialAreaType
+from src.game.input_frame import InputFrame, ScriptedInput
+from src.game.demo import DemoRecorder, DemoPlayer, MAX_SEED
+from src.game.level import levels
+from src.game.spawn_index import spawn_distance
+from src.game.objectives import objectives
+from src.game.wall_field import wall_fields, slide_move
+from src.game.sector_renderer import SectorRenderer
+from src.game.lighting import lightmaps, dynamic_lights, shade_table, FACE_STEPS
+from src.game.maze_generator import STRATEGIES
+from src.game.snapshot import Snapshot, read_snapshot, saves
+from src.game.stress import StressScenario
 from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.utils.profiler import profiler
+from src.utils.asset_manager import assets
 
-# Set SDL to use the macOS Cocoa video driver before any pygame initialization
-os.environ['SDL_VIDEODRIVER'] = 'cocoa'
+# Use the macOS Cocoa video driver unless another driver was requested
+if sys.platform == 'darwin':
+    os.environ.setdefault('SDL_VIDEODRIVER', 'cocoa')
 
-# Initialize Pygame with all modules
-pygame.init()
-if not pygame.display.get_init():
-    pygame.display.init()
+# Only the display and font modules are used; they are initialized by
+# init_display() and the text cache when first needed
 
 # Default window size
 WIDTH = 1024
 HEIGHT = 720
+screen = None
 
-# Initialize the display
-try:
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Doom-style Raycaster")
-except pygame.error as e:
-    print(f"Failed to initialize display: {e}")
-    sys.exit(1)
-
-# Try to switch to fullscreen after initial display is set up
-try:
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+def init_display(headless=False, size=(WIDTH, HEIGHT)):
+    """Open the game window, or an off-screen surface when running headless"""
+    global screen, WIDTH, HEIGHT, NUM_RAYS, SECTOR_RENDERER
+    
+    if headless:
+        # The dummy driver needs no window system; its display surface is never shown
+        pygame.display.quit()
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        pygame.display.init()
+        screen = pygame.display.set_mode(size)
+    else:
+        try:
+            pygame.display.init()
+        except pygame.error as e:
+            print(f"Failed to initialize display: {e}")
+            sys.exit(1)
+        pygame.display.set_caption("Doom-style Raycaster")
+        
+        # Set the mode once: fullscreen, or windowed if that isn't available
+        try:
+            screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        except pygame.error:
+            print("Failed to switch to fullscreen, using windowed mode")
+            try:
+                screen = pygame.display.set_mode(size)
+            except pygame.error as e:
+                print(f"Failed to initialize display: {e}")
+                sys.exit(1)
+    
     WIDTH = screen.get_width()
     HEIGHT = screen.get_height()
-except:
-    print("Failed to switch to fullscreen, using windowed mode")
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    NUM_RAYS = WIDTH  # Match the number of rays to screen width
+    SECTOR_RENDERER = SectorRenderer(WIDTH, HEIGHT, FOV)
+    overlay_cache.resize((WIDTH, HEIGHT))
+    return screen
 
 FOV = math.pi / 3  # 60-degree field of view
 NUM_RAYS = WIDTH  # Match the number of rays to screen width
@@ -79,107 +118,29 @@ BLOOD_COLOR = (200, 0, 0, 128)  # Semi-transparent red
 current_level = 1
 MAX_LEVEL = 5
 level_completed = False
-level_start_time = time.time()
+level_start_time = game_clock.time()
 LEVEL_TIME_LIMIT = 300  # 5 minutes per level
 
-# Complex maze variations
-MAPS = [
-    # Level 1 - Basic maze
-    [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 0, 1, 0, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ],
-    # Level 2 - Larger maze with treasure room
-    [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 1, 1, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 2, 2, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 2, 2, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 1, 1, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ],
-    # Level 3 - Maze with trap rooms
-    [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 3, 3, 3, 3, 3, 3, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 3, 3, 3, 3, 3, 3, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 3, 3, 3, 3, 3, 3, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 3, 3, 3, 3, 3, 3, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 3, 3, 3, 3, 3, 3, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ],
-    # Level 4 - Maze with boss room
-    [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 4, 4, 4, 4, 4, 4, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 4, 4, 4, 4, 4, 4, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 4, 4, 4, 4, 4, 4, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 4, 4, 4, 4, 4, 4, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 4, 4, 4, 4, 4, 4, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ],
-    # Level 5 - Final maze with exit
-    [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 5, 5, 5, 5, 5, 5, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 5, 5, 5, 5, 5, 5, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 5, 5, 5, 5, 5, 5, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 5, 5, 5, 5, 5, 5, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 5, 5, 5, 5, 5, 5, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ]
-]
+# Levels are compiled from levels/levelN.txt (see src/game/level_compiler.py).
+# MAP is the level's shared cell grid, indexed MAP[y, x]
+LEVEL = None
+MAP = None
+OBJECTIVES = None  # Exit and special-area locations of LEVEL
+WALL_FIELD = None  # Distance to the nearest wall anywhere on LEVEL
+LIGHTMAP = None  # Baked light of LEVEL's wall faces and floor cells
+SPHERE_TRACING = False  # Rays step by the wall distance instead of one unit at a time
+SECTOR_RENDERER = None  # Draws sector map levels (LEVEL.sectors) instead of draw_walls
+STRESS = None  # StressScenario filling the level and measuring frame time, for --stress
 
-# Initialize the current map
-MAP = MAPS[0]  # Start with level 1 map
+def start_position():
+    """Player start (x, y, angle) on LEVEL: a sector map's start, or the first open cell"""
+    if LEVEL.sectors:
+        return LEVEL.sectors.start
+    return CELL_SIZE * 1.5, CELL_SIZE * 1.5, 0
 
 # Function to get the current level map
 def get_level_map(level):
-    return MAPS[level - 1]  # Level 1 uses index 0
-
-# Initialize special areas manager
-special_areas_manager = None
+    return levels.get(level)
 
 # Wall texture patterns
 WALL_TEXTURES = [
@@ -240,28 +201,10 @@ class HealthHeart:
         self.load_images()
 
     def load_images(self):
-        try:
-            # Load the GIF file from the Images folder
-            gif_path = os.path.join('Images', 'Pixel Heart Animation 32x32.gif')
-            if os.path.exists(gif_path):
-                # Load the GIF and convert it to a list of surfaces
-                gif = pygame.image.load(gif_path)
-                # Get the number of frames from the GIF
-                frame_count = getattr(gif, 'n_frames', 1)
-                
-                # Extract each frame
-                for i in range(frame_count):
-                    gif.seek(i)
-                    frame = gif.convert_alpha()
-                    frame = pygame.transform.scale(frame, (self.size, self.size))
-                    self.images.append(frame)
-                
-                print(f"Loaded {len(self.images)} heart animation frames from {gif_path}")
-            else:
-                print(f"Heart GIF not found at {gif_path}. Using fallback heart graphics.")
-        except Exception as e:
-            print(f"Error loading heart images: {e}")
-            self.images = []
+        # pygame decodes only the first frame of a GIF; the registry shares it between hearts
+        image = assets.get('Pixel Heart Animation 32x32.gif', (self.size, self.size))
+        if image is not None:
+            self.images.append(image)
 
     def draw(self, screen, x, y, size):
         # Update pulse animation
@@ -348,25 +291,20 @@ def show_upgrade_menu():
 
 # Function to draw upgrade menu
 def draw_upgrade_menu():
-    # Create a dark overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200))
-    screen.blit(overlay, (0, 0))
+    # Dark overlay
+    overlay_cache.draw(screen, 'dim', (0, 0, 0), 200)
     
     # Title
-    title_font = pygame.font.Font(None, 74)
-    title_text = title_font.render("LEVEL UP!", True, (255, 255, 0))
+    title_text = text_cache.render("LEVEL UP!", 74, (255, 255, 0))
     title_rect = title_text.get_rect(center=(WIDTH/2, HEIGHT/4))
     screen.blit(title_text, title_rect)
     
     # Available points
-    points_font = pygame.font.Font(None, 48)
-    points_text = points_font.render(f"Upgrade Points: {upgrade_points}", True, (255, 255, 255))
+    points_text = text_cache.render(f"Upgrade Points: {upgrade_points}", 48, (255, 255, 255))
     points_rect = points_text.get_rect(center=(WIDTH/2, HEIGHT/3))
     screen.blit(points_text, points_rect)
     
     # Current stats
-    stats_font = pygame.font.Font(None, 36)
     stats = [
         f"Damage: {base_damage}",
         f"Health: {base_health}",
@@ -374,12 +312,11 @@ def draw_upgrade_menu():
     ]
     
     for i, stat in enumerate(stats):
-        stat_text = stats_font.render(stat, True, (200, 200, 200))
+        stat_text = text_cache.render(stat, 36, (200, 200, 200))
         stat_rect = stat_text.get_rect(center=(WIDTH/2, HEIGHT/2 + i * 40))
         screen.blit(stat_text, stat_rect)
     
     # Special abilities
-    abilities_font = pygame.font.Font(None, 32)
     abilities = [
         ("4 - Double Shot (3 points)", "double_shot"),
         ("5 - Health Regeneration (2 points)", "health_regen"),
@@ -389,12 +326,11 @@ def draw_upgrade_menu():
     
     for i, (text, ability_name) in enumerate(abilities):
         color = (200, 200, 200) if not SPECIAL_ABILITIES[ability_name] else (0, 255, 0)
-        ability_text = abilities_font.render(text, True, color)
+        ability_text = text_cache.render(text, 32, color)
         ability_rect = ability_text.get_rect(center=(WIDTH/2, HEIGHT * 2/3 + 120 + i * 40))
         screen.blit(ability_text, ability_rect)
     
     # Upgrade buttons
-    button_font = pygame.font.Font(None, 32)
     buttons = [
         ("1 - Increase Damage", (WIDTH/2, HEIGHT * 2/3)),
         ("2 - Increase Health", (WIDTH/2, HEIGHT * 2/3 + 40)),
@@ -403,7 +339,7 @@ def draw_upgrade_menu():
     ]
     
     for text, pos in buttons:
-        button_text = button_font.render(text, True, (200, 200, 200))
+        button_text = text_cache.render(text, 32, (200, 200, 200))
         button_rect = button_text.get_rect(center=pos)
         screen.blit(button_text, button_rect)
 
@@ -440,15 +376,15 @@ def handle_upgrade(key):
 # Add after the player settings
 NUM_MONSTERS = float('inf')  # Remove monster limit
 monsters = []
-last_spawn_time = time.time()
-last_wave_time = time.time()
+last_spawn_time = game_clock.time()
+last_wave_time = game_clock.time()
 SPAWN_INTERVAL = 1.0  # Spawn new monsters every 1 second
 WAVE_INTERVAL = 5.0  # Spawn wave every 5 seconds
 WAVE_SIZE = 5  # Number of monsters in each wave
 
 # Add after monster settings
 health_hearts = []
-last_heart_spawn_time = time.time()
+last_heart_spawn_time = game_clock.time()
 HEART_SPAWN_INTERVAL = 5.0  # Spawn new heart every 5 seconds
 
 # Add after the player settings
@@ -475,92 +411,50 @@ MIN_SPAWN_DISTANCE = 200  # Minimum distance from player for monster spawns
 
 def spawn_monsters():
     global monsters, last_spawn_time, last_wave_time, game_state
-    current_time = time.time()
+    current_time = game_clock.time()
+    spawn_index = map_manager.spawn_index
+    min_distance = spawn_distance(MIN_SPAWN_DISTANCE)
     
     # Determine spawn interval based on game state
     spawn_interval = SPAWN_INTERVAL / 5 if game_state.current_state == GameState.PAUSED else SPAWN_INTERVAL
     
-    # Regular monster spawn
+    # Regular monster spawn, on a floor cell far enough from the player
     if current_time - last_spawn_time >= spawn_interval:
-        max_attempts = 10  # Limit spawn attempts
-        for _ in range(max_attempts):
-            x = random.randint(1, len(MAP)-2) * CELL_SIZE + CELL_SIZE//2
-            y = random.randint(1, len(MAP[0])-2) * CELL_SIZE + CELL_SIZE//2
-            
-            # Check distance from player
-            dx = x - player_x
-            dy = y - player_y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance >= MIN_SPAWN_DISTANCE:
-                map_x = int(x / CELL_SIZE)
-                map_y = int(y / CELL_SIZE)
-                if MAP[map_x][map_y] == 0:
-                    monsters.append(Monster(x, y))
-                    last_spawn_time = current_time
-                    break
+        position = spawn_index.sample_position(map_manager.rng, min_distance)
+        if position:
+            monsters.append(Monster(*position))
+            last_spawn_time = current_time
     
     # Wave spawn
     if current_time - last_wave_time >= WAVE_INTERVAL:
         # Spawn wave of monsters
         for _ in range(WAVE_SIZE - 1):  # Spawn regular monsters
-            max_attempts = 10
-            for _ in range(max_attempts):
-                x = random.randint(1, len(MAP)-2) * CELL_SIZE + CELL_SIZE//2
-                y = random.randint(1, len(MAP[0])-2) * CELL_SIZE + CELL_SIZE//2
-                
-                # Check distance from player
-                dx = x - player_x
-                dy = y - player_y
-                distance = math.sqrt(dx*dx + dy*dy)
-                
-                if distance >= MIN_SPAWN_DISTANCE:
-                    map_x = int(x / CELL_SIZE)
-                    map_y = int(y / CELL_SIZE)
-                    if MAP[map_x][map_y] == 0:
-                        monsters.append(Monster(x, y))
-                        break
+            position = spawn_index.sample_position(map_manager.rng, min_distance)
+            if position:
+                monsters.append(Monster(*position))
         
         # Spawn boss monster
-        max_attempts = 10
-        for _ in range(max_attempts):
-            x = random.randint(1, len(MAP)-2) * CELL_SIZE + CELL_SIZE//2
-            y = random.randint(1, len(MAP[0])-2) * CELL_SIZE + CELL_SIZE//2
-            
-            # Check distance from player
-            dx = x - player_x
-            dy = y - player_y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance >= MIN_SPAWN_DISTANCE:
-                map_x = int(x / CELL_SIZE)
-                map_y = int(y / CELL_SIZE)
-                if MAP[map_x][map_y] == 0:
-                    monsters.append(Monster(x, y, is_boss=True))
-                    break
+        position = spawn_index.sample_position(map_manager.rng, min_distance)
+        if position:
+            monsters.append(Monster(*position, is_boss=True))
         
         last_wave_time = current_time
 
 def spawn_health_heart():
     global health_hearts, last_heart_spawn_time
-    current_time = time.time()
+    current_time = game_clock.time()
     
     # Only spawn if enough time has passed and we're under the heart limit
     if current_time - last_heart_spawn_time >= HEART_SPAWN_INTERVAL:
-        # Random position in the map
-        while True:
-            x = random.randint(1, len(MAP)-2) * CELL_SIZE + CELL_SIZE//2
-            y = random.randint(1, len(MAP[0])-2) * CELL_SIZE + CELL_SIZE//2
-            map_x = int(x / CELL_SIZE)
-            map_y = int(y / CELL_SIZE)
-            if MAP[map_x][map_y] == 0:
-                health_hearts.append(HealthHeart(x, y))
-                last_heart_spawn_time = current_time
-                break
+        # Any floor cell the player can walk to
+        position = map_manager.spawn_index.sample_position(map_manager.rng)
+        if position:
+            health_hearts.append(HealthHeart(*position))
+            last_heart_spawn_time = current_time
 
 def update_monsters():
     global player_health, last_hit_time, monsters
-    current_time = time.time()
+    current_time = game_clock.time()
     
     # Remove dead monsters
     monsters = [monster for monster in monsters if monster.health > 0]
@@ -584,9 +478,7 @@ def update_monsters():
             map_x = int(new_x / CELL_SIZE)
             map_y = int(new_y / CELL_SIZE)
             
-            if (0 <= map_x < len(MAP) and 
-                0 <= map_y < len(MAP[0]) and 
-                MAP[map_x][map_y] == 0):
+            if LEVEL.in_bounds(map_x, map_y) and MAP[map_y, map_x] == 0:
                 monster.x = new_x
                 monster.y = new_y
             
@@ -600,7 +492,7 @@ def update_monsters():
 
 def update_health_hearts():
     global player_health, health_hearts
-    current_time = time.time()
+    current_time = game_clock.time()
     
     for heart in health_hearts[:]:  # Use slice copy to allow removal during iteration
         # Update heart animation
@@ -655,36 +547,24 @@ def draw_weapon(shooting=False, frame=0):
         pygame.draw.polygon(screen, flash_color, flash_points)
 
 def draw_kill_counter():
-    font = pygame.font.Font(None, 36)
-    text = font.render(f'Kills: {kill_count}', True, (255, 255, 255))
+    text = text_cache.render(f'Kills: {kill_count}', 36, (255, 255, 255))
     screen.blit(text, (WIDTH - 150, 20))
 
 def draw_blood_overlay():
     if player_health < 5:
-        # Create a surface for the blood effect
-        blood_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         # Calculate opacity based on health
         opacity = int((1 - player_health/5) * 128)  # Max opacity of 128
-        blood_color = (*BLOOD_COLOR[:3], opacity)
-        blood_surface.fill(blood_color)
-        screen.blit(blood_surface, (0, 0))
+        overlay_cache.draw(screen, 'blood', BLOOD_COLOR, opacity)
 
 def draw_exit_indicator():
-    # Find the exit position
-    exit_pos = None
-    for i in range(len(MAP)):
-        for j in range(len(MAP[0])):
-            if MAP[i][j] == SPECIAL_AREAS['exit']:
-                exit_pos = (i * CELL_SIZE + CELL_SIZE//2, j * CELL_SIZE + CELL_SIZE//2)
-                break
-        if exit_pos:
-            break
+    # Nearest exit and the walking distance to it, from the level's objective index
+    exit_info = OBJECTIVES.exit_from(player_x, player_y)
     
-    if exit_pos:
-        # Calculate distance and angle to exit
+    if exit_info:
+        exit_pos, distance = exit_info
+        # Calculate angle to exit
         dx = exit_pos[0] - player_x
         dy = exit_pos[1] - player_y
-        distance = math.sqrt(dx*dx + dy*dy)
         angle = math.atan2(dy, dx)
         
         # Calculate relative angle
@@ -712,12 +592,24 @@ def draw_exit_indicator():
             pygame.draw.polygon(screen, indicator_color, points)
             
             # Draw distance text
-            font = pygame.font.Font(None, 24)
-            text = font.render(f"Exit: {int(distance)}", True, indicator_color)
+            text = text_cache.render(f"Exit: {int(distance)}", 24, indicator_color)
             text_rect = text.get_rect(center=(screen_x, HEIGHT - 30))
             screen.blit(text, text_rect)
 
 def cast_rays():
+    with profiler.span('cast_rays.walls'):
+        dynamic_lights.accumulate(int(player_x // CELL_SIZE), int(player_y // CELL_SIZE))
+        if LEVEL.sectors:
+            depth_buffer = SECTOR_RENDERER.draw(screen, LEVEL.sectors, player_x, player_y, player_angle)
+        else:
+            depth_buffer = draw_walls()
+    with profiler.span('cast_rays.sprites'):
+        draw_sprites(depth_buffer)
+    with profiler.span('cast_rays.particles'):
+        particles.draw(screen, depth_buffer, player_x, player_y, player_angle, FOV,
+                       LIGHTMAP.light_at if LIGHTMAP else None)
+
+def draw_walls():
     # Draw sky and floor with gradient effect
     for y in range(HEIGHT):
         if y < HEIGHT // 2:
@@ -730,6 +622,10 @@ def cast_rays():
             pygame.draw.line(screen, color, (0, y), (WIDTH, y))
     
     depth_buffer = [float('inf')] * WIDTH
+    map_width, map_height = LEVEL.width, LEVEL.height
+    # Sphere tracing: jump ahead by the distance to the nearest wall, which can't skip one.
+    # Whole-unit steps land on the same points as the unit march, so both find the same hits
+    safe_step = WALL_FIELD.safe_step if SPHERE_TRACING and WALL_FIELD else None
     
     for i in range(NUM_RAYS):
         angle = player_angle + (i - NUM_RAYS // 2) * (FOV / NUM_RAYS)
@@ -742,18 +638,22 @@ def cast_rays():
         wall_highlight = WALL_HIGHLIGHT
         wall_shadow = WALL_SHADOW
         is_door = False
+        face = None
         
         while not hit_wall and ray_length < MAX_DEPTH:
-            ray_length += 1
+            if safe_step:
+                ray_length = min(MAX_DEPTH, ray_length + max(1, int(safe_step(ray_x, ray_y))))
+            else:
+                ray_length += 1
             ray_x = player_x + ray_length * math.cos(angle)
             ray_y = player_y + ray_length * math.sin(angle)
             
             map_x = int(ray_x / CELL_SIZE)
             map_y = int(ray_y / CELL_SIZE)
             
-            if map_x < 0 or map_x >= len(MAP) or map_y < 0 or map_y >= len(MAP[0]):
+            if map_x < 0 or map_x >= map_width or map_y < 0 or map_y >= map_height:
                 hit_wall = True
-            elif MAP[map_x][map_y] == 1:
+            elif MAP[map_y, map_x] == 1:
                 hit_wall = True
                 # Get texture coordinates
                 hit_x = ray_x % CELL_SIZE
@@ -762,12 +662,14 @@ def cast_rays():
                 # Determine wall texture based on hit position
                 texture_x = int(hit_x / CELL_SIZE * 8)
                 texture_y = int(hit_y / CELL_SIZE * 8)
+                # The face the ray came through is the cell edge nearest the hit
+                face = min((hit_y, 0), (CELL_SIZE - hit_x, 1), (CELL_SIZE - hit_y, 2), (hit_x, 3))[1]
                 
                 if WALL_TEXTURES[texture_x][texture_y] == 1:
                     wall_color = WALL_SHADOW
                 else:
                     wall_color = WALL_COLOR
-            elif MAP[map_x][map_y] == SPECIAL_AREAS['exit']:
+            elif MAP[map_y, map_x] == SPECIAL_AREAS['exit']:
                 hit_wall = True
                 is_door = True
                 # Get texture coordinates
@@ -777,6 +679,7 @@ def cast_rays():
                 # Determine door texture based on hit position
                 texture_x = int(hit_x / CELL_SIZE * 8)
                 texture_y = int(hit_y / CELL_SIZE * 8)
+                face = min((hit_y, 0), (CELL_SIZE - hit_x, 1), (CELL_SIZE - hit_y, 2), (hit_x, 3))[1]
                 
                 if DOOR_TEXTURE[texture_x][texture_y] == 1:
                     wall_color = (100, 100, 255)  # Blue door frame
@@ -790,9 +693,15 @@ def cast_rays():
         wall_top = (HEIGHT - wall_height) // 2
         wall_bottom = wall_top + wall_height
         
-        # Apply distance-based shading and lighting
-        shade_factor = max(0.2, min(1.0, 1.0 - distance * 0.001))
-        shaded_color = tuple(int(c * shade_factor) for c in wall_color)
+        if LIGHTMAP and face is not None:
+            # Baked light of the face plus the dynamic light of the cell in front of it
+            step_x, step_y = FACE_STEPS[face]
+            light = LIGHTMAP.face(map_x, map_y, face) + dynamic_lights.level_at(map_x + step_x, map_y + step_y)
+            shaded_color = shade_table(wall_color)[min(light, 255)]
+        else:
+            # Apply distance-based shading and lighting
+            shade_factor = max(0.2, min(1.0, 1.0 - distance * 0.001))
+            shaded_color = tuple(int(c * shade_factor) for c in wall_color)
         
         # Draw wall slice with texture
         pygame.draw.rect(screen, shaded_color, (i, wall_top, 1, wall_bottom - wall_top))
@@ -805,6 +714,9 @@ def cast_rays():
             pygame.draw.rect(screen, wall_shadow, 
                            (i, wall_bottom - highlight_height, 1, highlight_height))
     
+    return depth_buffer
+
+def draw_sprites(depth_buffer):
     # Render monsters and health hearts with visibility check
     visible_objects = []
     
@@ -868,7 +780,7 @@ def cast_rays():
 def handle_shooting():
     global monsters, kill_count, is_shooting, shoot_frame, last_shot_time, player_exp, player_level, exp_to_next_level, ability_cooldowns
     
-    current_time = time.time()
+    current_time = game_clock.time()
     if current_time - last_shot_time < SHOOT_COOLDOWN:
         return
     
@@ -882,6 +794,8 @@ def handle_shooting():
     else:
         # Normal shot
         shoot_projectile(player_angle, explosive=SPECIAL_ABILITIES['explosive_shot'])
+    particles.muzzle_flash(player_x, player_y, player_angle)
+    dynamic_lights.add(player_x, player_y, *MUZZLE_FLASH_LIGHT)
     
     is_shooting = True
     shoot_frame = 0
@@ -909,18 +823,22 @@ def shoot_projectile(angle, explosive=False):
                 monster.health -= base_damage
                 monster.is_hit = True
                 monster.hit_timer = 10
+                particles.blood(monster.x, monster.y, kill=monster.health <= 0)
                 
                 # Handle explosive shot
                 if explosive:
+                    particles.explosion(monster.x, monster.y)
+                    dynamic_lights.add(monster.x, monster.y, *EXPLOSION_LIGHT)
                     for nearby_monster in monsters:
                         if nearby_monster != monster:
                             nx = nearby_monster.x - monster.x
                             ny = nearby_monster.y - monster.y
                             dist = math.sqrt(nx*nx + ny*ny)
-                            if dist < 100:  # Explosion radius
+                            if dist < EXPLOSION_RADIUS:
                                 nearby_monster.health -= base_damage // 2
                                 nearby_monster.is_hit = True
                                 nearby_monster.hit_timer = 10
+                                particles.blood(nearby_monster.x, nearby_monster.y)
                 
                 if monster.health <= 0:
                     monsters.remove(monster)
@@ -931,18 +849,14 @@ def shoot_projectile(angle, explosive=False):
                 hit_monster = True
                 break
 
-def handle_input():
+def handle_input(frame):
     global player_x, player_y, player_angle, is_shooting, shoot_frame
     
-    keys = pygame.key.get_pressed()
-    mouse_buttons = pygame.mouse.get_pressed()
-    
     # Handle mouse movement for camera rotation
-    mouse_rel_x, _ = pygame.mouse.get_rel()
-    player_angle += mouse_rel_x * MOUSE_SENSITIVITY
+    player_angle += frame.mouse_dx * MOUSE_SENSITIVITY
     
     # Handle shooting
-    if mouse_buttons[0] and not is_shooting:  # Left mouse button
+    if frame.fire and not is_shooting:  # Left mouse button
         handle_shooting()
     
     # Update shooting animation
@@ -963,30 +877,46 @@ def handle_input():
     next_x = player_x
     next_y = player_y
     
-    if keys[pygame.K_w]:
+    if frame.forward:
         next_x += player_speed * math.cos(player_angle)
         next_y += player_speed * math.sin(player_angle)
-    if keys[pygame.K_s]:
+    if frame.back:
         next_x -= player_speed * math.cos(player_angle)
         next_y -= player_speed * math.sin(player_angle)
-    if keys[pygame.K_a]:
+    if frame.left:
         next_x += player_speed * math.cos(player_angle - math.pi/2)
         next_y += player_speed * math.sin(player_angle - math.pi/2)
-    if keys[pygame.K_d]:
+    if frame.right:
         next_x += player_speed * math.cos(player_angle + math.pi/2)
         next_y += player_speed * math.sin(player_angle + math.pi/2)
     
-    # Check if the next position is valid (not inside a wall)
-    next_map_x = int(next_x / CELL_SIZE)
-    next_map_y = int(next_y / CELL_SIZE)
+    # Keep the player's radius clear of walls, sliding along them instead of stopping
+    if LEVEL.sectors:
+        moved = LEVEL.sectors.slide(player_x, player_y, next_x - player_x, next_y - player_y, PLAYER_RADIUS)
+    else:
+        moved = slide_move(WALL_FIELD, MAP, player_x, player_y, next_x - player_x, next_y - player_y, PLAYER_RADIUS)
     
-    if (0 <= next_map_x < len(MAP) and 
-        0 <= next_map_y < len(MAP[0]) and 
-        MAP[next_map_x][next_map_y] == 0):
-        player_x = next_x
-        player_y = next_y
+    if moved != (player_x, player_y):
+        player_x, player_y = moved
         # Check for special areas
         handle_special_area(player_x, player_y)
+    if not LEVEL.sectors:
+        # Exits are solid, so they fire when the player walks into one
+        door = touched_exit(player_x, player_y, next_x - player_x, next_y - player_y)
+        if door:
+            handle_special_area(*door)
+
+def touched_exit(x, y, dx, dy):
+    """The point of an exit cell the player's radius touches moving by (dx, dy), or None"""
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return None
+    reach = (PLAYER_RADIUS + length) / length
+    door_x, door_y = x + dx * reach, y + dy * reach
+    cell_x, cell_y = int(door_x // CELL_SIZE), int(door_y // CELL_SIZE)
+    if LEVEL.in_bounds(cell_x, cell_y) and MAP[cell_y, cell_x] == SPECIAL_AREAS['exit']:
+        return door_x, door_y
+    return None
 
 def draw_player_health():
     health_width = 200
@@ -1001,8 +931,7 @@ def draw_player_health():
     pygame.draw.rect(screen, (0, 255, 0), (x, y, current_health_width, health_height))
 
 def draw_game_over():
-    font = pygame.font.Font(None, 74)
-    text = font.render('Game Over - Press R to Restart', True, (255, 0, 0))
+    text = text_cache.render('Game Over - Press R to Restart', 74, (255, 0, 0))
     text_rect = text.get_rect(center=(WIDTH/2, HEIGHT/2))
     screen.blit(text, text_rect)
 
@@ -1010,36 +939,80 @@ def draw_health_heart(heart, screen_x, screen_y, size):
     heart.draw(screen, screen_x, screen_y, size)
 
 def reset_game():
-    global player_health, player_x, player_y, player_angle, monsters, health_hearts, last_spawn_time, last_heart_spawn_time, kill_count, current_level, MAP, player_level, player_exp, exp_to_next_level, upgrade_points
+    global player_health, player_x, player_y, player_angle, monsters, health_hearts, last_spawn_time, last_heart_spawn_time, kill_count, current_level, LEVEL, MAP, OBJECTIVES, WALL_FIELD, LIGHTMAP, player_level, player_exp, exp_to_next_level, upgrade_points
     player_health = base_health
-    player_x = CELL_SIZE * 1.5
-    player_y = CELL_SIZE * 1.5
-    player_angle = 0
     monsters = []
     health_hearts = []
-    last_spawn_time = time.time()
-    last_heart_spawn_time = time.time()
+    particles.clear()
+    dynamic_lights.clear()
+    last_spawn_time = game_clock.time()
+    last_heart_spawn_time = game_clock.time()
     kill_count = 0
     current_level = 1
     player_level = 1
     player_exp = 0
     exp_to_next_level = 100
     upgrade_points = 0
-    MAP = get_level_map(current_level)
+    LEVEL = get_level_map(current_level)
+    MAP = LEVEL.cells
+    OBJECTIVES = objectives.get(LEVEL)
+    WALL_FIELD = wall_fields.get(LEVEL)
+    LIGHTMAP = lightmaps.get(LEVEL)
+    player_x, player_y, player_angle = start_position()
+    ui_manager.set_maze(MAP)
     pygame.mouse.set_visible(False)
     pygame.event.set_grab(True)
 
-def draw_pause_screen():
-    # Create a dark overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200))
-    screen.blit(overlay, (0, 0))
-    
-    # Load horror font or use default
+def save_game(path=SAVE_PATH):
+    """Quick save: copy the game state here, encode and write it on the save thread"""
+    player = {
+        'x': player_x, 'y': player_y, 'angle': player_angle,
+        'health': player_health, 'speed': player_speed, 'kill_count': kill_count,
+        'level': player_level, 'exp': player_exp, 'exp_to_next_level': exp_to_next_level,
+        'upgrade_points': upgrade_points, 'base_damage': base_damage,
+        'base_health': base_health, 'base_speed': base_speed,
+        'last_hit_time': last_hit_time, 'last_shot_time': last_shot_time
+    }
+    with profiler.span('save'):
+        snapshot = Snapshot.capture(map_manager, player, SPECIAL_ABILITIES, ability_cooldowns, [map_manager.triggers])
+    saves.save(path, snapshot)
+
+def load_game(path=SAVE_PATH):
+    """Quick load: put the level, player, monsters and pickups back as they were saved"""
+    global player_x, player_y, player_angle, player_health, player_speed, kill_count, player_level, player_exp, exp_to_next_level, upgrade_points, base_damage, base_health, base_speed, last_hit_time, last_shot_time, current_level, LEVEL, MAP, OBJECTIVES, WALL_FIELD, LIGHTMAP
     try:
-        font = pygame.font.Font('horror.ttf', 48)
-    except:
-        font = pygame.font.Font(None, 48)
+        saves.wait()  # A save still being written would be read half done
+        with profiler.span('load'):
+            snapshot = read_snapshot(path)
+            snapshot.restore(map_manager)
+    except (OSError, ValueError) as e:
+        print(f"Could not load {path}: {e}")
+        return False
+    current_level = map_manager.current_level
+    LEVEL = map_manager.level
+    MAP = LEVEL.cells
+    OBJECTIVES = objectives.get(LEVEL)
+    WALL_FIELD = wall_fields.get(LEVEL)
+    LIGHTMAP = lightmaps.get(LEVEL)
+    ui_manager.set_maze(MAP)
+    ui_manager.reveal_cells(map_manager.visited_cells)
+    snapshot.restore_triggers([map_manager.triggers])
+    player, abilities, cooldowns = snapshot.player_state()
+    player_x, player_y, player_angle = player['x'], player['y'], player['angle']
+    player_health, player_speed, kill_count = player['health'], player['speed'], player['kill_count']
+    player_level, player_exp, exp_to_next_level = player['level'], player['exp'], player['exp_to_next_level']
+    upgrade_points, base_damage = player['upgrade_points'], player['base_damage']
+    base_health, base_speed = player['base_health'], player['base_speed']
+    last_hit_time, last_shot_time = player['last_hit_time'], player['last_shot_time']
+    SPECIAL_ABILITIES.update(abilities)
+    ability_cooldowns.update(cooldowns)
+    particles.clear()
+    dynamic_lights.clear()
+    return True
+
+def draw_pause_screen():
+    # Dark overlay
+    overlay_cache.draw(screen, 'dim', (0, 0, 0), 200)
     
     # Render creepy message
     messages = [
@@ -1048,43 +1021,37 @@ def draw_pause_screen():
         "THEY ARE COMING..."
     ]
     
+    # Horror font, or the default font if horror.ttf is missing
     for i, message in enumerate(messages):
-        text = font.render(message, True, (255, 0, 0))
+        text = text_cache.render(message, 48, (255, 0, 0), face='horror.ttf')
         text_rect = text.get_rect(center=(WIDTH/2, HEIGHT/2 - 50 + i * 60))
         screen.blit(text, text_rect)
     
     # Add "Press P to continue" message
-    continue_font = pygame.font.Font(None, 36)
-    continue_text = continue_font.render("Press P to continue", True, (200, 0, 0))
+    continue_text = text_cache.render("Press P to continue", 36, (200, 0, 0))
     continue_rect = continue_text.get_rect(center=(WIDTH/2, HEIGHT - 50))
     screen.blit(continue_text, continue_rect)
 
 def draw_title_screen():
-    # Create a dark overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200))
-    screen.blit(overlay, (0, 0))
+    # Dark overlay
+    overlay_cache.draw(screen, 'dim', (0, 0, 0), 200)
     
     # Title text
-    title_font = pygame.font.Font(None, 100)
-    title_text = title_font.render("SHADOW MAZE", True, (255, 0, 0))
+    title_text = text_cache.render("SHADOW MAZE", 100, (255, 0, 0))
     title_rect = title_text.get_rect(center=(WIDTH/2, HEIGHT/3))
     screen.blit(title_text, title_rect)
     
     # Subtitle text
-    subtitle_font = pygame.font.Font(None, 50)
-    subtitle_text = subtitle_font.render("A Raycasting Nightmare", True, (200, 0, 0))
+    subtitle_text = text_cache.render("A Raycasting Nightmare", 50, (200, 0, 0))
     subtitle_rect = subtitle_text.get_rect(center=(WIDTH/2, HEIGHT/3 + 70))
     screen.blit(subtitle_text, subtitle_rect)
     
     # Start prompt
-    prompt_font = pygame.font.Font(None, 36)
-    prompt_text = prompt_font.render("Press any key to start", True, (255, 255, 255))
+    prompt_text = text_cache.render("Press any key to start", 36, (255, 255, 255))
     prompt_rect = prompt_text.get_rect(center=(WIDTH/2, HEIGHT * 2/3))
     screen.blit(prompt_text, prompt_rect)
     
     # Controls info
-    controls_font = pygame.font.Font(None, 24)
     controls = [
         "WASD - Move",
         "Mouse - Look around",
@@ -1095,35 +1062,30 @@ def draw_title_screen():
     ]
     
     for i, control in enumerate(controls):
-        control_text = controls_font.render(control, True, (200, 200, 200))
+        control_text = text_cache.render(control, 24, (200, 200, 200))
         control_rect = control_text.get_rect(center=(WIDTH/2, HEIGHT * 3/4 + i * 30))
         screen.blit(control_text, control_rect)
 
 def initialize_game():
-    global screen, clock, player_health, player_x, player_y, player_angle, game_state, special_areas_manager, map_manager
+    global screen, clock, player_health, player_x, player_y, player_angle, game_state, map_manager, ui_manager, LEVEL, MAP, OBJECTIVES, WALL_FIELD, LIGHTMAP
     
     try:
         # Initialize game variables
         clock = pygame.time.Clock()
         player_health = 5
-        player_x = CELL_SIZE * 1.5
-        player_y = CELL_SIZE * 1.5
-        player_angle = 0
         game_state.change_state(GameState.RUNNING)
         
+        LEVEL = get_level_map(current_level)
+        MAP = LEVEL.cells
+        OBJECTIVES = objectives.get(LEVEL)
+        WALL_FIELD = wall_fields.get(LEVEL)
+        LIGHTMAP = lightmaps.get(LEVEL)
+        player_x, player_y, player_angle = start_position()
+        
         # Reset map manager
         map_manager.reset_level()
-        
-        # Create player state dictionary
-        player_state = {
-            'x': player_x,
-            'y': player_y,
-            'health': player_health,
-            'angle': player_angle
-        }
-        
-        # Initialize special areas manager after player is created
-        special_areas_manager = SpecialAreaManager(MAP, player_state)
+        if ui_manager is None:
+            ui_manager = UIManager(MAP)
         
         return True
     except Exception as e:
@@ -1131,44 +1093,237 @@ def initialize_game():
         return False
 
 def handle_special_area(x, y):
-    global player_health, current_level, MAX_LEVEL, monsters
-    if special_areas_manager:
-        result = special_areas_manager.handle_special_area(x, y, monsters, current_level, MAX_LEVEL)
-        if result:
-            # Update player health from the player state
-            player_health = special_areas_manager.player_state['health']
-            return True
-    return False
+    """Fire the map manager's special-area triggers; an exit moves the player to the next level"""
+    global player_x, player_y, player_angle, current_level, LEVEL, MAP, OBJECTIVES, WALL_FIELD, LIGHTMAP
+    level = map_manager.current_level
+    if not map_manager.handle_special_area(x, y):
+        return False
+    if map_manager.current_level != level:
+        current_level = map_manager.current_level
+        LEVEL = map_manager.level
+        MAP = LEVEL.cells
+        OBJECTIVES = objectives.get(LEVEL)
+        WALL_FIELD = wall_fields.get(LEVEL)
+        LIGHTMAP = lightmaps.get(LEVEL)
+        player_x, player_y, player_angle = start_position()
+        ui_manager.set_maze(MAP)
+        particles.clear()
+        dynamic_lights.clear()
+    return True
 
 def draw_level_info():
     level_info = map_manager.get_level_info()
-    font = pygame.font.Font(None, 36)
-    level_text = font.render(f"Level: {level_info['level']}", True, (255, 255, 255))
-    time_text = font.render(f"Time: {int(level_info['time_remaining'])}", True, (255, 255, 255))
-    kills_text = font.render(f"Kills: {level_info['kills']}", True, (255, 255, 255))
+    level_text = text_cache.render(f"Level: {level_info['level']}", 36, (255, 255, 255))
+    time_text = text_cache.render(f"Time: {int(level_info['time_remaining'])}", 36, (255, 255, 255))
+    kills_text = text_cache.render(f"Kills: {level_info['kills']}", 36, (255, 255, 255))
     screen.blit(level_text, (10, 10))
     screen.blit(time_text, (10, 50))
     screen.blit(kills_text, (10, 90))
 
-# After the MAP initialization, add:
-ui_manager = UIManager(MAP)
+# Created by initialize_game() once the display is up
+ui_manager = None
+perf_overlay = PerfOverlay()
+
+def count_entities():
+    """Live entity counts by type for the performance overlay"""
+    counts = {}
+    manager_monsters = map_manager.monster_manager.monsters if map_manager.monster_manager else []
+    for monster in monsters + manager_monsters:
+        monster_type = getattr(monster, 'type', 'monster')
+        counts[monster_type] = counts.get(monster_type, 0) + 1
+    hearts = len(health_hearts)
+    if map_manager.heart_manager:
+        hearts += sum(1 for heart in map_manager.heart_manager.hearts if not heart['collected'])
+    counts['hearts'] = hearts
+    counts['particles'] = particles.count
+    return counts
 
-def main():
-    global game_state, player_health, player_speed, ability_cooldowns
+def update_game(frame):
+    """Advance the running game by one tick"""
+    handle_input(frame)
+    with profiler.span('particles.update'):
+        particles.update(1/60)
+    dynamic_lights.update(1/60)
     
+    # Update map manager
+    player_state = {
+        'x': player_x,
+        'y': player_y,
+        'health': player_health,
+        'angle': player_angle
+    }
+    if STRESS:
+        player_state['health'] = float('inf')  # Stress runs measure the load, the player can't die
+    
+    # Update game state through map manager
+    if not map_manager.update(1/60, player_state):
+        game_state.change_state(GameState.GAME_OVER)
+    
+    # Check for level completion
+    if map_manager.level_completed:
+        if not map_manager.next_level():
+            game_state.change_state(GameState.GAME_OVER)
+    
+    # Check for time limit
+    if game_clock.time() - map_manager.level_start_time > LEVEL_TIME_LIMIT:
+        game_state.change_state(GameState.GAME_OVER)
+        pygame.mouse.set_visible(True)
+        pygame.event.set_grab(False)
+
+def draw_world():
+    """Draw the 3D view and the HUD drawn into it, reusing the last one while nothing moves"""
+    world_key = (player_x, player_y, player_angle, player_health, kill_count, is_shooting, shoot_frame)
+    if compositor.has_world(world_key):
+        compositor.restore_world(screen)
+        return
+    cast_rays()
+    draw_weapon(is_shooting, shoot_frame)
+    draw_player_health()
+    draw_kill_counter()
+    draw_blood_overlay()
+    compositor.store_world(screen, world_key)
+
+def draw_ui():
+    """Update the UI and draw whichever elements changed"""
+    ui_manager.update({
+        'level': map_manager.current_level,
+        'health': player_health,
+        'kill_count': kill_count,
+        'position': (player_x, player_y),
+        'angle': player_angle,
+        'fps': clock.get_fps()
+    }, map_manager.monster_manager.monsters if map_manager.monster_manager else [])
+    
+    # Draw UI
+    with profiler.span('UIManager.draw'):
+        for name, rect, key in ui_manager.elements():
+            if compositor.element_changed(screen, name, rect, key):
+                ui_manager.draw_element(screen, name)
+    
+    if perf_overlay.visible:
+        perf_overlay.update(time.perf_counter(), count_entities(), profiler.last_frame_totals)
+    overlay_key = (perf_overlay.visible, perf_overlay.last_refresh)
+    if compositor.element_changed(screen, 'perf_overlay', perf_overlay.rect(), overlay_key):
+        perf_overlay.draw(screen)
+
+def draw_frame():
+    """Draw the current game state and the UI to the screen"""
+    state = game_state.current_state
+    compositor.resize(screen.get_size())
+    
+    if state == GameState.RUNNING:
+        # The 3D view changes every frame, so everything is redrawn and flipped
+        compositor.invalidate()
+        screen.fill((0, 0, 0))
+        cast_rays()
+        with profiler.span('hud'):
+            draw_exit_indicator()
+            draw_weapon(is_shooting, shoot_frame)
+            draw_player_health()
+            draw_kill_counter()
+            draw_blood_overlay()
+            draw_level_info()
+        draw_ui()
+        return
+    
+    # Static screens: redraw the scene only when something on it changed
+    level_info = map_manager.get_level_info()
+    scene_key = (state, level_info['level'], int(level_info['time_remaining']), level_info['kills'],
+                 upgrade_points, base_damage, base_health, base_speed, tuple(SPECIAL_ABILITIES.values()))
+    if compositor.begin_scene(scene_key):
+        screen.fill((0, 0, 0))
+        if state == GameState.TITLE:
+            draw_title_screen()
+        elif state == GameState.PAUSED:
+            draw_world()
+            draw_level_info()
+            draw_pause_screen()
+        elif state == GameState.GAME_OVER:
+            draw_world()
+            draw_level_info()
+            draw_game_over()
+        elif state == GameState.UPGRADE:
+            draw_upgrade_menu()
+        compositor.store_background(screen)
+    draw_ui()
+
+def main(record_path=None, replay_path=None, seed=None, headless=False, render=True,
+         input_source=None, size=(WIDTH, HEIGHT), trace_path=None, show_perf_overlay=False,
+         asset_report=False, measure_startup=False, map_path=None, generate=None,
+         generate_size=(GENERATED_LEVEL_SIZE, GENERATED_LEVEL_SIZE), sphere_tracing=False, load_path=None, stress=None):
+    global game_state, player_health, player_speed, ability_cooldowns, SPHERE_TRACING, STRESS
+    SPHERE_TRACING = sphere_tracing
+    STRESS = stress
+    
+    # Replays and other injected input sources replace the keyboard and mouse
+    if replay_path:
+        input_source = DemoPlayer(replay_path)
+        seed = input_source.seed
+    
+    # Anything that isn't a live session runs the simulation on a fixed 60 Hz
+    # step, uncapped, so results don't depend on how fast the machine is
+    uncapped = headless or input_source is not None
+    if replay_path:
+        game_clock.use_fixed_step(1 / input_source.tick_rate)
+    elif record_path or uncapped:
+        game_clock.use_fixed_step(1 / 60)
+    if record_path and seed is None:
+        seed = map_manager.seed
+    if seed is not None:
+        map_manager.set_seed(seed)
+    if generate:
+        # Generated levels follow the session seed, so recordings replay the same maps
+        levels.use_generator(generate, *generate_size, map_manager.seed)
+    
+    startup_timer.mark('imports')
+    init_display(headless, size)
+    startup_timer.mark('display')
+    if map_path:
+        # Custom compiled maps replace level 1; large ones are memory-mapped
+        levels.add(1, map_path)
+    # Decode every image in the background while the title screen is up
+    assets.preload()
     if not initialize_game():
         print("Failed to initialize game. Exiting...")
         pygame.quit()
         sys.exit(1)
+    if load_path and not load_game(load_path):
+        pygame.quit()
+        sys.exit(1)
+    startup_timer.mark('game state')
+    
+    demo_recorder = DemoRecorder(record_path, map_manager.seed) if record_path else None
+    
+    # Timing spans are dumped on F9 and at exit
+    tracing = trace_path is not None
+    if tracing or stress:
+        profiler.enable()  # Stress runs break frame time down by span
+    trace_path = trace_path or 'trace.json'
+    
+    if show_perf_overlay:
+        perf_overlay.toggle()
     
     running = True
     game_state.change_state(GameState.TITLE)
-    last_health_regen = time.time()
+    last_frame_end = time.perf_counter()
+    last_health_regen = game_clock.time()
     slow_time_active = False
     slow_time_end = 0
     
     while running:
-        current_time = time.time()
+        profiler.begin_frame()
+        with profiler.span('input'):
+            if input_source:
+                frame = input_source.next_frame()
+                if frame is None:
+                    break
+                pygame.event.pump()  # Keep the window responsive during playback
+            else:
+                frame = InputFrame.from_pygame(pygame.event.get())
+            if demo_recorder:
+                demo_recorder.record(frame)
+        
+        current_time = game_clock.time()
         
         # Handle health regeneration
         if SPECIAL_ABILITIES['health_regen'] and current_time - last_health_regen >= 1.0:
@@ -1176,7 +1331,7 @@ def main():
             last_health_regen = current_time
         
         # Handle slow time
-        if SPECIAL_ABILITIES['slow_time'] and pygame.key.get_pressed()[pygame.K_SPACE]:
+        if SPECIAL_ABILITIES['slow_time'] and frame.ability:
             if current_time - ability_cooldowns['slow_time'] >= ABILITY_COOLDOWN:
                 slow_time_active = True
                 slow_time_end = current_time + SLOW_TIME_DURATION
@@ -1186,121 +1341,170 @@ def main():
             slow_time_active = False
         
         # Rest of the main game loop...
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    if game_state.current_state == GameState.TITLE:
-                        running = False
-                    else:
-                        pygame.mouse.set_visible(True)
-                        pygame.event.set_grab(False)
-                        running = False
-                elif event.key == pygame.K_f:
-                    current_flags = pygame.display.get_window_flags()
-                    if current_flags & pygame.FULLSCREEN:
-                        pygame.display.set_mode((1024, 720))
-                    else:
-                        pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
-                elif event.key == pygame.K_r and game_state.current_state == GameState.GAME_OVER:
-                    reset_game()
+        if frame.quit:
+            running = False
+        for key in frame.key_presses:
+            if key == pygame.K_ESCAPE:
+                if game_state.current_state == GameState.TITLE:
+                    running = False
+                else:
+                    pygame.mouse.set_visible(True)
+                    pygame.event.set_grab(False)
+                    running = False
+            elif key == pygame.K_F3:
+                perf_overlay.toggle()
+            elif key == pygame.K_F9:
+                if profiler.enabled:
+                    profiler.dump_chrome_trace(trace_path)
+            elif key == pygame.K_F5 and game_state.current_state == GameState.RUNNING:
+                save_game()
+            elif key == pygame.K_F8 and game_state.current_state != GameState.TITLE:
+                if load_game():
                     game_state.change_state(GameState.RUNNING)
-                elif event.key == pygame.K_p:
-                    if game_state.current_state == GameState.RUNNING:
-                        game_state.change_state(GameState.PAUSED)
-                        pygame.mouse.set_visible(True)
-                        pygame.event.set_grab(False)
-                    elif game_state.current_state == GameState.PAUSED:
-                        game_state.change_state(GameState.RUNNING)
-                        pygame.mouse.set_visible(False)
-                        pygame.event.set_grab(True)
-                elif game_state.current_state == GameState.TITLE:
+            elif key == pygame.K_f and not uncapped:
+                current_flags = pygame.display.get_window_flags()
+                if current_flags & pygame.FULLSCREEN:
+                    pygame.display.set_mode((1024, 720))
+                else:
+                    pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
+            elif key == pygame.K_r and game_state.current_state == GameState.GAME_OVER:
+                reset_game()
+                game_state.change_state(GameState.RUNNING)
+            elif key == pygame.K_p:
+                if game_state.current_state == GameState.RUNNING:
+                    game_state.change_state(GameState.PAUSED)
+                    pygame.mouse.set_visible(True)
+                    pygame.event.set_grab(False)
+                elif game_state.current_state == GameState.PAUSED:
                     game_state.change_state(GameState.RUNNING)
                     pygame.mouse.set_visible(False)
                     pygame.event.set_grab(True)
-                elif game_state.current_state == GameState.UPGRADE:
-                    handle_upgrade(event.key)
+            elif game_state.current_state == GameState.TITLE:
+                game_state.change_state(GameState.RUNNING)
+                pygame.mouse.set_visible(False)
+                pygame.event.set_grab(True)
+            elif game_state.current_state == GameState.UPGRADE:
+                handle_upgrade(key)
         
         # Apply slow time effect
-        if slow_time_active:
+        if slow_time_active and not game_clock.is_fixed():
             pygame.time.delay(50)  # Slow down the game
         
-        # Rest of the game loop...
-        screen.fill((0, 0, 0))
+        if stress and game_state.current_state == GameState.RUNNING:
+            with profiler.span('stress'):
+                stress.populate(map_manager, particles, player_x, player_y, player_angle)
         
-        if game_state.current_state == GameState.TITLE:
-            draw_title_screen()
-        elif game_state.current_state == GameState.RUNNING:
-            handle_input()
-            
-            # Update map manager
-            player_state = {
-                'x': player_x,
-                'y': player_y,
-                'health': player_health,
-                'angle': player_angle
-            }
-            
-            # Update game state through map manager
-            if not map_manager.update(1/60, player_state):
-                game_state.change_state(GameState.GAME_OVER)
-            
-            # Check for level completion
-            if map_manager.level_completed:
-                if not map_manager.next_level():
-                    game_state.change_state(GameState.GAME_OVER)
-            
-            cast_rays()
-            draw_exit_indicator()
-            draw_weapon(is_shooting, shoot_frame)
-            draw_player_health()
-            draw_kill_counter()
-            draw_blood_overlay()
-            draw_level_info()
-            
-            # Check for time limit
-            if time.time() - map_manager.level_start_time > LEVEL_TIME_LIMIT:
-                game_state.change_state(GameState.GAME_OVER)
-                pygame.mouse.set_visible(True)
-                pygame.event.set_grab(False)
-        elif game_state.current_state == GameState.PAUSED:
-            cast_rays()
-            draw_weapon(is_shooting, shoot_frame)
-            draw_player_health()
-            draw_kill_counter()
-            draw_blood_overlay()
-            draw_level_info()
-            draw_pause_screen()
-        elif game_state.current_state == GameState.GAME_OVER:
-            cast_rays()
-            draw_weapon(is_shooting, shoot_frame)
-            draw_player_health()
-            draw_kill_counter()
-            draw_blood_overlay()
-            draw_level_info()
-            draw_game_over()
-        elif game_state.current_state == GameState.UPGRADE:
-            draw_upgrade_menu()
-        
-        # Update UI
-        ui_manager.update({
-            'level': map_manager.current_level,
-            'health': player_health,
-            'kill_count': kill_count,
-            'position': (player_x, player_y),
-            'angle': player_angle
-        }, map_manager.monster_manager.monsters if map_manager.monster_manager else [])
+        if game_state.current_state == GameState.RUNNING:
+            with profiler.span('update'):
+                update_game(frame)
         
-        # Draw UI
-        ui_manager.draw(screen)
+        if render:
+            with profiler.span('draw'):
+                draw_frame()
+            with profiler.span('flip'):
+                compositor.present()
+        game_clock.tick()
+        profiler.end_frame()
+        if stress and game_state.current_state == GameState.RUNNING:
+            if not stress.record(profiler.last_frame_totals, stress.counts(map_manager, particles)):
+                running = False
+        if not startup_timer.finished:
+            startup_timer.finish()
+            if measure_startup:
+                startup_timer.print_report()
+        clock.tick(0 if uncapped else 60)
         
-        pygame.display.flip()
-        clock.tick(60)
+        frame_end = time.perf_counter()
+        perf_overlay.add_frame(frame_end - last_frame_end)
+        last_frame_end = frame_end
     
+    if tracing:
+        profiler.dump_chrome_trace(trace_path)
+    if stress:
+        stress.print_report()
+        print(f"Wrote the scaling curve to {stress.write()}")
+    if asset_report:
+        assets.wait()
+        assets.print_report()
+    assets.shutdown()
+    saves.shutdown()  # Finish writing a save still in progress
+    if demo_recorder:
+        demo_recorder.close()
+    if isinstance(input_source, DemoPlayer):
+        print(f"Replayed {input_source.ticks} ticks from {input_source.path}")
     pygame.mouse.set_visible(True)
     pygame.event.set_grab(False)
     pygame.quit()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Doom-style raycaster")
+    parser.add_argument('--record', metavar='PATH', help="record this session's input to a demo file")
+    parser.add_argument('--replay', metavar='PATH', help="replay a recorded demo file at full speed")
+    parser.add_argument('--seed', type=parse_seed, help="seed for the level random number generators")
+    parser.add_argument('--headless', action='store_true',
+                        help="run without a window using SDL's dummy video driver, uncapped")
+    parser.add_argument('--no-render', action='store_true', help="skip all drawing (simulation only)")
+    parser.add_argument('--ticks', type=int, help="stop a headless run after this many ticks")
+    parser.add_argument('--profile', action='store_true', help="record per-frame timing spans (F9 dumps a trace)")
+    parser.add_argument('--trace', metavar='PATH', help="Chrome trace_event file for --profile (default trace.json)")
+    parser.add_argument('--perf-overlay', action='store_true', help="start with the F3 performance overlay shown")
+    parser.add_argument('--size', default=f"{WIDTH}x{HEIGHT}", help="off-screen resolution for headless runs")
+    parser.add_argument('--asset-report', action='store_true', help="print per-image load times and memory at exit")
+    parser.add_argument('--map', metavar='PATH', help="play a compiled .lvl, .wld or sector map .bsp file as level 1")
+    parser.add_argument('--generate', choices=STRATEGIES, help="play procedurally generated levels")
+    parser.add_argument('--generate-size', default=f"{GENERATED_LEVEL_SIZE}x{GENERATED_LEVEL_SIZE}",
+                        help="grid size WxH of generated levels")
+    parser.add_argument('--sphere-trace', action='store_true',
+                        help="cast rays by sphere tracing the level's wall distance field")
+    parser.add_argument('--stress', action='store_true',
+                        help="ramp the level up to many monsters, hearts and particles and record frame time")
+    parser.add_argument('--stress-config', metavar='PATH', help="JSON stress settings (implies --stress)")
+    parser.add_argument('--stress-monsters', type=int, help=f"monsters at the top of the ramp (default {STRESS_MONSTERS})")
+    parser.add_argument('--stress-hearts', type=int, help=f"hearts at the top of the ramp (default {STRESS_HEARTS})")
+    parser.add_argument('--stress-particles', type=int,
+                        help=f"particles at the top of the ramp (default {STRESS_PARTICLES})")
+    parser.add_argument('--stress-steps', type=int, help=f"ramp steps (default {STRESS_STEPS})")
+    parser.add_argument('--stress-output', metavar='PATH', help=f"scaling curve JSON (default {STRESS_OUTPUT})")
+    parser.add_argument('--load', metavar='PATH', help="resume a game saved with F5 (quicksave.sav)")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="print time to first frame broken down by startup phase")
+    return parser.parse_args(argv)
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def parse_seed(text):
+    """--seed value, rejected unless demo and save files can store it"""
+    seed = int(text)
+    if not 0 <= seed <= MAX_SEED:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and {MAX_SEED}")
+    return seed
+
+def stress_scenario(args):
+    """The StressScenario the command line asks for, or None"""
+    if not (args.stress or args.stress_config):
+        return None
+    return StressScenario.from_config(args.stress_config, seed=args.seed or 0, monsters=args.stress_monsters,
+                                      hearts=args.stress_hearts, particles=args.stress_particles,
+                                      steps=args.stress_steps, output=args.stress_output)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    try:
+        stress = stress_scenario(args)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Could not set up the stress scenario: {e}")
+        sys.exit(1)
+    input_source = None
+    if args.headless and not args.replay:
+        # Leave the title screen on the first tick, then idle
+        input_source = ScriptedInput([InputFrame(key_presses=[pygame.K_RETURN])], max_ticks=args.ticks)
+    main(record_path=args.record, replay_path=args.replay, seed=args.seed,
+         headless=args.headless, render=not args.no_render,
+         input_source=input_source, size=parse_size(args.size),
+         trace_path=args.trace or ('trace.json' if args.profile else None),
+         show_perf_overlay=args.perf_overlay, asset_report=args.asset_report,
+         measure_startup=args.measure_startup, map_path=args.map,
+         generate=args.generate, generate_size=parse_size(args.generate_size),
+         sphere_tracing=args.sphere_trace, load_path=args.load, stress=stress)
@@ -0,0 +1,3 @@
+"""
+Headless microbenchmarks of the game's hot paths
+"""
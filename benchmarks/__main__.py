@@ -0,0 +1,67 @@
+"""Run the microbenchmarks, or compare two runs.
+
+Usage: python -m benchmarks run [-k PATTERN] [-o results.json] [--min-time SECONDS]
+       python -m benchmarks compare RESULTS.json [--baseline PATH] [--threshold 0.15]
+
+Run from the repository root. `run` times each case (see cases.py) for at
+least --min-time seconds with the garbage collector off and reports calls
+per second, then runs it once more under tracemalloc for its peak
+allocation and the number of memory blocks it allocated that are still
+allocated afterwards (a snapshot diff). `compare` lists every case side
+by side with the stored baseline (benchmarks/baseline.json by default)
+and exits with status 1 when any regressed: only calls per second and
+peak allocation are gated, retained blocks are informational.
+"""
+import argparse
+import os
+import sys
+
+def run(args):
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    from benchmarks.cases import registry
+    from benchmarks.harness import run as run_benchmarks, write_results
+    document = run_benchmarks(registry, args.k, args.min_time)
+    if not document['benchmarks']:
+        print(f"No benchmark matches {args.k!r}")
+        return 1
+    if args.output:
+        write_results(args.output, document)
+        print(f"Wrote {len(document['benchmarks'])} results to {args.output}")
+    return 0
+
+def compare(args):
+    from benchmarks.harness import compare as compare_results, read_results
+    rows = compare_results(read_results(args.baseline), read_results(args.results), args.threshold)
+    regressed = 0
+    for name, before, after, regressions in rows:
+        if before is None or after is None:
+            print(f"{name:<40} {'only in ' + (args.results if before is None else args.baseline)}")
+            continue
+        change = after['ops_per_sec'] / before['ops_per_sec'] - 1
+        flag = f"  REGRESSION ({', '.join(regressions)})" if regressions else ''
+        print(f"{name:<40} {before['ops_per_sec']:>12.1f} -> {after['ops_per_sec']:>12.1f} ops/s {change:>+8.1%}  "
+              f"{before['peak_alloc_kib']:>9.1f} -> {after['peak_alloc_kib']:>9.1f} KiB{flag}")
+        regressed += bool(regressions)
+    print(f"{regressed} of {len(rows)} benchmarks regressed by more than {args.threshold:.0%}")
+    return 1 if regressed else 0
+
+def main(argv=None):
+    from benchmarks.harness import BASELINE_PATH, MIN_TIME, REGRESSION_THRESHOLD
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Game hot path microbenchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('-k', metavar='PATTERN', help="only run cases whose name contains PATTERN")
+    run_parser.add_argument('-o', '--output', metavar='PATH', help="write the results as JSON")
+    run_parser.add_argument('--min-time', type=float, default=MIN_TIME, help="seconds to time each case for")
+    run_parser.set_defaults(handler=run)
+    compare_parser = commands.add_parser('compare', help="flag regressions against a baseline run")
+    compare_parser.add_argument('results', metavar='RESULTS')
+    compare_parser.add_argument('--baseline', default=BASELINE_PATH, help="results to compare against")
+    compare_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                                help="fraction of slowdown or allocation growth that counts as a regression")
+    compare_parser.set_defaults(handler=compare)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
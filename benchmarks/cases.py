@@ -0,0 +1,156 @@
+import random
+import numpy as np
+from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.game.level import Level, WALL, FLOOR
+from src.game.level_compiler import pack_level
+from src.game.maze_generator import generate_level
+from src.game.spawn_index import SpawnIndex, spawn_distance
+from src.game.wall_field import WallField, build_field
+from src.entities.monster import Monster
+from src.entities.monster_manager import MonsterManager
+from src.entities.heart_manager import HeartManager
+from benchmarks.harness import Registry
+
+# Every case places its monsters and hearts from this seed, so runs compare like with like
+SEED = 1234
+RESOLUTIONS = ('320x240', '640x480', '1024x720')
+MONSTER_COUNTS = (10, 100, 1000, 10000)
+SHOT_MONSTER_COUNTS = (10, 100, 1000)
+HEART_COUNTS = (10, 100, 1000)
+SPAWN_MAP_SIZE = 129
+
+registry = Registry()
+_game = None
+
+def game(size=(WIDTH, HEIGHT)):
+    """The launcher module with a headless display of `size` and level 1 loaded"""
+    global _game
+    if _game is None:
+        # Imported on first use: the launcher sets up the whole game at import time
+        import Game_Launcher
+        _game = Game_Launcher
+        _game.init_display(headless=True, size=size)
+        _game.initialize_game()
+    elif _game.screen.get_size() != size:
+        _game.init_display(headless=True, size=size)
+    # A clock that never ticks: no spawn or wave timer comes due while timing
+    game_clock.use_fixed_step(1 / 60)
+    _game.player_x, _game.player_y, _game.player_angle = _game.start_position()
+    return _game
+
+def parse_size(text):
+    width, height = text.split('x')
+    return int(width), int(height)
+
+def floor_positions(level, count, rng):
+    """`count` random plain floor cell centers of `level`"""
+    cells = level.spawn_candidates.tolist()
+    return [level.cell_center(*rng.choice(cells)) for _ in range(count)]
+
+def make_monsters(level, count, rng):
+    types = ('normal', 'normal', 'normal', 'elite')
+    return [Monster(x, y, rng.choice(types), 1) for x, y in floor_positions(level, count, rng)]
+
+def open_level(size):
+    """A level with walls only around its border: one big room"""
+    grid = np.full((size, size), FLOOR, dtype=np.uint8)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = WALL
+    return Level(pack_level(grid), f"open:{size}")
+
+@registry.add('cast_rays', RESOLUTIONS)
+def cast_rays(resolution):
+    launcher = game(parse_size(resolution))
+    return launcher.cast_rays
+
+@registry.add('shoot_projectile', SHOT_MONSTER_COUNTS)
+def shoot_projectile(count):
+    """A shot that misses every monster: the ray runs its full length, testing all of them each step"""
+    launcher = game()
+    rng = random.Random(SEED)
+    monsters = make_monsters(launcher.LEVEL, count, rng)
+    for monster in monsters:
+        monster.x += launcher.MAX_DEPTH * 4  # Out of reach of any shot
+    launcher.monsters = monsters
+    # Aim along the first row of the level, away from the walls
+    return lambda: launcher.shoot_projectile(0.0)
+
+@registry.add('MonsterManager.update', MONSTER_COUNTS)
+def monster_manager_update(count):
+    launcher = game()
+    level = launcher.LEVEL
+    manager = MonsterManager(level.cells, random.Random(SEED), 1, SpawnIndex(level), launcher.WALL_FIELD)
+    manager.monsters = make_monsters(level, count, random.Random(SEED))
+    manager.last_spawn_time = manager.last_wave_time = game_clock.time()
+    # Out of every monster's reach, so nothing attacks and the player never dies
+    player = {'x': -CELL_SIZE * 100, 'y': -CELL_SIZE * 100, 'health': float('inf'), 'angle': 0.0}
+    return lambda: manager.update(1 / 60, player)
+
+def _spawn_level(kind):
+    if kind == 'dense':
+        return generate_level(SPAWN_MAP_SIZE, SPAWN_MAP_SIZE, SEED, 'backtracker')
+    return open_level(SPAWN_MAP_SIZE)
+
+@registry.add('SpawnIndex.search', ('dense', 'sparse'))
+def spawn_index_search(kind):
+    """The breadth-first search redone each time the player enters a new cell"""
+    level = _spawn_level(kind)
+    index = SpawnIndex(level)
+    rng = random.Random(SEED)
+    cells = [tuple(cell) for cell in level.spawn_candidates.tolist()[:2]]
+    minimum = spawn_distance(MIN_SPAWN_DISTANCE)
+    step = [0]
+    def search():
+        step[0] += 1
+        index.move_to(*cells[step[0] % 2])
+        index.sample_position(rng, minimum)
+    return search
+
+@registry.add('MonsterManager.find_spawn', ('dense', 'sparse'))
+def find_spawn(kind):
+    """A spawn position search with 100 monsters to keep clear of"""
+    level = _spawn_level(kind)
+    index = SpawnIndex(level)
+    index.move_to(*level.spawn_candidates[0].tolist())
+    field = WallField(build_field(level.grid), WALL_FIELD_RESOLUTION)
+    rng = random.Random(SEED)
+    manager = MonsterManager(level.cells, rng, 1, index, field)
+    manager.monsters = make_monsters(level, 100, rng)
+    minimum = spawn_distance(MIN_SPAWN_DISTANCE)
+    return lambda: manager._find_spawn_position(minimum, BOSS_SPAWN_RADIUS)
+
+@registry.add('UIManager.update', MONSTER_COUNTS[:3])
+def ui_manager_update(count):
+    """A HUD update with the player walking onto a new cell every call"""
+    launcher = game()
+    ui = launcher.ui_manager
+    ui.set_maze(launcher.MAP)
+    monsters = make_monsters(launcher.LEVEL, count, random.Random(SEED))
+    positions = floor_positions(launcher.LEVEL, 64, random.Random(SEED))
+    step = [0]
+    def update():
+        step[0] += 1
+        ui.update({
+            'level': 1, 'health': 5, 'kill_count': step[0],
+            'position': positions[step[0] % len(positions)], 'angle': step[0] * 0.01, 'fps': 60
+        }, monsters)
+    return update
+
+def _heart_manager(count):
+    launcher = game()
+    level = launcher.LEVEL
+    rng = random.Random(SEED)
+    hearts = HeartManager(level.cells, rng, level, f"{SEED}:1")
+    hearts.spawn_positions = floor_positions(level, count, rng)
+    hearts.spawn_hearts()
+    return launcher, hearts
+
+@registry.add('HeartManager.update', HEART_COUNTS)
+def heart_manager_update(count):
+    _, hearts = _heart_manager(count)
+    return hearts.update
+
+@registry.add('HeartManager.draw', HEART_COUNTS)
+def heart_manager_draw(count):
+    launcher, hearts = _heart_manager(count)
+    return lambda: hearts.draw(launcher.screen)
@@ -0,0 +1,145 @@
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+# Each benchmark runs for at least this long (seconds) and this many calls
+MIN_TIME = 0.5
+MIN_CALLS = 3
+# Results of a full run on the reference machine, for compare
+BASELINE_PATH = 'benchmarks/baseline.json'
+# Throughput drops (or peak allocation growth) beyond this fraction of the baseline are regressions
+REGRESSION_THRESHOLD = 0.15
+# Allocation growth smaller than this (KiB) is noise, whatever the fraction
+ALLOCATION_NOISE_KIB = 4.0
+
+class Benchmark:
+    def __init__(self, name, setup, params):
+        self.name = name
+        self.setup = setup  # setup(param) -> the function to time, called with no arguments
+        self.params = params
+
+    def cases(self):
+        """(full name, param) for each parameter, e.g. 'cast_rays[640x480]'"""
+        if not self.params:
+            return [(self.name, None)]
+        return [(f"{self.name}[{param}]", param) for param in self.params]
+
+class Registry:
+    """Benchmarks by name, in the order they were registered"""
+    def __init__(self):
+        self.benchmarks = []
+
+    def add(self, name, params=()):
+        """Decorator registering `setup(param)`, which prepares one case and returns the call to time"""
+        def decorator(setup):
+            self.benchmarks.append(Benchmark(name, setup, list(params)))
+            return setup
+        return decorator
+
+    def cases(self, pattern=None):
+        for benchmark in self.benchmarks:
+            for name, param in benchmark.cases():
+                if pattern is None or pattern in name:
+                    yield name, benchmark, param
+
+def allocations(call):
+    """(peak KiB allocated during one call, memory blocks it allocated that are still allocated after it).
+
+    The block count comes from a tracemalloc snapshot diff: blocks the call
+    allocated and freed again don't show up in it, only in the peak.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    changes = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+    blocks = sum(change.count_diff for change in changes if change.count_diff > 0)
+    return (peak - start) / 1024, blocks
+
+def measure(call, min_time=MIN_TIME, min_calls=MIN_CALLS):
+    """Time `call` repeatedly, with the garbage collector off like timeit does"""
+    call()  # Warm caches, lazily built tables and the like
+    times = []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(times) < min_calls or time.perf_counter() - started < min_time:
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+    finally:
+        if enabled:
+            gc.enable()
+    # Throughput from the median call, which one slow call (another process, a page fault) doesn't move
+    median = sorted(times)[len(times) // 2]
+    peak_kib, blocks = allocations(call)
+    return {
+        'calls': len(times),
+        'ops_per_sec': 1 / median,
+        'median_ms': median * 1000,
+        'mean_ms': sum(times) / len(times) * 1000,
+        'min_ms': min(times) * 1000,
+        'peak_alloc_kib': round(peak_kib, 2),
+        'retained_blocks': blocks,
+    }
+
+def run(registry, pattern=None, min_time=MIN_TIME, report=print):
+    """Run every matching benchmark; returns the results document written as JSON"""
+    results = {}
+    for name, benchmark, param in registry.cases(pattern):
+        call = benchmark.setup(param)
+        results[name] = measure(call, min_time)
+        row = results[name]
+        report(f"{name:<40} {row['ops_per_sec']:>12.1f} ops/s  {row['median_ms']:>9.3f} ms  "
+               f"{row['peak_alloc_kib']:>10.1f} KiB peak  {row['retained_blocks']:>7} blocks kept")
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'benchmarks': results,
+    }
+
+def write_results(path, document):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+
+def read_results(path):
+    with open(path) as f:
+        document = json.load(f)
+    if 'benchmarks' not in document:
+        raise ValueError(f"{path} is not a benchmark results file")
+    return document
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """(name, baseline row, current row, regressions) for every benchmark in either document.
+
+    A benchmark regresses when its throughput falls more than `threshold`
+    below the baseline, or its peak allocation grows by more than that
+    fraction (and more than ALLOCATION_NOISE_KIB). Retained blocks are
+    reported but not compared.
+    """
+    old, new = baseline['benchmarks'], current['benchmarks']
+    rows = []
+    for name in list(old) + [name for name in new if name not in old]:
+        before, after = old.get(name), new.get(name)
+        regressions = []
+        if before and after:
+            if after['ops_per_sec'] < before['ops_per_sec'] * (1 - threshold):
+                regressions.append('speed')
+            growth = after['peak_alloc_kib'] - before['peak_alloc_kib']
+            if growth > ALLOCATION_NOISE_KIB and growth > before['peak_alloc_kib'] * threshold:
+                regressions.append('allocations')
+        rows.append((name, before, after, regressions))
+    return rows
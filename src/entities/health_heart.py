@@ -1,6 +1,6 @@
 import pygame
-import os
 from src.utils.constants import *
+from src.utils.asset_manager import assets
 
 class HealthHeart:
     def __init__(self, x, y):
@@ -17,38 +17,11 @@ class HealthHeart:
         self.load_images()
 
     def load_images(self):
-        try:
-            # Create Images folder if it doesn't exist
-            if not os.path.exists('Images'):
-                os.makedirs('Images')
-                print("Created Images folder. Please add heart animation images.")
-            
-            # Try to load 8 frames first
-            frame_count = 8
-            while frame_count > 0:
-                image_path = os.path.join('Images', f'heart{frame_count}.png')
-                if os.path.exists(image_path):
-                    break
-                frame_count -= 1
-            
-            if frame_count == 0:
-                print("No heart images found. Using fallback heart graphics.")
-                return
-            
-            # Load all available frames
-            for i in range(1, frame_count + 1):
-                image_path = os.path.join('Images', f'heart{i}.png')
-                if os.path.exists(image_path):
-                    image = pygame.image.load(image_path)
-                    image = image.convert_alpha()
-                    image = pygame.transform.scale(image, (self.size, self.size))
-                    self.images.append(image)
-            
-            print(f"Loaded {len(self.images)} heart animation frames from Images folder")
-            
-        except Exception as e:
-            print(f"Error loading heart images: {e}")
-            self.images = []
+        # Frames heart1.png, heart2.png, ... come from the shared asset registry
+        for name in assets.frames('heart'):
+            image = assets.get(name, (self.size, self.size))
+            if image is not None:
+                self.images.append(image)
 
     def draw(self, screen, x, y, size):
         if self.collected:
@@ -2,18 +2,21 @@ import pygame
 import random
 import math
 from src.utils.constants import *
+from src.utils.asset_manager import assets
+from src.utils.profiler import profiler
+from src.game.placement import placements
 
 class HeartManager:
-    def __init__(self, maze):
+    def __init__(self, maze, rng=None, level=None, seed=None):
         self.maze = maze
+        self.rng = rng or random.Random()
+        self.level = level
+        self.seed = seed  # Seed of the level, for its cached placements
         self.hearts = []
-        try:
-            # Load the heart image and convert it for better performance
-            self.heart_image = pygame.image.load("Images/heart.png").convert_alpha()
-            self.heart_image = pygame.transform.scale(self.heart_image, (HEART_SIZE, HEART_SIZE))
-        except Exception as e:
-            print(f"Error loading heart image: {e}")
-            # Create a fallback heart surface if image loading fails
+        # Shared, already converted heart image from the asset registry
+        self.heart_image = assets.get("heart.png", (HEART_SIZE, HEART_SIZE))
+        if self.heart_image is None:
+            # Create a fallback heart surface if the image is missing
             self.heart_image = pygame.Surface((HEART_SIZE, HEART_SIZE), pygame.SRCALPHA)
             pygame.draw.polygon(self.heart_image, (255, 0, 0), [
                 (HEART_SIZE//2, 0),
@@ -24,42 +27,20 @@ class HeartManager:
                 (0, HEART_SIZE//3)
             ])
         self.spawn_positions = self._generate_spawn_positions()
+
+    def reset(self):
+        """Clear hearts and pick new spawn positions for the current maze"""
+        self.hearts.clear()
+        self.spawn_positions = self._generate_spawn_positions()
         
     def _generate_spawn_positions(self):
-        positions = []
-        # Try to find valid spawn positions
-        for _ in range(MAX_HEART_SPAWN_ATTEMPTS):
-            # Get a random cell that's not a wall
-            cell_x = random.randint(0, len(self.maze[0]) - 1)
-            cell_y = random.randint(0, len(self.maze) - 1)
-            
-            if self.maze[cell_y][cell_x] == 1:  # Skip walls
-                continue
-                
-            # Convert cell coordinates to world coordinates
-            x = cell_x * CELL_SIZE + CELL_SIZE // 2
-            y = cell_y * CELL_SIZE + CELL_SIZE // 2
-            
-            # Check if position is too close to other hearts
-            if self._is_too_close_to_other_hearts(x, y, positions):
-                continue
-                
-            positions.append((x, y))
-            
-            # Stop if we have enough positions
-            if len(positions) >= MAX_HEARTS:
-                break
-                
-        return positions
-        
-    def _is_too_close_to_other_hearts(self, x, y, positions):
-        for pos in positions:
-            dx = pos[0] - x
-            dy = pos[1] - y
-            distance = math.sqrt(dx * dx + dy * dy)
-            if distance < MIN_HEART_DISTANCE:
-                return True
-        return False
+        # Hearts are a random few of an evenly spaced set spread over the plain floor,
+        # like monster spawns, so none lands in a special room or on an exit
+        spacing = MIN_HEART_DISTANCE
+        if self.level.spawn_candidates is not None:
+            spacing = max(spacing, CELL_SIZE * math.sqrt(len(self.level.spawn_candidates) / (2 * MAX_HEARTS)))
+        positions = placements.positions(self.level, self.seed, spacing, floor_only=True)
+        return self.rng.sample(positions, min(MAX_HEARTS, len(positions)))
         
     def spawn_hearts(self):
         for pos in self.spawn_positions:
@@ -86,6 +67,7 @@ class HeartManager:
                 return True
         return False
         
+    @profiler.timed('HeartManager.update')
     def update(self):
         # Update heart animations
         for heart in self.hearts:
@@ -1,17 +1,28 @@
 import pygame
-import time
 import random
 from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.utils.profiler import profiler
+from src.game.level import levels
+from src.game.spawn_index import SpawnIndex
+from src.game.triggers import TriggerSystem
+from src.game.wall_field import wall_fields
 from src.entities.monster_manager import MonsterManager
 from src.entities.heart_manager import HeartManager
 
 class MapManager:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.current_level = 1
-        self.current_map = MAPS[0]
+        self.level = None  # Compiled level, loaded by reset_level()
+        self.current_map = None  # Its cell grid, indexed [y, x]
+        self.spawn_index = None  # Floor cells by path distance from the player
+        self.triggers = None  # Special-area enter events
+        self.wall_field = None  # Distance to the nearest wall, for collision
         self.monster_manager = None
         self.heart_manager = None
-        self.level_start_time = time.time()
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random()
+        self.level_start_time = game_clock.time()
         self.level_completed = False
         self.visited_cells = set()
         self.level_time_limit = LEVEL_TIME_LIMIT
@@ -20,28 +31,51 @@ class MapManager:
         self.last_hit_time = 0
         self.invulnerability_time = INVULNERABILITY_TIME
 
+    def set_seed(self, seed):
+        """Set the base seed that every level's RNG is derived from"""
+        self.seed = seed
+
     def reset_level(self):
         """Reset the current level state"""
-        self.current_map = MAPS[self.current_level - 1]
-        self.level_start_time = time.time()
+        self.level = levels.get(self.current_level)
+        self.current_map = self.level.cells
+        self.spawn_index = SpawnIndex(self.level)
+        self.wall_field = wall_fields.get(self.level)
+        self.triggers = TriggerSystem(self.level)
+        self.triggers.on_enter('treasure', self._enter_treasure, once=True)
+        self.triggers.on_enter('trap', self._enter_trap, cooldown=TRAP_TRIGGER_COOLDOWN)
+        self.triggers.on_enter('boss', self._enter_boss, once=True)
+        self.triggers.on_enter('exit', self._enter_exit, on='cell')
+        # Every random draw in a level comes from this RNG so replays are exact
+        level_seed = f"{self.seed}:{self.current_level}"
+        self.rng.seed(level_seed)
+        self.level_start_time = game_clock.time()
         self.level_completed = False
         self.visited_cells.clear()
         self.kill_count = 0
         
         # Initialize or reset managers
         if self.monster_manager:
+            self.monster_manager.maze = self.current_map
+            self.monster_manager.spawn_index = self.spawn_index
+            self.monster_manager.wall_field = self.wall_field
+            self.monster_manager.level = self.current_level
             self.monster_manager.reset()
         else:
-            self.monster_manager = MonsterManager(self.current_map)
+            self.monster_manager = MonsterManager(self.current_map, self.rng, self.current_level,
+                                                  self.spawn_index, self.wall_field)
             
         if self.heart_manager:
+            self.heart_manager.maze = self.current_map
+            self.heart_manager.level = self.level
+            self.heart_manager.seed = level_seed
             self.heart_manager.reset()
         else:
-            self.heart_manager = HeartManager(self.current_map)
+            self.heart_manager = HeartManager(self.current_map, self.rng, self.level, level_seed)
 
     def next_level(self):
         """Advance to the next level"""
-        if self.current_level < MAX_LEVEL:
+        if self.current_level < min(MAX_LEVEL, levels.count()):
             self.current_level += 1
             self.reset_level()
             return True
@@ -52,7 +86,11 @@ class MapManager:
         cell_x = int(player_x / CELL_SIZE)
         cell_y = int(player_y / CELL_SIZE)
         self.visited_cells.add((cell_x, cell_y))
+        self.spawn_index.move_to(cell_x, cell_y)
+        # Chunked worlds load the regions around the player in the background
+        self.level.stream_around(cell_x, cell_y)
 
+    @profiler.timed('MapManager.update')
     def update(self, dt, player):
         """Update game state"""
         # Update visited cells
@@ -85,50 +123,45 @@ class MapManager:
         cell_x = int(x / CELL_SIZE)
         cell_y = int(y / CELL_SIZE)
         
-        if 0 <= cell_x < len(self.current_map[0]) and 0 <= cell_y < len(self.current_map):
-            return self.current_map[cell_y][cell_x] in SPECIAL_AREAS.values()
+        if self.level.in_bounds(cell_x, cell_y):
+            return self.current_map[cell_y, cell_x] in SPECIAL_AREAS.values()
         return False
 
     def handle_special_area(self, x, y):
-        """Handle special area effects"""
-        cell_x = int(x / CELL_SIZE)
-        cell_y = int(y / CELL_SIZE)
-        
-        if 0 <= cell_x < len(self.current_map[0]) and 0 <= cell_y < len(self.current_map):
-            cell_value = self.current_map[cell_y][cell_x]
-            
-            if cell_value == SPECIAL_AREAS['treasure']:
-                if self.heart_manager:
-                    self.heart_manager.spawn_hearts()
-            
-            elif cell_value == SPECIAL_AREAS['trap']:
-                if self.monster_manager:
-                    self.monster_manager.spawn_wave()
-            
-            elif cell_value == SPECIAL_AREAS['boss']:
-                if self.monster_manager:
-                    self.monster_manager.spawn_boss()
-            
-            elif cell_value == SPECIAL_AREAS['exit']:
-                return self.next_level()
-        
-        return False
+        """Handle special area effects when the player steps into one"""
+        return self.triggers.update(int(x / CELL_SIZE), int(y / CELL_SIZE), x, y)
+
+    def _enter_treasure(self, x, y):
+        if self.heart_manager:
+            self.heart_manager.spawn_hearts()
+
+    def _enter_trap(self, x, y):
+        if self.monster_manager:
+            self.monster_manager.spawn_wave(x, y)
+
+    def _enter_boss(self, x, y):
+        if self.monster_manager:
+            self.monster_manager.spawn_boss(x, y)
+
+    def _enter_exit(self, x, y):
+        return self.next_level()
 
     def check_level_completion(self):
         """Check if level is completed"""
         # Check if time limit is reached
-        if time.time() - self.level_start_time > self.level_time_limit:
+        if game_clock.time() - self.level_start_time > self.level_time_limit:
             return True
             
-        # Check if all monsters are defeated
-        if self.monster_manager and len(self.monster_manager.monsters) == 0:
+        # Check if all monsters are defeated (an empty level before the first spawn doesn't count)
+        if (self.monster_manager and self.monster_manager.spawned_count > 0
+                and len(self.monster_manager.monsters) == 0):
             return True
             
         return False
 
     def take_damage(self, amount):
         """Handle player taking damage"""
-        current_time = time.time()
+        current_time = game_clock.time()
         if current_time - self.last_hit_time >= self.invulnerability_time:
             self.player_health -= amount
             self.last_hit_time = current_time
@@ -143,7 +176,7 @@ class MapManager:
         """Get current level information"""
         return {
             'level': self.current_level,
-            'time_remaining': max(0, self.level_time_limit - (time.time() - self.level_start_time)),
+            'time_remaining': max(0, self.level_time_limit - (game_clock.time() - self.level_start_time)),
             'kills': self.kill_count,
             'health': self.player_health
         } 
\ No newline at end of file
@@ -2,6 +2,8 @@ import pygame
 import math
 import random
 from src.utils.constants import *
+from src.utils.asset_manager import assets
+from src.game.wall_field import slide_move
 
 class Monster:
     def __init__(self, x, y, monster_type, level):
@@ -17,14 +19,10 @@ class Monster:
         self.size = MONSTER_SIZE[monster_type]
         self.color = MONSTER_COLORS[monster_type]
         
-        # Load monster image if available
-        try:
-            self.image = pygame.image.load(f'Images/{monster_type}.png')
-            self.image = pygame.transform.scale(self.image, (self.size, self.size))
-        except:
-            self.image = None
+        # Shared monster image if available (None when the file doesn't exist)
+        self.image = assets.get(MONSTER_IMAGES[monster_type], (self.size, self.size))
 
-    def update(self, dt, player, current_map):
+    def update(self, dt, player, current_map, field=None):
         """Update monster state"""
         # Update attack cooldown
         if self.attack_cooldown > 0:
@@ -39,17 +37,9 @@ class Monster:
             dx /= distance
             dy /= distance
             
-            # Check for walls
-            new_x = self.x + dx * self.speed * dt
-            new_y = self.y + dy * self.speed * dt
-            
-            cell_x = int(new_x / CELL_SIZE)
-            cell_y = int(new_y / CELL_SIZE)
-            
-            if 0 <= cell_x < len(current_map[0]) and 0 <= cell_y < len(current_map):
-                if current_map[cell_y][cell_x] == 0:  # Free space
-                    self.x = new_x
-                    self.y = new_y
+            # Slide along walls instead of stopping dead against them
+            self.x, self.y = slide_move(field, current_map, self.x, self.y,
+                                        dx * self.speed * dt, dy * self.speed * dt, self.size / 2)
 
     def draw(self, screen, player_x, player_y):
         """Draw monster on screen"""
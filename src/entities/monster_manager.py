@@ -1,52 +1,63 @@
 import random
 import math
-import time
 from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.utils.profiler import profiler
 from src.entities.monster import Monster
+from src.game.spawn_index import spawn_distance
 
 class MonsterManager:
-    def __init__(self, maze):
+    def __init__(self, maze, rng=None, level=1, spawn_index=None, wall_field=None):
         self.maze = maze
+        self.spawn_index = spawn_index
+        self.wall_field = wall_field
+        self.rng = rng or random.Random()
+        self.level = level
         self.monsters = []
-        self.last_spawn_time = time.time()
-        self.last_wave_time = time.time()
+        self.spawned_count = 0
+        self.last_spawn_time = game_clock.time()
+        self.last_wave_time = game_clock.time()
         self.boss_spawned = False
 
     def reset(self):
         """Reset the monster manager state"""
         self.monsters.clear()
-        self.last_spawn_time = time.time()
-        self.last_wave_time = time.time()
+        self.spawned_count = 0
+        self.last_spawn_time = game_clock.time()
+        self.last_wave_time = game_clock.time()
         self.boss_spawned = False
 
+    @profiler.timed('MonsterManager.update')
     def update(self, dt, player):
         """Update all monsters and handle player interactions"""
-        current_time = time.time()
+        current_time = game_clock.time()
         
-        # Spawn monsters if needed
-        if current_time - self.last_spawn_time >= SPAWN_INTERVAL:
-            self._try_spawn_monster(player['x'], player['y'])
-            self.last_spawn_time = current_time
+        with profiler.span('MonsterManager.spawn'):
+            # Spawn monsters if needed
+            if current_time - self.last_spawn_time >= SPAWN_INTERVAL:
+                self._try_spawn_monster(player['x'], player['y'])
+                self.last_spawn_time = current_time
 
-        # Spawn wave if needed
-        if current_time - self.last_wave_time >= WAVE_INTERVAL:
-            self.spawn_wave(player['x'], player['y'])
-            self.last_wave_time = current_time
+            # Spawn wave if needed
+            if current_time - self.last_wave_time >= WAVE_INTERVAL:
+                self.spawn_wave(player['x'], player['y'])
+                self.last_wave_time = current_time
 
-        # Update existing monsters
-        for monster in self.monsters[:]:
-            monster.update(dt, player, self.maze)
-            
-            # Check for player damage
-            dx = monster.x - player['x']
-            dy = monster.y - player['y']
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance < monster.attack_range and monster.attack_cooldown <= 0:
-                if monster.attack(player):
-                    player['health'] -= monster.damage
-                    if player['health'] <= 0:
-                        return False
+        with profiler.span('MonsterManager.move'):
+            # Update existing monsters
+            for monster in self.monsters[:]:
+                monster.update(dt, player, self.maze, self.wall_field)
+                
+                # Check for player damage
+                dx = monster.x - player['x']
+                dy = monster.y - player['y']
+                distance = math.sqrt(dx * dx + dy * dy)
+                
+                if distance < monster.attack_range and monster.attack_cooldown <= 0:
+                    if monster.attack(player):
+                        player['health'] -= monster.damage
+                        if player['health'] <= 0:
+                            return False
 
         return True
 
@@ -57,35 +68,31 @@ class MonsterManager:
 
     def _try_spawn_monster(self, player_x, player_y):
         """Attempt to spawn a single monster"""
+        position = self._find_spawn_position(spawn_distance(MIN_SPAWN_DISTANCE))
+        if position is None:
+            return
+        # Create and add monster
+        monster_type = 'normal' if self.rng.random() < 0.8 else 'elite'
+        monster = Monster(position[0], position[1], monster_type, self.level)
+        self.monsters.append(monster)
+        self.spawned_count += 1
+
+    def _find_spawn_position(self, min_distance, clearance=0):
+        """A floor cell at least `min_distance` cells of walking away from the player,
+        with `clearance` units of free space around it. When no sampled cell has that
+        much room (levels of one-cell corridors) the roomiest one sampled is used"""
+        roomiest, roomiest_distance = None, -1
         for _ in range(MAX_SPAWN_ATTEMPTS):
-            # Get random position
-            cell_x = random.randint(1, len(self.maze[0]) - 2)
-            cell_y = random.randint(1, len(self.maze) - 2)
-            
-            if self.maze[cell_y][cell_x] != 0:  # Skip walls
+            position = self.spawn_index.sample_position(self.rng, min_distance)
+            if position is None:
+                break
+            distance = self.wall_field.distance(*position) if clearance and self.wall_field else clearance
+            if distance <= roomiest_distance or self._is_too_close_to_other_monsters(*position):
                 continue
-                
-            # Convert to world coordinates
-            x = cell_x * CELL_SIZE + CELL_SIZE // 2
-            y = cell_y * CELL_SIZE + CELL_SIZE // 2
-            
-            # Check distance from player
-            dx = x - player_x
-            dy = y - player_y
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance < MIN_SPAWN_DISTANCE:
-                continue
-                
-            # Check distance from other monsters
-            if self._is_too_close_to_other_monsters(x, y):
-                continue
-                
-            # Create and add monster
-            monster_type = 'normal' if random.random() < 0.8 else 'elite'
-            monster = Monster(x, y, monster_type)
-            self.monsters.append(monster)
-            break
+            if distance >= clearance:
+                return position
+            roomiest, roomiest_distance = position, distance
+        return roomiest
 
     def spawn_wave(self, player_x, player_y):
         """Spawn a wave of monsters"""
@@ -99,35 +106,14 @@ class MonsterManager:
 
     def spawn_boss(self, player_x, player_y):
         """Spawn a boss monster"""
-        for _ in range(MAX_SPAWN_ATTEMPTS):
-            # Get random position
-            cell_x = random.randint(1, len(self.maze[0]) - 2)
-            cell_y = random.randint(1, len(self.maze) - 2)
-            
-            if self.maze[cell_y][cell_x] != 0:  # Skip walls
-                continue
-                
-            # Convert to world coordinates
-            x = cell_x * CELL_SIZE + CELL_SIZE // 2
-            y = cell_y * CELL_SIZE + CELL_SIZE // 2
-            
-            # Check distance from player
-            dx = x - player_x
-            dy = y - player_y
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance < MIN_SPAWN_DISTANCE * 2:  # Boss needs more space
-                continue
-                
-            # Check distance from other monsters
-            if self._is_too_close_to_other_monsters(x, y):
-                continue
-                
-            # Create and add boss
-            boss = Monster(x, y, 'boss')
-            self.monsters.append(boss)
-            self.boss_spawned = True
-            break
+        # Boss needs more space, both from the player and around itself
+        position = self._find_spawn_position(spawn_distance(MIN_SPAWN_DISTANCE * 2), BOSS_SPAWN_RADIUS)
+        if position is None:
+            return
+        boss = Monster(position[0], position[1], 'boss', self.level)
+        self.monsters.append(boss)
+        self.spawned_count += 1
+        self.boss_spawned = True
 
     def _is_too_close_to_other_monsters(self, x, y):
         """Check if a position is too close to other monsters"""
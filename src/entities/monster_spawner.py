@@ -2,10 +2,13 @@ import random
 import math
 from src.entities.monster import Monster
 from src.utils.constants import *
+from src.game.spawn_index import spawn_distance
 
 class MonsterSpawner:
-    def __init__(self, maze):
+    def __init__(self, maze, spawn_index, rng=None):
         self.maze = maze
+        self.spawn_index = spawn_index
+        self.rng = rng or random.Random()
         self.monsters = []
         self.spawn_timer = 0
         self.spawn_cooldown = 5.0  # Seconds between spawn attempts
@@ -32,6 +35,7 @@ class MonsterSpawner:
             self._try_spawn_monster(player)
 
     def _try_spawn_monster(self, player):
+        self.spawn_index.move_to(int(player.x // CELL_SIZE), int(player.y // CELL_SIZE))
         # Find valid spawn position
         spawn_pos = self._find_valid_spawn_position(player)
         if not spawn_pos:
@@ -47,27 +51,12 @@ class MonsterSpawner:
         self.monsters.append(monster)
 
     def _find_valid_spawn_position(self, player):
-        # Try to find a valid spawn position
-        for _ in range(10):  # Try 10 times
-            # Random position in maze
-            cell_x = random.randint(0, len(self.maze[0]) - 1)
-            cell_y = random.randint(0, len(self.maze) - 1)
-
-            # Check if cell is empty
-            if self.maze[cell_y][cell_x] != 0:
-                continue
-
-            # Convert to world coordinates
-            x = (cell_x + 0.5) * CELL_SIZE
-            y = (cell_y + 0.5) * CELL_SIZE
-
-            # Check distance from player
-            dx = x - player.x
-            dy = y - player.y
-            distance = math.sqrt(dx * dx + dy * dy)
-
-            if distance < MIN_SPAWN_DISTANCE:
-                continue
+        # Sample floor cells far enough from the player to walk to
+        for _ in range(10):  # Resample if crowded, up to 10 times
+            position = self.spawn_index.sample_position(self.rng, spawn_distance(MIN_SPAWN_DISTANCE))
+            if position is None:
+                return None
+            x, y = position
 
             # Check distance from other monsters
             too_close = False
@@ -84,10 +73,10 @@ class MonsterSpawner:
         return None
 
     def _determine_monster_type(self):
-        if not self.boss_spawned and random.random() < self.boss_chance:
+        if not self.boss_spawned and self.rng.random() < self.boss_chance:
             self.boss_spawned = True
             return 'boss'
-        elif random.random() < self.elite_chance:
+        elif self.rng.random() < self.elite_chance:
             return 'elite'
         else:
             return 'normal'
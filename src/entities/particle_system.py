@@ -0,0 +1,251 @@
+import math
+import numpy as np
+import pygame
+from src.utils.constants import *
+
+# Rows of ParticleSystem.data
+X, Y, Z, VX, VY, VZ, LIFE, MAX_LIFE, SIZE, R, G, B = range(12)
+FIELDS = 12
+
+class ParticleSystem:
+    """Short-lived world-space particles for muzzle flashes, blood and explosions.
+
+    Every attribute lives in one preallocated float32 array with a row per
+    field and a column per particle; live particles are packed into the
+    first `count` columns. `update()` advances all of them with in-place
+    NumPy operations and `draw()` projects, sorts and packs them into
+    preallocated index, rectangle and colour buffers, so neither allocates
+    arrays per frame or grows any storage. Only the optional `light_at`
+    lookup in `draw()` returns a new array.
+    """
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.dropped = 0  # Particles not emitted because the arrays were full
+        self.data = np.zeros((FIELDS, capacity), dtype=np.float32)
+        # Scratch rows and masks reused by emit/update/draw
+        self.scratch = np.zeros((8, capacity), dtype=np.float32)
+        self.mask = np.zeros(capacity, dtype=bool)
+        self.mask2 = np.zeros(capacity, dtype=bool)
+        self.columns = np.zeros(capacity, dtype=np.intp)
+        self.depth = np.zeros(0, dtype=np.float32)
+        # Draw buffers: visible particles farthest first, their sort keys,
+        # and the (left, top, side) and RGB of each, read back through memoryviews
+        self.index = np.arange(capacity, dtype=np.intp)
+        self.order = np.zeros(capacity, dtype=np.intp)
+        self.keys = np.zeros(capacity, dtype=np.int64)
+        self.rects = np.zeros((capacity, 3), dtype=np.int32)
+        self.colors = np.zeros((capacity, 3), dtype=np.uint8)
+        self.rect_values = memoryview(self.rects).cast('B').cast('i', self.rects.shape)
+        self.color_values = memoryview(self.colors).cast('B').cast('B', self.colors.shape)
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        # Purely visual, so it has its own generator and never touches the game RNG
+        self.rng = np.random.default_rng(seed)
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, count, x, y, z, color, speed, life, size, lift=0.0, direction=0.0, spread=math.pi):
+        """Emit a burst of `count` particles from (x, y, z).
+
+        Headings are spread +-`spread` radians around `direction`, horizontal
+        speeds range up to `speed`, vertical speed is around `lift` and
+        lifetimes are between half and all of `life` seconds. Returns the
+        number actually emitted.
+        """
+        start = self.count
+        emitted = min(count, self.capacity - start)
+        self.dropped += count - emitted
+        if emitted <= 0:
+            return 0
+        end = start + emitted
+        d = self.data[:, start:end]
+        heading, speeds, brightness = self.scratch[0, :emitted], self.scratch[1, :emitted], self.scratch[2, :emitted]
+
+        self.rng.random(out=heading, dtype=np.float32)
+        heading *= 2 * spread
+        heading += direction - spread
+        self.rng.random(out=speeds, dtype=np.float32)
+        speeds *= speed
+        np.cos(heading, out=d[VX])
+        d[VX] *= speeds
+        np.sin(heading, out=d[VY])
+        d[VY] *= speeds
+        self.rng.random(out=d[VZ], dtype=np.float32)
+        d[VZ] += 0.5
+        d[VZ] *= lift
+
+        d[X] = x
+        d[Y] = y
+        d[Z] = z
+        self.rng.random(out=d[LIFE], dtype=np.float32)
+        d[LIFE] += 1.0
+        d[LIFE] *= life / 2
+        d[MAX_LIFE] = d[LIFE]
+        d[SIZE] = size
+
+        # Vary the brightness a little so bursts don't look flat
+        self.rng.random(out=brightness, dtype=np.float32)
+        brightness *= 0.4
+        brightness += 0.6
+        for row, channel in zip((R, G, B), color):
+            np.multiply(brightness, channel, out=d[row])
+
+        self.count = end
+        return emitted
+
+    def muzzle_flash(self, x, y, angle):
+        """Sparks leaving the barrel in the shooting direction"""
+        self.emit(MUZZLE_FLASH_PARTICLES, x + math.cos(angle) * 24, y + math.sin(angle) * 24,
+                  PARTICLE_EYE_HEIGHT - 10, MUZZLE_FLASH_COLOR, speed=240, life=0.12, size=1.5,
+                  lift=20, direction=angle, spread=0.35)
+
+    def blood(self, x, y, kill=False):
+        """Blood spray from a monster that was hit; kills spray three times as much"""
+        count = BLOOD_PARTICLES * (3 if kill else 1)
+        self.emit(count, x, y, PARTICLE_EYE_HEIGHT, BLOOD_PARTICLE_COLOR, speed=120 if kill else 80,
+                  life=0.8 if kill else 0.5, size=2.5, lift=120)
+
+    def explosion(self, x, y):
+        """Fireball filling the splash radius of an explosive shot"""
+        self.emit(EXPLOSION_PARTICLES, x, y, PARTICLE_EYE_HEIGHT, EXPLOSION_COLOR,
+                  speed=EXPLOSION_RADIUS * 2.5, life=0.6, size=4, lift=150)
+
+    def update(self, dt):
+        """Advance every particle by `dt` seconds and drop the expired ones"""
+        n = self.count
+        if n == 0:
+            return
+        d = self.data[:, :n]
+        step = self.scratch[:3, :n]
+
+        np.multiply(d[VX:VZ + 1], dt, out=step)
+        d[X:Z + 1] += step
+        d[VX:VY + 1] *= PARTICLE_DRAG
+        d[VZ] -= PARTICLE_GRAVITY * dt
+        # Particles come to rest on the floor
+        np.less(d[Z], 0, out=self.mask[:n])
+        np.maximum(d[Z], 0, out=d[Z])
+        np.copyto(d[VX:VZ + 1], 0, where=self.mask[:n])
+        d[LIFE] -= dt
+
+        alive = self.mask[:n]
+        np.greater(d[LIFE], 0, out=alive)
+        remaining = int(np.count_nonzero(alive))
+        if remaining < n:
+            # Pack the survivors into the front columns through the scratch rows
+            packed = self.scratch[:FIELDS - 4, :remaining]
+            np.compress(alive, d[:FIELDS - 4], axis=1, out=packed)
+            self.data[:FIELDS - 4, :remaining] = packed
+            packed = self.scratch[:4, :remaining]
+            np.compress(alive, d[FIELDS - 4:], axis=1, out=packed)
+            self.data[FIELDS - 4:, :remaining] = packed
+            self.count = remaining
+
+    def draw(self, screen, depth_buffer, x, y, angle, fov, light_at=None):
+        """Draw particles in front of the walls, farthest first.
+
+        `depth_buffer` holds the wall distance for every screen column, as
+        returned by the raycaster. With `light_at` (e.g. Lightmap.light_at)
+        colors are scaled by the light where each particle is. Returns the
+        number of particles drawn.
+        """
+        n = self.count
+        if n == 0:
+            return 0
+        width, height = screen.get_size()
+        if len(self.depth) != width:
+            self.depth = np.zeros(width, dtype=np.float32)
+        self.depth[:] = depth_buffer
+
+        d = self.data[:, :n]
+        dx, dy, dist, rel, wall, scale, screen_y, size = self.scratch[:, :n]
+        visible, test, columns = self.mask[:n], self.mask2[:n], self.columns[:n]
+
+        np.subtract(d[X], x, out=dx)
+        np.subtract(d[Y], y, out=dy)
+        np.hypot(dx, dy, out=dist)
+        # Angle from the view direction, wrapped to [-pi, pi)
+        np.arctan2(dy, dx, out=rel)
+        rel -= angle - math.pi
+        np.mod(rel, 2 * math.pi, out=rel)
+        rel -= math.pi
+        np.abs(rel, out=wall)
+        np.less(wall, fov / 2, out=visible)
+        np.greater(dist, 1.0, out=test)
+        visible &= test
+
+        # Same projection as the sprites: column from the angle, size from the distance
+        rel *= width / fov
+        rel += width / 2
+        np.clip(rel, 0, width - 1, out=rel)
+        np.copyto(columns, rel, casting='unsafe')
+        # Every take() here has indices in range; 'clip' writes straight into
+        # `out`, where the default 'raise' mode goes through a temporary buffer
+        np.take(self.depth, columns, out=wall, mode='clip')
+        np.less(dist, wall, out=test)
+        visible &= test
+
+        np.maximum(dist, 1.0, out=scale)
+        np.divide(height, scale, out=scale)
+        np.subtract(PARTICLE_EYE_HEIGHT, d[Z], out=screen_y)
+        screen_y *= scale
+        screen_y += height / 2
+        # Shrink as they fade out
+        np.divide(d[LIFE], d[MAX_LIFE], out=size)
+        size *= d[SIZE]
+        size *= scale
+        np.maximum(size, 1, out=size)
+
+        drawn = int(np.count_nonzero(visible))
+        if drawn == 0:
+            return 0
+        # Sort (distance, index) keys in place, hidden particles first with key -1:
+        # positive float32 distances order like their bit patterns. Read from
+        # the end, the last `drawn` keys give the visible particles farthest first
+        keys = self.keys[:n]
+        np.copyto(keys, dist.view(np.int32))
+        keys <<= 32
+        keys |= self.index[:n]
+        np.logical_not(visible, out=test)
+        np.copyto(keys, -1, where=test)
+        keys.sort()
+        keys &= 0xFFFFFFFF
+        order = self.order[:drawn]
+        np.copyto(order, keys[n - drawn:][::-1])
+
+        # Rows free again once projected, reused for the drawn particles' values
+        dx, dy, wall, scale = dx[:drawn], dy[:drawn], wall[:drawn], scale[:drawn]
+        rects, colors = self.rects[:drawn], self.colors[:drawn]
+        light = None
+        if light_at is not None:
+            np.take(d[X], order, out=dx, mode='clip')
+            np.take(d[Y], order, out=dy, mode='clip')
+            light = light_at(dx, dy)
+        for channel, row in enumerate((R, G, B)):
+            np.take(d[row], order, out=dx, mode='clip')
+            if light is not None:
+                dx *= light
+            np.copyto(colors[:, channel], dx, casting='unsafe')
+        np.take(size, order, out=dx, mode='clip')
+        np.multiply(dx, 0.5, out=scale)
+        np.take(rel, order, out=dy, mode='clip')
+        np.trunc(dy, out=dy)
+        dy -= scale
+        np.take(screen_y, order, out=wall, mode='clip')
+        wall -= scale
+        np.copyto(rects[:, 0], dy, casting='unsafe')
+        np.copyto(rects[:, 1], wall, casting='unsafe')
+        np.copyto(rects[:, 2], dx, casting='unsafe')
+
+        # pygame has no batched fill; the loop only reads the buffers back
+        fill, rect = screen.fill, self.rect
+        rect_values, color_values = self.rect_values, self.color_values
+        for i in range(drawn):
+            side = rect_values[i, 2]
+            rect.update(rect_values[i, 0], rect_values[i, 1], side, side)
+            fill((color_values[i, 0], color_values[i, 1], color_values[i, 2]), rect)
+        return drawn
+
+# Shared particle system drawn by the raycaster
+particles = ParticleSystem()
@@ -1,6 +1,8 @@
 import pygame
 import math
 from src.utils.constants import *
+from src.ui.text_cache import text_cache
+from src.game.wall_field import slide_move
 
 class Player:
     def __init__(self, x, y, angle):
@@ -18,18 +20,9 @@ class Player:
         self.ability_active = {ability: False for ability in SPECIAL_ABILITIES}
         self.ability_timers = {ability: 0 for ability in SPECIAL_ABILITIES}
 
-    def move(self, dx, dy, maze):
-        new_x = self.x + dx
-        new_y = self.y + dy
-        
-        # Check if the new position is within the maze boundaries
-        if 0 <= new_x < len(maze[0]) * CELL_SIZE and 0 <= new_y < len(maze) * CELL_SIZE:
-            # Check if the new position is not in a wall
-            cell_x = int(new_x / CELL_SIZE)
-            cell_y = int(new_y / CELL_SIZE)
-            if maze[cell_y][cell_x] == 0:
-                self.x = new_x
-                self.y = new_y
+    def move(self, dx, dy, maze, field=None):
+        """Move by (dx, dy), sliding along walls; with a wall field the player's whole radius is kept clear"""
+        self.x, self.y = slide_move(field, maze, self.x, self.y, dx, dy, PLAYER_RADIUS)
 
     def rotate(self, angle):
         self.angle += angle
@@ -114,8 +107,7 @@ class Player:
         pygame.draw.rect(screen, (0, 255, 0), (exp_x, exp_y, exp_width * exp_percentage, exp_height))
         
         # Draw level
-        font = pygame.font.Font(None, 36)
-        level_text = font.render(f"Level: {self.level}", True, (255, 255, 255))
+        level_text = text_cache.render(f"Level: {self.level}", 36, (255, 255, 255))
         screen.blit(level_text, (20, HEIGHT - 100))
         
         # Draw ability cooldowns
@@ -125,8 +117,8 @@ class Player:
                 color = (0, 255, 0) if active else (255, 0, 0)
                 cooldown = self.ability_cooldowns[ability]
                 if cooldown > 0:
-                    cooldown_text = font.render(f"{ability}: {cooldown:.1f}s", True, color)
+                    cooldown_text = text_cache.render(f"{ability}: {cooldown:.1f}s", 36, color)
                 else:
-                    cooldown_text = font.render(f"{ability}: Ready", True, color)
+                    cooldown_text = text_cache.render(f"{ability}: Ready", 36, color)
                 screen.blit(cooldown_text, (20, ability_y))
                 ability_y -= 30 
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""Compile sector maps into BSP files.
+
+Usage: python -m src.game.bsp_compiler levels/arena.json [more maps...]
+
+A sector map is JSON:
+    {"start": [x, y, angle],
+     "sectors": [{"vertices": [[x, y], ...], "floor": 0, "ceiling": 64,
+                  "light": 1.0, "color": [r, g, b]}, ...]}
+Each sector is a simple polygon in world units, with x and y >= 0 like
+grid levels. An edge two sectors share, with the same two vertices, is a
+portal between them; every other edge is a solid wall. Sectors must not
+overlap. The compiled map goes next to the source with a .bsp extension
+(see src/game/sector_map.py for the layout).
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from src.utils.constants import *
+from src.game.sector_map import HEADER_FORMAT, SECTOR_MAGIC, SECTOR_VERSION, SECTOR_TABLES
+
+# Points closer than this (world units) to a partition line count as on it
+ON_LINE = 1e-3
+
+def _signed_area(points):
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])) / 2
+
+def parse_sector_map(data, name=''):
+    """(start, sector rows, segs) of a decoded sector map.
+
+    Segs are (x1, y1, x2, y2, front, back) with the front sector on the
+    front side; every polygon is turned to positive area so that the front
+    side of its edges is its inside.
+    """
+    sectors = []
+    polygons = []
+    for number, sector in enumerate(data.get('sectors', ())):
+        points = [(float(x), float(y)) for x, y in sector['vertices']]
+        if len(points) < 3 or _signed_area(points) == 0:
+            raise ValueError(f"{name}: sector {number} is not a polygon")
+        if min(min(point) for point in points) < 0:
+            raise ValueError(f"{name}: sector {number} has negative coordinates")
+        if _signed_area(points) < 0:
+            points.reverse()
+        polygons.append(points)
+        color = sector.get('color', WALL_COLOR)
+        sectors.append((sector.get('floor', 0), sector.get('ceiling', CELL_SIZE), sector.get('light', 1.0), *color))
+    if not sectors:
+        raise ValueError(f"{name} has no sectors")
+
+    # Neighbouring polygons run along a shared edge in opposite directions
+    owners = {}
+    for number, points in enumerate(polygons):
+        for a, b in zip(points, points[1:] + points[:1]):
+            owners[(a, b)] = number
+    segs = []
+    for number, points in enumerate(polygons):
+        for a, b in zip(points, points[1:] + points[:1]):
+            segs.append((a[0], a[1], b[0], b[1], number, owners.get((b, a), -1)))
+
+    start = data.get('start')
+    if start is None:
+        xs, ys = zip(*polygons[0])
+        start = (sum(xs) / len(xs), sum(ys) / len(ys), 0.0)
+    return tuple(start) + (0.0,) * (3 - len(start)), sectors, segs
+
+def _line(seg):
+    x1, y1, x2, y2 = seg[:4]
+    length = np.hypot(x2 - x1, y2 - y1)
+    return x1, y1, (x2 - x1) / length, (y2 - y1) / length
+
+def _bounds(segs):
+    points = np.array([seg[:4] for seg in segs]).reshape(-1, 2)
+    return (*points.min(axis=0), *points.max(axis=0))
+
+class BSPBuilder:
+    """Sorts segs into a BSP tree whose leaves are convex.
+
+    A set of segs where no seg has another behind it is convex and becomes
+    a subsector. Otherwise one of the segs that do have something behind
+    them becomes the partition line: up to BSP_SPLITTER_CANDIDATES of
+    them are scored, all at once with NumPy, by how many segs they would
+    split and how uneven the two halves would be.
+    """
+    def __init__(self):
+        self.segs = []
+        self.subsectors = []
+        self.lines = []
+        self.boxes = []
+        self.children = []
+
+    def build(self, segs):
+        """Add the tree for `segs`; returns its root child index"""
+        array = np.array([seg[:4] for seg in segs], dtype=np.float64)
+        x1, y1, x2, y2 = array.T
+        length = np.hypot(x2 - x1, y2 - y1)
+        dx, dy = ((x2 - x1) / length)[:, None], ((y2 - y1) / length)[:, None]
+        # side_a[i, j]: signed distance of seg j's first point from seg i's line
+        side_a = dx * (y1[None, :] - y1[:, None]) - dy * (x1[None, :] - x1[:, None])
+        side_b = dx * (y2[None, :] - y1[:, None]) - dy * (x2[None, :] - x1[:, None])
+        # Segs on a line but facing the other way (the two sides of a portal) count as behind it
+        opposite = ((np.abs(side_a) <= ON_LINE) & (np.abs(side_b) <= ON_LINE)
+                    & ((x2 - x1)[None, :] * dx + (y2 - y1)[None, :] * dy < 0))
+        behind = (side_a < -ON_LINE) | (side_b < -ON_LINE) | opposite
+        candidates = np.flatnonzero(behind.any(axis=1))
+        if len(candidates) == 0:
+            return self._leaf(segs)
+
+        if len(candidates) > BSP_SPLITTER_CANDIDATES:
+            candidates = candidates[np.linspace(0, len(candidates) - 1, BSP_SPLITTER_CANDIDATES).astype(int)]
+        a, b = side_a[candidates], side_b[candidates]
+        splits = ((a > ON_LINE) & (b < -ON_LINE)) | ((a < -ON_LINE) & (b > ON_LINE))
+        behind = behind[candidates] & ~splits
+        score = splits.sum(axis=1) * BSP_SPLIT_COST + np.abs(len(segs) - 2 * behind.sum(axis=1) - splits.sum(axis=1))
+        line = _line(segs[candidates[np.argmin(score)]])
+
+        front, back = self._partition(segs, line)
+        node = len(self.lines)
+        self.lines.append(line)
+        self.boxes.append(_bounds(front) + _bounds(back))
+        self.children.append(None)
+        self.children[node] = (self.build(front), self.build(back))
+        return node
+
+    def _partition(self, segs, line):
+        lx, ly, dx, dy = line
+        front, back = [], []
+        for seg in segs:
+            x1, y1, x2, y2 = seg[:4]
+            a = dx * (y1 - ly) - dy * (x1 - lx)
+            b = dx * (y2 - ly) - dy * (x2 - lx)
+            if abs(a) <= ON_LINE and abs(b) <= ON_LINE:
+                # On the line: facing the same way as the splitter puts it in front
+                (front if (x2 - x1) * dx + (y2 - y1) * dy > 0 else back).append(seg)
+            elif a >= -ON_LINE and b >= -ON_LINE:
+                front.append(seg)
+            elif a <= ON_LINE and b <= ON_LINE:
+                back.append(seg)
+            else:
+                t = a / (a - b)
+                x, y = x1 + (x2 - x1) * t, y1 + (y2 - y1) * t
+                first, second = (x1, y1, x, y) + seg[4:], (x, y, x2, y2) + seg[4:]
+                front.append(first if a > 0 else second)
+                back.append(second if a > 0 else first)
+        return front, back
+
+    def _leaf(self, segs):
+        self.subsectors.append((len(self.segs), len(segs), segs[0][4]))
+        self.segs.extend(segs)
+        return ~(len(self.subsectors) - 1)
+
+def pack_sector_map(start, sectors, segs):
+    """Binary sector map file contents"""
+    builder = BSPBuilder()
+    root = builder.build(segs)
+    rows = {
+        'sectors': sectors,
+        'seg_points': [seg[:4] for seg in builder.segs],
+        'seg_sectors': [seg[4:] for seg in builder.segs],
+        'subsectors': builder.subsectors,
+        'node_lines': builder.lines,
+        'node_boxes': builder.boxes,
+        'node_children': builder.children,
+    }
+    header = [SECTOR_MAGIC, SECTOR_VERSION, len(SECTOR_TABLES), *start, root]
+    chunks = []
+    offset = HEADER_FORMAT.size
+    for name, dtype, columns in SECTOR_TABLES:
+        data = np.array(rows[name], dtype=dtype).reshape(-1, columns)
+        header += [offset, len(data)]
+        chunks.append(data.tobytes())
+        offset += len(chunks[-1])
+    return HEADER_FORMAT.pack(*header) + b''.join(chunks)
+
+def compile_file(source, destination=None):
+    """Compile a JSON sector map; the binary goes next to it with a .bsp extension by default"""
+    destination = destination or os.path.splitext(source)[0] + '.bsp'
+    with open(source) as f:
+        data = json.load(f)
+    packed = pack_sector_map(*parse_sector_map(data, source))
+    with open(destination, 'wb') as f:
+        f.write(packed)
+    return destination
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile JSON sector maps into BSP files")
+    parser.add_argument('paths', nargs='+', metavar='MAP')
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        print(f"Compiled {path} -> {compile_file(path)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
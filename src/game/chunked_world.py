@@ -0,0 +1,225 @@
+import struct
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.constants import *
+from src.game.level import WALL
+
+# File layout (little endian):
+#   header:   magic, version, chunk size, width, height, overview step,
+#             overview width and height, (byte offset, entry count) of each
+#             cell list in WORLD_TABLES, byte offset of the first region
+#   overview: overview width * height uint8, 1 where most of the
+#             step x step cells it covers are walls
+#   cell lists: int32 (x, y) pairs, 4-byte aligned
+#   regions:  chunk size * chunk size uint8 cells each, regions row-major
+#             and cells row-major within a region; edge regions are padded
+#             with walls
+WORLD_MAGIC = b'GWLD'
+WORLD_VERSION = 1
+WORLD_TABLES = ('exits', 'treasure', 'traps', 'boss')
+TABLE_CELLS = {'exits': 'exit', 'treasure': 'treasure', 'traps': 'trap', 'boss': 'boss'}
+HEADER_FORMAT = struct.Struct('<4sHHIIIII' + 'QI' * len(WORLD_TABLES) + 'Q')
+REGION_ALIGNMENT = 4096
+
+def write_world(rows, path, chunk_size=WORLD_CHUNK_SIZE):
+    """Split a grid (rows or a 2-D array) into a chunked world file"""
+    if chunk_size <= 0 or chunk_size & (chunk_size - 1):
+        raise ValueError("chunk size must be a power of two")
+    grid = np.ascontiguousarray(rows, dtype=np.uint8)
+    height, width = grid.shape
+    chunks_x = -(-width // chunk_size)
+    chunks_y = -(-height // chunk_size)
+
+    # Downsampled wall map for the minimap
+    step = max(1, -(-max(width, height) // WORLD_OVERVIEW_SIZE))
+    overview_width = -(-width // step)
+    overview_height = -(-height // step)
+    padded = np.ones((overview_height * step, overview_width * step), dtype=bool)
+    padded[:height, :width] = grid == WALL
+    walls = padded.reshape(overview_height, step, overview_width, step).sum(axis=(1, 3), dtype=np.uint32)
+    overview = (walls * 2 > step * step).astype(np.uint8)
+    del padded
+
+    tables = {}
+    for name in WORLD_TABLES:
+        tables[name] = np.argwhere(grid == SPECIAL_AREAS[TABLE_CELLS[name]])[:, ::-1].astype('<i4')
+
+    header = [WORLD_MAGIC, WORLD_VERSION, chunk_size, width, height, step, overview_width, overview_height]
+    chunks = [(HEADER_FORMAT.size, overview.tobytes())]
+    offset = HEADER_FORMAT.size + overview.size
+    for name in WORLD_TABLES:
+        offset += -offset % 4
+        header += [offset, len(tables[name])]
+        chunks.append((offset, tables[name].tobytes()))
+        offset += tables[name].nbytes
+    regions_offset = offset + -offset % REGION_ALIGNMENT
+    header.append(regions_offset)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER_FORMAT.pack(*header))
+        for start, data in chunks:
+            f.seek(start)
+            f.write(data)
+        f.seek(regions_offset)
+        region = np.empty((chunk_size, chunk_size), dtype=np.uint8)
+        for region_y in range(chunks_y):
+            for region_x in range(chunks_x):
+                x, y = region_x * chunk_size, region_y * chunk_size
+                part = grid[y:y + chunk_size, x:x + chunk_size]
+                region.fill(WALL)
+                region[:part.shape[0], :part.shape[1]] = part
+                f.write(region.tobytes())
+    return path
+
+class ChunkedWorld:
+    """A level streamed from disk in fixed-size square regions.
+
+    Cells are read with `world[y, x]` (and `world.shape`), the same
+    accessor as `Level.cells`, so the raycaster, AI, MapManager and
+    minimap work unchanged. `stream_around()` is called once per tick with
+    the player's cell: it queues the regions within WORLD_STREAM_RADIUS
+    for the background loader, collects the ones it finished and evicts
+    the least recently used regions beyond the memory budget. A lookup
+    in a region that isn't loaded yet reads it immediately (a "stall").
+
+    Per-cell tables (free cells, spawn candidates, wall edges) are not
+    stored for chunked worlds; the exit, treasure, trap and boss lists are.
+    """
+    def __init__(self, path, budget=WORLD_CACHE_BUDGET, radius=WORLD_STREAM_RADIUS):
+        self.path = path
+        self.name = path
+        self.file = open(path, 'rb')
+        self.file_lock = threading.Lock()
+        data = self.file.read(HEADER_FORMAT.size)
+        if len(data) < HEADER_FORMAT.size or data[:4] != WORLD_MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a chunked world")
+        fields = HEADER_FORMAT.unpack(data)
+        version, self.chunk_size, self.width, self.height = fields[1:5]
+        if version != WORLD_VERSION:
+            self.file.close()
+            raise ValueError(f"{path} has unsupported world format version {version}")
+        self.overview_step, overview_width, overview_height = fields[5:8]
+        self.regions_offset = fields[-1]
+
+        self.shape = (self.height, self.width)
+        self.shift = self.chunk_size.bit_length() - 1
+        self.mask = self.chunk_size - 1
+        self.chunks_x = -(-self.width // self.chunk_size)
+        self.chunks_y = -(-self.height // self.chunk_size)
+        self.region_bytes = self.chunk_size * self.chunk_size
+        self.radius = radius
+        # The budget always holds at least the streaming window around the player
+        self.max_regions = max(budget // self.region_bytes, (2 * radius + 1) ** 2)
+
+        self.overview = memoryview(self._read(HEADER_FORMAT.size, overview_width * overview_height)).cast(
+            'B', (overview_height, overview_width))
+        for name, offset, count in zip(WORLD_TABLES, fields[8:-1:2], fields[9:-1:2]):
+            cells = np.frombuffer(self._read(offset, count * 8), dtype='<i4').reshape(count, 2)
+            setattr(self, name, cells)
+
+        # Same interface as Level; tables that would need every cell are absent
+        self.cells = self
+        self.grid = None
+        self.edges = None
+        self.free_cells = None
+        self.spawn_candidates = None
+        self.sectors = None
+
+        self.regions = OrderedDict()  # Region index -> 2-D memoryview, least recently used first
+        self.pending = {}  # Region index -> Future from the loader thread
+        self.center = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='world')
+        self.loads = 0
+        self.stalls = 0
+        self.evictions = 0
+
+    def _read(self, offset, size):
+        # The loader thread and stalls on the main thread share the file
+        with self.file_lock:
+            self.file.seek(offset)
+            return self.file.read(size)
+
+    def _read_region(self, index):
+        data = self._read(self.regions_offset + index * self.region_bytes, self.region_bytes)
+        return memoryview(data).cast('B', (self.chunk_size, self.chunk_size))
+
+    def _insert(self, index, region):
+        self.regions[index] = region
+        self.loads += 1
+
+    def _region_now(self, index):
+        """Load a region the game needs this instant"""
+        future = self.pending.pop(index, None)
+        region = future.result() if future else self._read_region(index)
+        self.stalls += 1
+        self._insert(index, region)
+        self._evict()
+        return region
+
+    def _evict(self):
+        while len(self.regions) > self.max_regions:
+            self.regions.popitem(last=False)
+            self.evictions += 1
+
+    def __getitem__(self, key):
+        y, x = key
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return WALL
+        index = (y >> self.shift) * self.chunks_x + (x >> self.shift)
+        region = self.regions.get(index)
+        if region is None:
+            region = self._region_now(index)
+        else:
+            # Every lookup counts as a use, so regions still being read aren't evicted
+            self.regions.move_to_end(index)
+        return region[y & self.mask, x & self.mask]
+
+    def stream_around(self, cell_x, cell_y):
+        """Keep the regions around the player's cell loaded"""
+        for index in [index for index, future in self.pending.items() if future.done()]:
+            self._insert(index, self.pending.pop(index).result())
+
+        center = (cell_x >> self.shift, cell_y >> self.shift)
+        if center == self.center:
+            return
+        self.center = center
+        center_x, center_y = center
+        for region_y in range(max(0, center_y - self.radius), min(self.chunks_y, center_y + self.radius + 1)):
+            for region_x in range(max(0, center_x - self.radius), min(self.chunks_x, center_x + self.radius + 1)):
+                index = region_y * self.chunks_x + region_x
+                if index in self.regions:
+                    self.regions.move_to_end(index)
+                elif index not in self.pending:
+                    self.pending[index] = self.executor.submit(self._read_region, index)
+        # Regions far from the player are the least recently used, so they go first
+        self._evict()
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_wall(self, x, y):
+        """True for wall cells and anything off the map"""
+        return self[y, x] == WALL
+
+    def cell_center(self, x, y):
+        """World coordinates of the middle of a cell"""
+        return x * CELL_SIZE + CELL_SIZE // 2, y * CELL_SIZE + CELL_SIZE // 2
+
+    def stats(self):
+        return {
+            'regions': len(self.regions),
+            'pending': len(self.pending),
+            'bytes': len(self.regions) * self.region_bytes,
+            'loads': self.loads,
+            'stalls': self.stalls,
+            'evictions': self.evictions
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
+        self.regions.clear()
+        self.file.close()
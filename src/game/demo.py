@@ -0,0 +1,89 @@
+import struct
+import pygame
+from src.game.input_frame import InputFrame
+
+# File layout (little endian):
+#   header: magic, version, tick rate, level RNG seed
+#   per tick: button bits, mouse dx, key press count, one byte per key press
+DEMO_MAGIC = b'GDMO'
+DEMO_VERSION = 1
+HEADER_FORMAT = struct.Struct('<4sBHQ')
+# Largest seed a demo (and a save file, whose seed field is signed) can hold
+MAX_SEED = 2 ** 63 - 1
+TICK_FORMAT = struct.Struct('<BhB')
+
+# Button bits, in InputFrame attribute order
+BUTTONS = ('forward', 'back', 'left', 'right', 'fire', 'ability', 'quit')
+
+# Keys whose presses change the simulation; anything else is stored as index 0
+# and replayed as K_UNKNOWN, which still counts as "any key" on the title screen
+RECORDED_KEYS = (
+    pygame.K_UNKNOWN,
+    pygame.K_ESCAPE, pygame.K_f, pygame.K_r, pygame.K_p, pygame.K_RETURN,
+    pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4,
+    pygame.K_5, pygame.K_6, pygame.K_7,
+    pygame.K_F3, pygame.K_F9, pygame.K_F5, pygame.K_F8
+)
+KEY_INDEX = {key: i for i, key in enumerate(RECORDED_KEYS)}
+
+class DemoRecorder:
+    """Writes one compact record per simulation tick"""
+    def __init__(self, path, seed, tick_rate=60):
+        self.path = path
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.ticks = 0
+        self.file = open(path, 'wb')
+        self.file.write(HEADER_FORMAT.pack(DEMO_MAGIC, DEMO_VERSION, tick_rate, seed))
+
+    def record(self, frame):
+        buttons = 0
+        for bit, name in enumerate(BUTTONS):
+            if getattr(frame, name):
+                buttons |= 1 << bit
+        mouse_dx = max(-32768, min(32767, int(frame.mouse_dx)))
+        keys = bytes(KEY_INDEX.get(key, 0) for key in frame.key_presses[:255])
+        self.file.write(TICK_FORMAT.pack(buttons, mouse_dx, len(keys)))
+        self.file.write(keys)
+        self.ticks += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            print(f"Recorded {self.ticks} ticks to {self.path}")
+
+class DemoPlayer:
+    """Reads a demo file back as a sequence of InputFrames"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        if len(self.data) < HEADER_FORMAT.size:
+            raise ValueError(f"{path} is not a demo file")
+        magic, version, self.tick_rate, self.seed = HEADER_FORMAT.unpack_from(self.data, 0)
+        if magic != DEMO_MAGIC:
+            raise ValueError(f"{path} is not a demo file")
+        if version != DEMO_VERSION:
+            raise ValueError(f"Unsupported demo version {version}")
+        self.offset = HEADER_FORMAT.size
+        self.ticks = 0
+
+    def next_frame(self):
+        """Return the next tick's input, or None at the end of the demo"""
+        if self.offset + TICK_FORMAT.size > len(self.data):
+            return None
+        buttons, mouse_dx, key_count = TICK_FORMAT.unpack_from(self.data, self.offset)
+        self.offset += TICK_FORMAT.size
+        keys = self.data[self.offset:self.offset + key_count]
+        self.offset += key_count
+        self.ticks += 1
+        frame = InputFrame(mouse_dx=mouse_dx, key_presses=[RECORDED_KEYS[i] for i in keys])
+        for bit, name in enumerate(BUTTONS):
+            setattr(frame, name, bool(buttons & (1 << bit)))
+        return frame
+
+    def __iter__(self):
+        frame = self.next_frame()
+        while frame is not None:
+            yield frame
+            frame = self.next_frame()
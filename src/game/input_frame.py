@@ -0,0 +1,64 @@
+import pygame
+
+class InputFrame:
+    """Everything the simulation reads from the player during one tick"""
+    def __init__(self, forward=False, back=False, left=False, right=False,
+                 fire=False, ability=False, mouse_dx=0, key_presses=(), quit=False):
+        self.forward = forward
+        self.back = back
+        self.left = left
+        self.right = right
+        self.fire = fire
+        self.ability = ability  # Space - slow time
+        self.mouse_dx = mouse_dx
+        self.key_presses = tuple(key_presses)  # KEYDOWN keys this tick, in order
+        self.quit = quit
+
+    @classmethod
+    def from_pygame(cls, events):
+        """Build a frame from the live keyboard/mouse state and this tick's events"""
+        keys = pygame.key.get_pressed()
+        mouse_buttons = pygame.mouse.get_pressed()
+        mouse_rel_x, _ = pygame.mouse.get_rel()
+        key_presses = []
+        quit_requested = False
+        for event in events:
+            if event.type == pygame.QUIT:
+                quit_requested = True
+            elif event.type == pygame.KEYDOWN:
+                key_presses.append(event.key)
+        return cls(
+            forward=keys[pygame.K_w],
+            back=keys[pygame.K_s],
+            left=keys[pygame.K_a],
+            right=keys[pygame.K_d],
+            fire=mouse_buttons[0],
+            ability=keys[pygame.K_SPACE],
+            mouse_dx=mouse_rel_x,
+            key_presses=key_presses,
+            quit=quit_requested
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, InputFrame) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"InputFrame({vars(self)})"
+
+class ScriptedInput:
+    """Input source that plays a fixed list of frames, then idles.
+
+    Anything with a `next_frame()` method returning an InputFrame (or None to
+    stop) can drive the game loop in place of the keyboard and mouse.
+    """
+    def __init__(self, frames=(), max_ticks=None):
+        self.frames = list(frames)
+        self.max_ticks = max_ticks
+        self.ticks = 0
+
+    def next_frame(self):
+        if self.max_ticks is not None and self.ticks >= self.max_ticks:
+            return None
+        frame = self.frames[self.ticks] if self.ticks < len(self.frames) else InputFrame()
+        self.ticks += 1
+        return frame
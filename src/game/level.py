@@ -0,0 +1,175 @@
+import mmap
+import os
+import struct
+import numpy as np
+from src.utils.constants import *
+
+# File layout (little endian):
+#   header: magic, version, table count, width, height, then (byte offset,
+#           entry count) for each table in TABLES
+#   grid:   width * height uint8 cell values, row-major (grid[y][x])
+#   edges:  width * height uint8 wall-edge masks, row-major
+#   cell lists: entry count int32 (x, y) pairs each, 4-byte aligned
+LEVEL_MAGIC = b'GLVL'
+LEVEL_VERSION = 1
+TABLES = ('grid', 'edges', 'free_cells', 'exits', 'treasure', 'traps', 'boss', 'spawn_candidates')
+HEADER_FORMAT = struct.Struct('<4sHHII' + 'II' * len(TABLES))
+
+WALL = 1
+FLOOR = 0
+
+# Wall-edge mask bits: set when the neighbour on that side is a wall or off the map
+EDGE_NORTH = 1  # y - 1
+EDGE_EAST = 2   # x + 1
+EDGE_SOUTH = 4  # y + 1
+EDGE_WEST = 8   # x - 1
+
+class Level:
+    """A compiled level: the cell grid plus lookup tables, all views over one buffer.
+
+    `grid` and the tables are read-only NumPy arrays for vectorized code;
+    `cells` is a 2-D memoryview of the same bytes for fast scalar lookups
+    (`cells[y, x]`) in Python loops. Nothing is copied out of the buffer,
+    so every subsystem holding the level shares the same memory.
+    """
+    def __init__(self, buffer, name=''):
+        self.buffer = buffer
+        self.name = name
+        self.sectors = None  # The SectorMap a sector level was rasterized from (see sector_map.py)
+        if len(buffer) < HEADER_FORMAT.size:
+            raise ValueError(f"{name} is not a compiled level")
+        fields = HEADER_FORMAT.unpack_from(buffer)
+        magic, version, table_count, self.width, self.height = fields[:5]
+        if magic != LEVEL_MAGIC:
+            raise ValueError(f"{name} is not a compiled level")
+        if version != LEVEL_VERSION or table_count != len(TABLES):
+            raise ValueError(f"{name} has unsupported level format version {version}")
+
+        shape = (self.height, self.width)
+        tables = dict(zip(TABLES, zip(fields[5::2], fields[6::2])))
+        offset, count = tables.pop('grid')
+        self.grid = np.frombuffer(buffer, dtype=np.uint8, count=count, offset=offset).reshape(shape)
+        self.cells = memoryview(buffer)[offset:offset + count].cast('B', shape)
+        offset, count = tables.pop('edges')
+        self.edges = np.frombuffer(buffer, dtype=np.uint8, count=count, offset=offset).reshape(shape)
+        # Cell lists: (x, y) pairs
+        for table, (offset, count) in tables.items():
+            cells = np.frombuffer(buffer, dtype='<i4', count=count * 2, offset=offset).reshape(count, 2)
+            setattr(self, table, cells)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_wall(self, x, y):
+        """True for wall cells and anything off the map"""
+        return not (0 <= x < self.width and 0 <= y < self.height) or self.cells[y, x] == WALL
+
+    def cell_center(self, x, y):
+        """World coordinates of the middle of a cell"""
+        return x * CELL_SIZE + CELL_SIZE // 2, y * CELL_SIZE + CELL_SIZE // 2
+
+    def stream_around(self, cell_x, cell_y):
+        """Nothing to stream: the whole level is in memory (see ChunkedWorld)"""
+
+    def close(self):
+        """Release the views and unmap the file of a memory-mapped level"""
+        self.cells.release()
+        self.grid = self.cells = self.edges = None
+        for table in TABLES[2:]:
+            setattr(self, table, None)
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.buffer = None
+
+def load_level(path, mapped=None):
+    """Open a compiled level file.
+
+    With `mapped` the file is memory-mapped read-only instead of read, so
+    opening costs nothing and only the pages actually indexed are loaded
+    from disk. By default files of LEVEL_MMAP_THRESHOLD bytes or more are
+    mapped and smaller ones are read.
+    """
+    if mapped is None:
+        mapped = os.path.getsize(path) >= LEVEL_MMAP_THRESHOLD
+    with open(path, 'rb') as f:
+        if not mapped or os.fstat(f.fileno()).st_size == 0:
+            return Level(f.read(), path)
+        # The mapping stays valid after the file is closed
+        return Level(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+class LevelLibrary:
+    """Numbered levels from the levels folder, compiled on demand and shared.
+
+    `get(n)` loads levels/level<n>.lvl. If that file is missing or older
+    than its levels/level<n>.txt or .json source, the source is compiled
+    (and the binary rewritten when the folder is writable). After
+    `use_generator()` levels are generated instead (see maze_generator.py).
+    """
+    def __init__(self, directory=LEVELS_DIR):
+        self.directory = directory
+        self.levels = {}
+        self.generator = None  # (strategy, width, height, seed) when levels are generated
+
+    def source_path(self, number):
+        for extension in ('.txt', '.json'):
+            path = os.path.join(self.directory, f"level{number}{extension}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def compiled_path(self, number):
+        return os.path.join(self.directory, f"level{number}.lvl")
+
+    def use_generator(self, strategy, width, height, seed):
+        """Generate every level from now on; level n is seeded from `seed` and n"""
+        self.generator = (strategy, width, height, seed)
+        self.levels.clear()
+
+    def count(self):
+        """Number of consecutive levels starting at level 1"""
+        if self.generator:
+            return MAX_LEVEL
+        number = 1
+        while self.source_path(number) or os.path.exists(self.compiled_path(number)):
+            number += 1
+        return number - 1
+
+    def get(self, number):
+        level = self.levels.get(number)
+        if level is None:
+            level = self._load(number)
+            self.levels[number] = level
+        return level
+
+    def add(self, number, path):
+        """Play the compiled level (.lvl), chunked world (.wld) or sector map (.bsp) at `path` as level `number`"""
+        if path.endswith('.wld'):
+            from src.game.chunked_world import ChunkedWorld
+            self.levels[number] = ChunkedWorld(path)
+        elif path.endswith('.bsp'):
+            from src.game.sector_map import load_sector_level
+            self.levels[number] = load_sector_level(path)
+        else:
+            self.levels[number] = load_level(path)
+
+    def _load(self, number):
+        if self.generator:
+            from src.game.maze_generator import generate_level
+            strategy, width, height, seed = self.generator
+            return generate_level(width, height, f"{seed}:{number}", strategy)
+        compiled = self.compiled_path(number)
+        source = self.source_path(number)
+        if source and (not os.path.exists(compiled) or os.path.getmtime(compiled) < os.path.getmtime(source)):
+            # Imported here so the game never needs the compiler unless a source changed
+            from src.game.level_compiler import compile_file, compile_source
+            try:
+                compile_file(source, compiled)
+            except OSError:
+                return Level(compile_source(source), source)
+        return load_level(compiled)
+
+    def clear(self):
+        self.levels.clear()
+
+# Shared level library
+levels = LevelLibrary()
@@ -0,0 +1,144 @@
+"""Compile text or JSON maps into binary level files.
+
+Usage: python -m src.game.level_compiler [--chunked] levels/level1.txt [more maps...]
+
+--chunked writes a streamed world (.wld, see src/game/chunked_world.py)
+instead of a .lvl file; it also accepts compiled .lvl files as input.
+
+Text maps use one character per cell, one line per row (north at the top):
+    # wall  . floor  T treasure  X trap  B boss  E exit
+JSON maps are {"grid": [[row of cell values], ...]} with the same row order.
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from src.utils.constants import *
+from src.game.level import (HEADER_FORMAT, LEVEL_MAGIC, LEVEL_VERSION, TABLES, WALL, FLOOR,
+                            EDGE_NORTH, EDGE_EAST, EDGE_SOUTH, EDGE_WEST)
+
+TILE_CHARS = {
+    '.': FLOOR,
+    '#': WALL,
+    'T': SPECIAL_AREAS['treasure'],
+    'X': SPECIAL_AREAS['trap'],
+    'B': SPECIAL_AREAS['boss'],
+    'E': SPECIAL_AREAS['exit']
+}
+
+def parse_text(text, name=''):
+    """Rows of cell values from a text map"""
+    rows = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.rstrip()
+        if not line:
+            continue
+        try:
+            rows.append([TILE_CHARS[char] for char in line])
+        except KeyError as e:
+            raise ValueError(f"{name}:{line_number}: unknown tile {e.args[0]!r}") from None
+    return rows
+
+def parse_json(text, name=''):
+    data = json.loads(text)
+    rows = data['grid'] if isinstance(data, dict) else data
+    return [[int(value) for value in row] for row in rows]
+
+def read_source(path):
+    if path.endswith('.lvl'):
+        from src.game.level import load_level
+        return load_level(path).grid
+    with open(path) as f:
+        text = f.read()
+    if path.endswith('.json'):
+        return parse_json(text, path)
+    return parse_text(text, path)
+
+def wall_edges(grid):
+    """Per-cell mask of the sides that face a wall or the map border"""
+    walls = np.pad(grid == WALL, 1, constant_values=True)
+    edges = np.zeros(grid.shape, dtype=np.uint8)
+    edges[walls[:-2, 1:-1]] |= EDGE_NORTH
+    edges[walls[1:-1, 2:]] |= EDGE_EAST
+    edges[walls[2:, 1:-1]] |= EDGE_SOUTH
+    edges[walls[1:-1, :-2]] |= EDGE_WEST
+    return edges
+
+def cell_list(mask):
+    """(x, y) int32 pairs of the cells where `mask` is set, row-major order"""
+    return np.argwhere(mask)[:, ::-1].astype('<i4')
+
+def build_tables(grid):
+    """Every table of the level format, in TABLES order"""
+    return {
+        'grid': grid,
+        'edges': wall_edges(grid),
+        'free_cells': cell_list(grid != WALL),
+        'exits': cell_list(grid == SPECIAL_AREAS['exit']),
+        'treasure': cell_list(grid == SPECIAL_AREAS['treasure']),
+        'traps': cell_list(grid == SPECIAL_AREAS['trap']),
+        'boss': cell_list(grid == SPECIAL_AREAS['boss']),
+        # Plain floor: where monsters and pickups may be placed
+        'spawn_candidates': cell_list(grid == FLOOR)
+    }
+
+def pack_level(rows):
+    """Binary level file contents for a grid given as rows (or a 2-D array)"""
+    grid = np.ascontiguousarray(rows, dtype=np.uint8)
+    if grid.ndim != 2 or grid.size == 0:
+        raise ValueError("a level needs at least one row of cells")
+    height, width = grid.shape
+    tables = build_tables(grid)
+
+    header = [LEVEL_MAGIC, LEVEL_VERSION, len(TABLES), width, height]
+    chunks = []
+    offset = HEADER_FORMAT.size
+    for name in TABLES:
+        data = tables[name].tobytes()
+        offset += -offset % 4  # Keep the int32 tables aligned
+        # Grids count cells, cell lists count (x, y) pairs
+        count = tables[name].size if name in ('grid', 'edges') else len(tables[name])
+        header += [offset, count]
+        chunks.append((offset, data))
+        offset += len(data)
+
+    out = bytearray(offset)
+    out[:HEADER_FORMAT.size] = HEADER_FORMAT.pack(*header)
+    for start, data in chunks:
+        out[start:start + len(data)] = data
+    return bytes(out)
+
+def compile_source(path):
+    return pack_level(read_source(path))
+
+def compile_file(source, destination=None):
+    """Compile a map file; the binary goes next to it with a .lvl extension by default"""
+    destination = destination or os.path.splitext(source)[0] + '.lvl'
+    data = compile_source(source)
+    with open(destination, 'wb') as f:
+        f.write(data)
+    return destination
+
+def compile_world(source, destination=None, chunk_size=WORLD_CHUNK_SIZE):
+    """Compile a map file into a chunked world (.wld) next to it by default"""
+    from src.game.chunked_world import write_world
+    destination = destination or os.path.splitext(source)[0] + '.wld'
+    return write_world(read_source(source), destination, chunk_size)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile text or JSON maps into binary level files")
+    parser.add_argument('paths', nargs='+', metavar='MAP')
+    parser.add_argument('--chunked', action='store_true', help="write a streamed chunked world (.wld)")
+    parser.add_argument('--chunk-size', type=int, default=WORLD_CHUNK_SIZE, help="cells per region side")
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        if args.chunked:
+            destination = compile_world(path, chunk_size=args.chunk_size)
+        else:
+            destination = compile_file(path)
+        print(f"Compiled {path} -> {destination}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+import hashlib
+import math
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
+from src.utils.constants import *
+from src.game.level import WALL
+from src.game.placement import placements
+from src.game.triggers import RegionIndex
+
+# File layout (little endian), stored next to the compiled level as level<n>.light:
+#   header: magic, version, faces per cell, level width, level height,
+#           settings hash (bake_settings_hash: every setting the lights and bake depend on)
+#   floors: height x width uint8 light levels of the cells, row-major
+#   faces:  height x width x 4 uint8 light levels of the cells' north, east,
+#           south and west faces (only wall faces next to open cells are lit)
+LIGHTMAP_MAGIC = b'GLIT'
+# A cached lightmap is used when it is newer than its .lvl and was baked with
+# the same settings; bump the version when the light placement or baking code
+# itself changes
+LIGHTMAP_VERSION = 2
+HEADER_FORMAT = struct.Struct('<4sHHIIQ')
+
+# Face index -> step from a wall cell to the open cell the face looks at (same order as the EDGE_ bits)
+FACE_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+def level_lights(level):
+    """(x, y, radius, intensity) light sources of a level.
+
+    Every treasure, trap, boss and exit room has a light in its middle, and
+    torches are spread evenly over the open cells with the shared
+    Poisson-disk placements, so levels need no hand-placed lights.
+    """
+    lights = []
+    for region in RegionIndex(level).regions:
+        radius, intensity = AREA_LIGHTS[region.kind]
+        x = sum(cell[0] for cell in region.cells) / len(region.cells)
+        y = sum(cell[1] for cell in region.cells) / len(region.cells)
+        lights.append(((x + 0.5) * CELL_SIZE, (y + 0.5) * CELL_SIZE, radius, intensity))
+    for x, y in placements.positions(level, 'lights', LIGHT_TORCH_SPACING):
+        lights.append((x, y, LIGHT_TORCH_RADIUS, LIGHT_TORCH_INTENSITY))
+    return lights
+
+def _visible(solid, light_x, light_y, xs, ys):
+    """Which points the light reaches without crossing a solid cell, marched every LIGHT_SAMPLE_STEP"""
+    steps = int(np.hypot(xs - light_x, ys - light_y).max(initial=0) / LIGHT_SAMPLE_STEP) + 2
+    t = np.arange(1, steps, dtype=np.float32)[None, :] / steps
+    sample_x = ((light_x + (xs[:, None] - light_x) * t) // CELL_SIZE).astype(np.intp)
+    sample_y = ((light_y + (ys[:, None] - light_y) * t) // CELL_SIZE).astype(np.intp)
+    height, width = solid.shape
+    np.clip(sample_x, 0, width - 1, out=sample_x)
+    np.clip(sample_y, 0, height - 1, out=sample_y)
+    return ~solid[sample_y, sample_x].any(axis=1)
+
+def _bake_batch(solid, lights):
+    """Summed light of a batch of sources: (floors, faces) float32, flattened"""
+    height, width = solid.shape
+    floors = np.zeros(height * width, dtype=np.float32)
+    faces = np.zeros(height * width * 4, dtype=np.float32)
+    # A ring of solid cells, so every cell has four neighbours
+    padded = np.pad(solid, 1, constant_values=True)
+    for light_x, light_y, radius, intensity in lights:
+        reach = int(math.ceil(radius / CELL_SIZE))
+        cell_x, cell_y = int(light_x // CELL_SIZE), int(light_y // CELL_SIZE)
+        x0, x1 = max(cell_x - reach, 0), min(cell_x + reach + 1, width)
+        y0, y1 = max(cell_y - reach, 0), min(cell_y + reach + 1, height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        window = solid[y0:y1, x0:x1]
+
+        # Open cells, lit at their centers
+        ys, xs = np.nonzero(~window)
+        ys += y0
+        xs += x0
+        points = [((xs + 0.5) * CELL_SIZE, (ys + 0.5) * CELL_SIZE, ys * width + xs, floors)]
+        # Wall faces next to open cells, lit just in front of the face
+        for face, (step_x, step_y) in enumerate(FACE_STEPS):
+            neighbour = padded[y0 + 1 + step_y:y1 + 1 + step_y, x0 + 1 + step_x:x1 + 1 + step_x]
+            ys, xs = np.nonzero(window & ~neighbour)
+            ys += y0
+            xs += x0
+            points.append(((xs + 0.5 + step_x * 0.5) * CELL_SIZE + step_x,
+                           (ys + 0.5 + step_y * 0.5) * CELL_SIZE + step_y,
+                           (ys * width + xs) * 4 + face, faces))
+
+        for px, py, index, target in points:
+            distance = np.hypot(px - light_x, py - light_y)
+            near = distance < radius
+            if not near.any():
+                continue
+            px, py, index, distance = px[near], py[near], index[near], distance[near]
+            lit = _visible(solid, light_x, light_y, px, py)
+            falloff = 1 - distance[lit] / radius
+            # Indexes are unique within one light, so a plain += adds every contribution
+            target[index[lit]] += intensity * falloff * falloff
+    return floors, faces
+
+def bake_lightmap(grid, lights, workers=LIGHTMAP_BAKE_WORKERS):
+    """(floors, faces) uint8 light levels of a level grid lit by `lights`.
+
+    The sources are split into batches baked on a thread pool (NumPy
+    releases the GIL for the large array operations); the batches' sums
+    are added up with the ambient light and clamped to full brightness.
+    """
+    solid = (grid == WALL) | (grid == SPECIAL_AREAS['exit'])
+    batches = [lights[i::workers] for i in range(workers) if lights[i::workers]]
+    height, width = grid.shape
+    floors = np.full(height * width, LIGHT_AMBIENT, dtype=np.float32)
+    faces = np.full(height * width * 4, LIGHT_AMBIENT, dtype=np.float32)
+    if batches:
+        with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix='lightmap') as executor:
+            for batch_floors, batch_faces in executor.map(lambda batch: _bake_batch(solid, batch), batches):
+                floors += batch_floors
+                faces += batch_faces
+    levels = []
+    for light in (floors, faces):
+        np.clip(light, 0, 1, out=light)
+        levels.append(np.round(light * 255).astype(np.uint8))
+    return levels[0].reshape(height, width), levels[1].reshape(height, width, 4)
+
+@lru_cache(maxsize=None)
+def shade_table(color):
+    """`color` at every light level 0..255, so shading a column is one lookup"""
+    return tuple(tuple(int(c * level / 255) for c in color) for level in range(256))
+
+class Lightmap:
+    """Baked light levels (0..255) of a level's floor cells and wall faces.
+
+    `face(x, y, face)` is the light on one side of a wall cell, with faces
+    numbered like FACE_STEPS; `floor(x, y)` the light of an open cell.
+    Anything off the map gets the ambient level.
+    """
+    def __init__(self, floors, faces):
+        self.height, self.width = floors.shape
+        self.floors = floors
+        self.faces = faces
+        self.ambient = int(round(LIGHT_AMBIENT * 255))
+        self.floor_levels = memoryview(np.ascontiguousarray(floors)).cast('B').cast('B', floors.shape)
+        self.face_levels = memoryview(np.ascontiguousarray(faces)).cast('B').cast('B', faces.shape)
+
+    def face(self, x, y, face):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.face_levels[y, x, face]
+        return self.ambient
+
+    def floor(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.floor_levels[y, x]
+        return self.ambient
+
+    def light_at(self, xs, ys):
+        """Light (0..1) at arrays of world positions: their cells' baked plus dynamic light"""
+        cell_x = np.clip(xs // CELL_SIZE, 0, self.width - 1).astype(np.intp)
+        cell_y = np.clip(ys // CELL_SIZE, 0, self.height - 1).astype(np.intp)
+        light = self.floors[cell_y, cell_x].astype(np.float32)
+        light += dynamic_lights.levels_at(cell_x, cell_y)
+        np.minimum(light, 255, out=light)
+        light /= 255
+        return light
+
+def bake_settings_hash():
+    """64-bit hash of every setting a level's lights and their bake depend on.
+
+    Together with the level file's mtime this keys the cached lightmap, so
+    a cache hit never has to place the lights to check them.
+    """
+    settings = [LIGHT_AMBIENT, LIGHT_SAMPLE_STEP, CELL_SIZE, LIGHT_TORCH_SPACING, LIGHT_TORCH_RADIUS,
+                LIGHT_TORCH_INTENSITY, POISSON_DISK_TRIES, POISSON_DISK_SEED_TRIES]
+    for kind in sorted(AREA_LIGHTS):
+        settings.extend(AREA_LIGHTS[kind])
+    digest = hashlib.blake2b(np.asarray(settings, dtype='<f8').tobytes(), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+def lightmap_path(level):
+    """Where a level's lightmap is cached, or None for levels that aren't files"""
+    name = getattr(level, 'name', '')
+    if name.endswith('.lvl') and os.path.exists(name):
+        return os.path.splitext(name)[0] + '.light'
+    return None
+
+def read_lightmap(path, level, settings_hash):
+    """The cached (floors, faces) for `level`, or None if missing, stale or baked with other settings"""
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(level.name):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < HEADER_FORMAT.size:
+        return None
+    magic, version, faces, width, height, stored_hash = HEADER_FORMAT.unpack_from(data)
+    size = width * height
+    if (magic != LIGHTMAP_MAGIC or version != LIGHTMAP_VERSION or faces != 4
+            or (width, height) != (level.width, level.height) or stored_hash != settings_hash
+            or len(data) != HEADER_FORMAT.size + size * 5):
+        return None
+    floors = np.frombuffer(data, dtype=np.uint8, count=size, offset=HEADER_FORMAT.size)
+    faces = np.frombuffer(data, dtype=np.uint8, count=size * 4, offset=HEADER_FORMAT.size + size)
+    return floors.reshape(height, width), faces.reshape(height, width, 4)
+
+def write_lightmap(path, floors, faces, level, settings_hash):
+    with open(path, 'wb') as f:
+        f.write(HEADER_FORMAT.pack(LIGHTMAP_MAGIC, LIGHTMAP_VERSION, 4, level.width, level.height, settings_hash))
+        f.write(floors.tobytes())
+        f.write(faces.tobytes())
+
+class LightmapCache:
+    """One Lightmap per level: read from the .light next to its .lvl, or baked and saved there"""
+    def __init__(self):
+        self.lightmaps = {}
+
+    def get(self, level):
+        """The level's lightmap, or None for chunked worlds (they have no full grid to bake)"""
+        if level.grid is None:
+            return None
+        lightmap = self.lightmaps.get(level.name)
+        if lightmap is None:
+            lightmap = Lightmap(*self._load(level))
+            self.lightmaps[level.name] = lightmap
+        return lightmap
+
+    def _load(self, level):
+        path = lightmap_path(level)
+        settings_hash = bake_settings_hash()
+        if path:
+            cached = read_lightmap(path, level, settings_hash)
+            if cached is not None:
+                return cached
+        floors, faces = bake_lightmap(level.grid, level_lights(level))
+        if path:
+            try:
+                write_lightmap(path, floors, faces, level, settings_hash)
+            except OSError:
+                pass  # Read-only level folder: bake again next time
+        return floors, faces
+
+    def clear(self):
+        self.lightmaps.clear()
+
+class DynamicLights:
+    """Short-lived lights (muzzle flashes, explosions) added on top of the lightmap.
+
+    Each frame `accumulate()` sums the live lights into a small buffer of
+    cells around the player with NumPy, with the same falloff as baked
+    lights but no occlusion; `level_at()` reads it back per cell, 0 outside
+    the buffer. Lights fade out linearly over their lifetime.
+    """
+    def __init__(self, reach=DYNAMIC_LIGHT_REACH):
+        self.reach = reach
+        self.lights = []  # [x, y, radius, intensity, life, max_life]
+        side = 2 * reach + 1
+        self.buffer = np.zeros((side, side), dtype=np.uint8)
+        self.levels = memoryview(self.buffer).cast('B').cast('B', self.buffer.shape)
+        self.light = np.zeros((side, side), dtype=np.float32)
+        offsets = (np.arange(side, dtype=np.float32) - reach) * CELL_SIZE
+        self.offset_x, self.offset_y = offsets[None, :], offsets[:, None]
+        self.origin = (0, 0)  # Cell at buffer[0, 0]
+        self.active = False
+
+    def add(self, x, y, radius, intensity, life):
+        self.lights.append([x, y, radius, intensity, life, life])
+
+    def update(self, dt):
+        for light in self.lights:
+            light[4] -= dt
+        self.lights = [light for light in self.lights if light[4] > 0]
+
+    def clear(self):
+        self.lights.clear()
+        self.active = False
+
+    def accumulate(self, cell_x, cell_y):
+        """Sum the live lights into the buffer centered on the player's cell"""
+        self.origin = (cell_x - self.reach, cell_y - self.reach)
+        self.active = bool(self.lights)
+        if not self.active:
+            return
+        light = self.light
+        light.fill(0)
+        # World coordinates of the buffer's cell centers, relative to each light below
+        center_x = (cell_x + 0.5) * CELL_SIZE
+        center_y = (cell_y + 0.5) * CELL_SIZE
+        for x, y, radius, intensity, life, max_life in self.lights:
+            falloff = np.hypot(self.offset_x + (center_x - x), self.offset_y + (center_y - y))
+            falloff /= -radius
+            falloff += 1
+            np.maximum(falloff, 0, out=falloff)
+            falloff *= falloff
+            light += falloff * (intensity * life / max_life)
+        np.clip(light, 0, 1, out=light)
+        light *= 255
+        np.copyto(self.buffer, light, casting='unsafe')
+
+    def levels_at(self, cell_x, cell_y):
+        """level_at for arrays of cells"""
+        levels = np.zeros(len(cell_x), dtype=np.float32)
+        if self.active:
+            x, y = cell_x - self.origin[0], cell_y - self.origin[1]
+            inside = (x >= 0) & (x < self.buffer.shape[1]) & (y >= 0) & (y < self.buffer.shape[0])
+            levels[inside] = self.buffer[y[inside], x[inside]]
+        return levels
+
+    def level_at(self, cell_x, cell_y):
+        if not self.active:
+            return 0
+        x, y = cell_x - self.origin[0], cell_y - self.origin[1]
+        if 0 <= x < self.buffer.shape[1] and 0 <= y < self.buffer.shape[0]:
+            return self.levels[y, x]
+        return 0
+
+# Shared lightmaps and the frame's dynamic lights
+lightmaps = LightmapCache()
+dynamic_lights = DynamicLights()
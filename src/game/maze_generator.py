@@ -0,0 +1,257 @@
+"""Procedural level generation.
+
+Usage: python -m src.game.maze_generator [--strategy NAME] [--size WxH] [--seed N] OUT.lvl
+
+Levels are grids of odd width and height where maze cells sit on odd
+coordinates and the even rows/columns between them are walls. Special
+rooms (treasure, trap, boss, exit) are reserved before the maze is carved
+and each gets a single door, so every room is a leaf hanging off one
+connected maze and every floor cell is reachable from the start cell (1, 1).
+"""
+import argparse
+import random
+import sys
+import numpy as np
+from src.utils.constants import *
+from src.game.level import Level, WALL, FLOOR
+from src.game.level_compiler import pack_level
+
+STRATEGIES = ('backtracker', 'prim', 'rooms')
+
+# Special rooms per level; treasure and trap rooms scale with the map area
+SPECIAL_ROOM_AREA = 128 * 128  # Cells of map per extra treasure/trap room
+SPECIAL_ROOM_CELLS = (1, 3)  # Room side in maze cells, inclusive range
+ROOM_CELLS = (2, 5)  # Plain rooms of the room-and-corridor strategy
+ROOM_AREA = 20 * 20  # Cells of map per plain room attempt
+DEAD_END_PASSES = 24  # Corridor dead-end trimming passes for room-and-corridor
+ROOM_ATTEMPTS = 40  # Placement attempts per room
+
+class MazeGenerator:
+    """Seeded generator for one level grid; the same seed always gives the same level"""
+    def __init__(self, width, height, seed=None, strategy='backtracker'):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}")
+        # Maze cells sit on odd coordinates, so the grid needs odd dimensions
+        self.width = max(5, width - (width + 1) % 2)
+        self.height = max(5, height - (height + 1) % 2)
+        self.cells_x = (self.width - 1) // 2
+        self.cells_y = (self.height - 1) // 2
+        self.strategy = strategy
+        self.rng = random.Random(seed)
+        self.grid = bytearray([WALL]) * (self.width * self.height)
+        self.blocked = bytearray(self.cells_x * self.cells_y)  # Maze cells taken by rooms
+        self.rooms = []  # (cell x0, cell y0, cell x1, cell y1, value, doors)
+
+    def generate(self):
+        """Return the level as a (height, width) uint8 array"""
+        self._reserve_special_rooms()
+        if self.strategy == 'rooms':
+            self._reserve_rooms(FLOOR, ROOM_CELLS, max(1, self.cells_x * self.cells_y * 4 // ROOM_AREA), doors=2)
+        if self.strategy == 'prim':
+            self._carve_prim()
+        else:
+            self._carve_backtracker()
+        grid = np.frombuffer(self.grid, dtype=np.uint8).reshape(self.height, self.width)
+        self._stamp_rooms(grid)
+        if self.strategy == 'rooms':
+            self._trim_dead_ends(grid)
+        return grid
+
+    # Rooms
+
+    def _reserve_special_rooms(self):
+        extra = max(1, self.cells_x * self.cells_y * 4 // SPECIAL_ROOM_AREA)
+        self._reserve_rooms(SPECIAL_AREAS['treasure'], SPECIAL_ROOM_CELLS, extra)
+        self._reserve_rooms(SPECIAL_AREAS['trap'], SPECIAL_ROOM_CELLS, extra)
+        self._reserve_rooms(SPECIAL_AREAS['boss'], SPECIAL_ROOM_CELLS, 1)
+        # The exit goes as far from the start as the attempts can find
+        self._reserve_rooms(SPECIAL_AREAS['exit'], SPECIAL_ROOM_CELLS, 1, farthest=True)
+
+    def _reserve_rooms(self, value, sizes, count, doors=1, farthest=False):
+        """Block out rooms in maze-cell space.
+
+        Rooms keep one free maze cell between each other and from the
+        border, so the maze cells left over always form one connected area.
+        """
+        for _ in range(count):
+            best = None
+            for _ in range(ROOM_ATTEMPTS):
+                room_w = self.rng.randint(*sizes)
+                room_h = self.rng.randint(*sizes)
+                if room_w + 2 > self.cells_x - 1 or room_h + 2 > self.cells_y - 1:
+                    break
+                x0 = self.rng.randint(1, self.cells_x - room_w - 1)
+                y0 = self.rng.randint(1, self.cells_y - room_h - 1)
+                if not self._room_fits(x0, y0, room_w, room_h):
+                    continue
+                if not farthest:
+                    best = (x0, y0, room_w, room_h)
+                    break
+                if best is None or x0 + y0 > best[0] + best[1]:
+                    best = (x0, y0, room_w, room_h)
+            if best is None:
+                continue
+            x0, y0, room_w, room_h = best
+            for y in range(y0, y0 + room_h):
+                start = y * self.cells_x + x0
+                self.blocked[start:start + room_w] = b'\x01' * room_w
+            self.rooms.append((x0, y0, x0 + room_w - 1, y0 + room_h - 1, value, doors))
+
+    def _room_fits(self, x0, y0, room_w, room_h):
+        for y in range(y0 - 1, y0 + room_h + 1):
+            start = y * self.cells_x + x0 - 1
+            if any(self.blocked[start:start + room_w + 2]):
+                return False
+        return True
+
+    def _stamp_rooms(self, grid):
+        for x0, y0, x1, y1, value, doors in self.rooms:
+            grid[2 * y0 + 1:2 * y1 + 2, 2 * x0 + 1:2 * x1 + 2] = value
+            for _ in range(doors):
+                self._open_door(grid, x0, y0, x1, y1)
+
+    def _open_door(self, grid, x0, y0, x1, y1):
+        """Knock a floor cell through one side of the room into the maze"""
+        side = self.rng.randrange(4)
+        if side < 2:
+            cell_y = self.rng.randint(y0, y1)
+            door_x = 2 * x0 if side == 0 else 2 * x1 + 2
+            grid[2 * cell_y + 1, door_x] = FLOOR
+        else:
+            cell_x = self.rng.randint(x0, x1)
+            door_y = 2 * y0 if side == 2 else 2 * y1 + 2
+            grid[door_y, 2 * cell_x + 1] = FLOOR
+
+    # Mazes
+
+    def _grid_index(self, cell):
+        cell_y, cell_x = divmod(cell, self.cells_x)
+        return (2 * cell_y + 1) * self.width + 2 * cell_x + 1
+
+    def _carve_backtracker(self):
+        """Iterative recursive backtracker: long winding corridors, few junctions"""
+        cells_x, width = self.cells_x, self.width
+        count = self.cells_x * self.cells_y
+        grid = self.grid
+        visited = bytearray(self.blocked)
+        rand = self.rng.random
+        grid[self._grid_index(0)] = FLOOR
+        visited[0] = 1
+        # Stack of (maze cell, grid index)
+        stack = [(0, self._grid_index(0))]
+        while stack:
+            cell, index = stack[-1]
+            cell_x = cell % cells_x
+            options = []
+            if cell_x > 0 and not visited[cell - 1]:
+                options.append((-1, -1))
+            if cell_x < cells_x - 1 and not visited[cell + 1]:
+                options.append((1, 1))
+            if cell >= cells_x and not visited[cell - cells_x]:
+                options.append((-cells_x, -width))
+            if cell + cells_x < count and not visited[cell + cells_x]:
+                options.append((cells_x, width))
+            if not options:
+                stack.pop()
+                continue
+            step, grid_step = options[int(rand() * len(options))]
+            visited[cell + step] = 1
+            grid[index + grid_step] = FLOOR
+            grid[index + 2 * grid_step] = FLOOR
+            stack.append((cell + step, index + 2 * grid_step))
+
+    def _carve_prim(self):
+        """Randomized Prim's: many short branches and dead ends"""
+        cells_x, width = self.cells_x, self.width
+        count = self.cells_x * self.cells_y
+        grid = self.grid
+        # 0 = not reached, 1 = in the maze (or a room), 2 = on the frontier
+        state = bytearray(self.blocked)
+        rand = self.rng.random
+        frontier = []
+
+        def add_frontier(cell):
+            cell_x = cell % cells_x
+            if cell_x > 0 and not state[cell - 1]:
+                state[cell - 1] = 2
+                frontier.append(cell - 1)
+            if cell_x < cells_x - 1 and not state[cell + 1]:
+                state[cell + 1] = 2
+                frontier.append(cell + 1)
+            if cell >= cells_x and not state[cell - cells_x]:
+                state[cell - cells_x] = 2
+                frontier.append(cell - cells_x)
+            if cell + cells_x < count and not state[cell + cells_x]:
+                state[cell + cells_x] = 2
+                frontier.append(cell + cells_x)
+
+        state[0] = 1
+        grid[self._grid_index(0)] = FLOOR
+        add_frontier(0)
+        while frontier:
+            # Swap-remove a random frontier cell
+            i = int(rand() * len(frontier))
+            cell = frontier[i]
+            frontier[i] = frontier[-1]
+            frontier.pop()
+            # Join it to a random neighbour that is already in the maze (not a room)
+            cell_x = cell % cells_x
+            options = []
+            if cell_x > 0 and state[cell - 1] == 1 and not self.blocked[cell - 1]:
+                options.append(-1)
+            if cell_x < cells_x - 1 and state[cell + 1] == 1 and not self.blocked[cell + 1]:
+                options.append(1)
+            if cell >= cells_x and state[cell - cells_x] == 1 and not self.blocked[cell - cells_x]:
+                options.append(-width)
+            if cell + cells_x < count and state[cell + cells_x] == 1 and not self.blocked[cell + cells_x]:
+                options.append(width)
+            index = self._grid_index(cell)
+            grid[index] = FLOOR
+            grid[index + options[int(rand() * len(options))]] = FLOOR
+            state[cell] = 1
+            add_frontier(cell)
+
+    def _trim_dead_ends(self, grid):
+        """Fill in corridor dead ends a few cells deep (vectorized passes)"""
+        for _ in range(DEAD_END_PASSES):
+            open_cells = grid != WALL
+            neighbours = np.zeros(grid.shape, dtype=np.uint8)
+            neighbours[1:, :] += open_cells[:-1, :]
+            neighbours[:-1, :] += open_cells[1:, :]
+            neighbours[:, 1:] += open_cells[:, :-1]
+            neighbours[:, :-1] += open_cells[:, 1:]
+            dead = (grid == FLOOR) & (neighbours <= 1)
+            dead[1, 1] = False  # Keep the start cell
+            if not dead.any():
+                break
+            grid[dead] = WALL
+
+def generate_grid(width, height, seed=None, strategy='backtracker'):
+    """A (height, width) uint8 level grid"""
+    return MazeGenerator(width, height, seed, strategy).generate()
+
+def generate_level(width, height, seed=None, strategy='backtracker'):
+    """A generated, compiled Level held in memory"""
+    grid = generate_grid(width, height, seed, strategy)
+    return Level(pack_level(grid), f"generated:{strategy}:{seed}")
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a level and write it as a compiled .lvl file")
+    parser.add_argument('output', metavar='OUT')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='backtracker')
+    parser.add_argument('--size', default='65x65', help="grid size WxH (odd sizes are used as is)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    width, height = parse_size(args.size)
+    grid = generate_grid(width, height, args.seed, args.strategy)
+    with open(args.output, 'wb') as f:
+        f.write(pack_level(grid))
+    print(f"Wrote {grid.shape[1]}x{grid.shape[0]} {args.strategy} level to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import math
+from array import array
+from collections import deque
+import numpy as np
+from src.utils.constants import *
+from src.game.level import WALL
+from src.game.triggers import REGION_TABLES, RegionIndex
+
+class ObjectiveIndex:
+    """Where a level's exits, treasure, traps and bosses are, found once at load.
+
+    `regions(kind)` lists the special-area regions of a kind and
+    `cells(kind)` their cells. For exits there is also a walking-distance
+    field: a breadth-first search from every exit cell at once stores, for
+    each open cell, the number of steps to the nearest exit and which exit
+    that is, so the HUD reads true path distances in O(1) per frame.
+    Chunked worlds have no full grid to search, so they get no field and
+    callers fall back to straight-line distances.
+    """
+    def __init__(self, level):
+        self.width, self.height = level.width, level.height
+        self.region_index = RegionIndex(level)
+        self.by_kind = {kind: [] for kind in REGION_TABLES}
+        for region in self.region_index.regions:
+            self.by_kind[region.kind].append(region)
+        self.exit_cells = level.exits
+        self.exit_distance = None  # (height, width) int32 steps to the nearest exit, -1 if none
+        self.nearest_exit = None  # (height, width) int32 row of exit_cells that is nearest
+        if level.grid is not None and len(level.exits):
+            self._build_exit_field(level.grid)
+
+    def regions(self, kind):
+        return self.by_kind[kind]
+
+    def cells(self, kind):
+        return [cell for region in self.by_kind[kind] for cell in region.cells]
+
+    def _build_exit_field(self, grid):
+        width = self.width
+        size = width * self.height
+        walls = (grid == WALL).tobytes()
+        distance = array('i', [-1]) * size
+        nearest = array('i', [-1]) * size
+        queue = deque()
+        for i, (x, y) in enumerate(self.exit_cells.tolist()):
+            index = y * width + x
+            distance[index] = 0
+            nearest[index] = i
+            queue.append(index)
+        pop, push = queue.popleft, queue.append
+        while queue:
+            index = pop()
+            step = distance[index] + 1
+            source = nearest[index]
+            x = index % width
+            # Cells off the left or right edge would wrap to the next row
+            for neighbour in (index - width, index + width,
+                              index - 1 if x > 0 else -1, index + 1 if x < width - 1 else -1):
+                if 0 <= neighbour < size and distance[neighbour] < 0 and not walls[neighbour]:
+                    distance[neighbour] = step
+                    nearest[neighbour] = source
+                    push(neighbour)
+        shape = (self.height, self.width)
+        self.exit_distance = np.frombuffer(distance, dtype=np.int32).reshape(shape)
+        self.nearest_exit = np.frombuffer(nearest, dtype=np.int32).reshape(shape)
+
+    def exit_from(self, x, y):
+        """(exit world position, walking distance in world units) for the exit nearest to (x, y).
+
+        The distance is straight-line when there is no distance field or the
+        position can't reach an exit. Returns None when the level has no exit.
+        """
+        if len(self.exit_cells) == 0:
+            return None
+        cell_x, cell_y = int(x / CELL_SIZE), int(y / CELL_SIZE)
+        if self.exit_distance is not None and 0 <= cell_x < self.width and 0 <= cell_y < self.height:
+            steps = int(self.exit_distance[cell_y, cell_x])
+            if steps >= 0:
+                exit_x, exit_y = self.exit_cells[self.nearest_exit[cell_y, cell_x]].tolist()
+                return ((exit_x * CELL_SIZE + CELL_SIZE // 2, exit_y * CELL_SIZE + CELL_SIZE // 2),
+                        steps * CELL_SIZE)
+        exit_x, exit_y = self.exit_cells[0].tolist()
+        position = (exit_x * CELL_SIZE + CELL_SIZE // 2, exit_y * CELL_SIZE + CELL_SIZE // 2)
+        return position, math.hypot(position[0] - x, position[1] - y)
+
+class ObjectiveCache:
+    """One ObjectiveIndex per level, built the first time the level is played"""
+    def __init__(self):
+        self.indexes = {}
+
+    def get(self, level):
+        index = self.indexes.get(level.name)
+        if index is None:
+            index = ObjectiveIndex(level)
+            self.indexes[level.name] = index
+        return index
+
+    def clear(self):
+        self.indexes.clear()
+
+# Shared objective indexes
+objectives = ObjectiveCache()
@@ -0,0 +1,115 @@
+import math
+import random
+from src.utils.constants import *
+from src.game.level import WALL, FLOOR
+
+class PoissonDiskSampler:
+    """Evenly spaced cells of a level, no two closer than a minimum distance.
+
+    Bridson's algorithm over cell coordinates: every accepted cell tries
+    up to POISSON_DISK_TRIES candidates at one to two times the minimum
+    distance from it, and a background grid with cells of side
+    distance / sqrt(2) holds at most one accepted cell each, so checking a
+    candidate only looks at the 5x5 grid cells around it. When the active
+    list runs dry, random free cells from the level's table start new
+    patches in parts of the map the first one couldn't reach.
+    """
+    def __init__(self, level, min_distance, floor_only=False):
+        self.cells = level.cells
+        self.height, self.width = self.cells.shape
+        # Seeds come from the level's tables; chunked worlds have none
+        seeds = level.spawn_candidates if floor_only else level.free_cells
+        self.seeds = seeds if seeds is not None else ()
+        self.floor_only = floor_only
+        self.radius = max(min_distance / CELL_SIZE, 1.0)  # In cells
+        self.step = self.radius / math.sqrt(2)
+        self.grid_width = int(self.width / self.step) + 1
+        self.grid_height = int(self.height / self.step) + 1
+
+    def _allowed(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        value = self.cells[y, x]
+        return value == FLOOR if self.floor_only else value != WALL
+
+    def sample(self, rng):
+        """Accepted cells as (x, y) pairs, in the order they were accepted"""
+        points = []
+        if len(self.seeds) == 0:
+            return points
+        grid = [-1] * (self.grid_width * self.grid_height)
+        grid_width, grid_height, step = self.grid_width, self.grid_height, self.step
+        radius_squared = self.radius * self.radius
+
+        def fits(x, y):
+            grid_x, grid_y = int(x / step), int(y / step)
+            for gy in range(max(grid_y - 2, 0), min(grid_y + 3, grid_height)):
+                row = gy * grid_width
+                for gx in range(max(grid_x - 2, 0), min(grid_x + 3, grid_width)):
+                    i = grid[row + gx]
+                    if i >= 0:
+                        px, py = points[i]
+                        if (px - x) * (px - x) + (py - y) * (py - y) < radius_squared:
+                            return False
+            return True
+
+        def accept(x, y):
+            grid[int(y / step) * grid_width + int(x / step)] = len(points)
+            points.append((x, y))
+            active.append(len(points) - 1)
+
+        active = []
+        for _ in range(POISSON_DISK_SEED_TRIES):
+            x, y = self.seeds[rng.randrange(len(self.seeds))].tolist()
+            if not fits(x, y):
+                continue
+            accept(x, y)
+            while active:
+                # Grow from a random active cell; retire it once it has no room left
+                a = rng.randrange(len(active))
+                px, py = points[active[a]]
+                for _ in range(POISSON_DISK_TRIES):
+                    angle = rng.random() * 2 * math.pi
+                    distance = self.radius * (1 + rng.random())
+                    x = int(round(px + math.cos(angle) * distance))
+                    y = int(round(py + math.sin(angle) * distance))
+                    if self._allowed(x, y) and fits(x, y):
+                        accept(x, y)
+                        break
+                else:
+                    active[a] = active[-1]
+                    active.pop()
+        return points
+
+class PlacementCache:
+    """Poisson-disk positions per level, seed and spacing, sampled once.
+
+    Positions are world coordinates of cell centers. Each result comes
+    from its own generator seeded with the key, so it is the same whether
+    it was just sampled or read back from the cache, and taking it never
+    advances the level's RNG.
+    """
+    def __init__(self):
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def positions(self, level, seed, min_distance, floor_only=False):
+        """Evenly spaced pickup, spawn or decoration positions on a level"""
+        key = (level.name, seed, min_distance, floor_only)
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        rng = random.Random(f"{level.name}:{seed}:{min_distance}:{floor_only}")
+        cells = PoissonDiskSampler(level, min_distance, floor_only).sample(rng)
+        result = tuple((x * CELL_SIZE + CELL_SIZE // 2, y * CELL_SIZE + CELL_SIZE // 2) for x, y in cells)
+        self.results[key] = result
+        return result
+
+    def clear(self):
+        self.results.clear()
+
+# Shared placement cache
+placements = PlacementCache()
@@ -0,0 +1,176 @@
+import math
+import struct
+import numpy as np
+from src.utils.constants import *
+from src.game.level import Level, WALL, FLOOR
+
+# File layout (little endian), compiled from a JSON sector map by bsp_compiler.py:
+#   header: magic, version, table count, player start (x, y, angle), root
+#           child, then (byte offset, row count) for each table in SECTOR_TABLES
+#   sectors:       float32 (floor, ceiling, light, red, green, blue)
+#   seg_points:    float32 (x1, y1, x2, y2) wall segments, their sector on the front side
+#   seg_sectors:   int32 (front sector, back sector or -1 for a solid wall)
+#   subsectors:    int32 (first seg, seg count, sector): convex leaves of the tree
+#   node_lines:    float32 (x, y, dx, dy) partition lines, dx and dy normalized
+#   node_boxes:    float32 (min x, min y, max x, max y) of the front child, then the back child
+#   node_children: int32 (front, back); a child c < 0 is subsector ~c
+# A point (px, py) is on the front side of a line or segment from (x, y)
+# along (dx, dy) when dx * (py - y) - dy * (px - x) > 0.
+SECTOR_MAGIC = b'GBSP'
+SECTOR_VERSION = 1
+SECTOR_TABLES = (
+    ('sectors', '<f4', 6),
+    ('seg_points', '<f4', 4),
+    ('seg_sectors', '<i4', 2),
+    ('subsectors', '<i4', 3),
+    ('node_lines', '<f4', 4),
+    ('node_boxes', '<f4', 8),
+    ('node_children', '<i4', 2),
+)
+HEADER_FORMAT = struct.Struct('<4sHHfffi' + 'II' * len(SECTOR_TABLES))
+
+def _segment_distance(px, py, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    t = ((px - x1) * dx + (py - y1) * dy) / length if length else 0.0
+    t = min(max(t, 0.0), 1.0)
+    return math.hypot(px - x1 - t * dx, py - y1 - t * dy)
+
+class SectorMap:
+    """A sector map: walls as arbitrary line segments, sorted by a BSP tree.
+
+    Sectors are polygons with their own floor and ceiling heights; a wall
+    between two sectors is a portal you can see (and maybe walk) through,
+    every other wall is solid. The tree is compiled offline, so the
+    renderer only walks it (see sector_renderer.py) and `sector_at()`
+    descends it in O(log n). Movement collides with the segments in the
+    blockmap squares a circle overlaps, never with the whole map.
+    """
+    def __init__(self, buffer, name=''):
+        self.name = name
+        if len(buffer) < HEADER_FORMAT.size:
+            raise ValueError(f"{name} is not a compiled sector map")
+        fields = HEADER_FORMAT.unpack_from(buffer)
+        magic, version, table_count = fields[:3]
+        if magic != SECTOR_MAGIC:
+            raise ValueError(f"{name} is not a compiled sector map")
+        if version != SECTOR_VERSION or table_count != len(SECTOR_TABLES):
+            raise ValueError(f"{name} has unsupported sector map format version {version}")
+        self.start = fields[3:6]
+        self.root = fields[6]
+        for (table, dtype, columns), offset, count in zip(SECTOR_TABLES, fields[7::2], fields[8::2]):
+            rows = np.frombuffer(buffer, dtype=dtype, count=count * columns, offset=offset).reshape(count, columns)
+            setattr(self, table, rows)
+
+        # Python lists for the per-frame loops: indexing them is much cheaper than NumPy scalars
+        self.floor = self.sectors[:, 0].tolist()
+        self.ceiling = self.sectors[:, 1].tolist()
+        self.light = self.sectors[:, 2].tolist()
+        self.colors = [tuple(int(c) for c in row) for row in self.sectors[:, 3:].tolist()]
+        self.segs = [tuple(points) + tuple(sides) for points, sides in
+                     zip(self.seg_points.tolist(), self.seg_sectors.tolist())]
+        self.leaves = self.subsectors.tolist()
+        self.lines = self.node_lines.tolist()
+        self.boxes = self.node_boxes.tolist()
+        self.children = self.node_children.tolist()
+
+        points = self.seg_points.reshape(-1, 2)
+        self.width = float(points[:, 0].max())
+        self.height = float(points[:, 1].max())
+        self.blocking = [i for i, seg in enumerate(self.segs) if self._blocks(seg)]
+        self.blockmap = {}  # (column, row) -> indexes of the blocking segs crossing that square
+        for i in self.blocking:
+            x1, y1, x2, y2 = self.segs[i][:4]
+            for column in range(int(min(x1, x2) // SECTOR_BLOCK_SIZE), int(max(x1, x2) // SECTOR_BLOCK_SIZE) + 1):
+                for row in range(int(min(y1, y2) // SECTOR_BLOCK_SIZE), int(max(y1, y2) // SECTOR_BLOCK_SIZE) + 1):
+                    self.blockmap.setdefault((column, row), []).append(i)
+
+    def _blocks(self, seg):
+        """Solid walls, and portals to a step too high or an opening too low to walk through"""
+        front, back = seg[4], seg[5]
+        if back < 0:
+            return True
+        opening = min(self.ceiling[front], self.ceiling[back]) - max(self.floor[front], self.floor[back])
+        return abs(self.floor[front] - self.floor[back]) > SECTOR_STEP_HEIGHT or opening < SECTOR_PLAYER_HEIGHT
+
+    def subsector_at(self, x, y):
+        child = self.root
+        lines, children = self.lines, self.children
+        while child >= 0:
+            lx, ly, dx, dy = lines[child]
+            child = children[child][0 if dx * (y - ly) - dy * (x - lx) >= 0 else 1]
+        return ~child
+
+    def sector_at(self, x, y):
+        """The sector containing (x, y), or -1 outside every sector"""
+        first, count, sector = self.leaves[self.subsector_at(x, y)]
+        for x1, y1, x2, y2, _, _ in self.segs[first:first + count]:
+            if (x2 - x1) * (y - y1) - (y2 - y1) * (x - x1) < 0:
+                return -1
+        return sector
+
+    def clear(self, x, y, radius):
+        """True when a circle of `radius` at (x, y) touches no blocking wall"""
+        segs = self.segs
+        low_column, high_column = int((x - radius) // SECTOR_BLOCK_SIZE), int((x + radius) // SECTOR_BLOCK_SIZE)
+        low_row, high_row = int((y - radius) // SECTOR_BLOCK_SIZE), int((y + radius) // SECTOR_BLOCK_SIZE)
+        for column in range(low_column, high_column + 1):
+            for row in range(low_row, high_row + 1):
+                for i in self.blockmap.get((column, row), ()):
+                    x1, y1, x2, y2 = segs[i][:4]
+                    if _segment_distance(x, y, x1, y1, x2, y2) < radius:
+                        return False
+        return True
+
+    def slide(self, x, y, dx, dy, radius):
+        """Move a circle by (dx, dy), sliding along walls like slide_move does on grid levels"""
+        for next_x, next_y in ((x + dx, y + dy), (x + dx, y), (x, y + dy)):
+            if self.clear(next_x, next_y, radius) and self.sector_at(next_x, next_y) >= 0:
+                return next_x, next_y
+        return x, y
+
+    def reachable_sectors(self):
+        """Sectors the player can walk to from the start, through portals that don't block"""
+        start = self.sector_at(self.start[0], self.start[1])
+        if start < 0:
+            return set()
+        neighbours = {}
+        for seg in self.segs:
+            if seg[5] >= 0 and not self._blocks(seg):
+                neighbours.setdefault(seg[4], set()).add(seg[5])
+        reached = {start}
+        stack = [start]
+        while stack:
+            for sector in neighbours.get(stack.pop(), ()):
+                if sector not in reached:
+                    reached.add(sector)
+                    stack.append(sector)
+        return reached
+
+    def rasterize(self, cell_size=CELL_SIZE):
+        """A grid for the grid-based systems (AI, spawns, minimap): floor where a cell's
+        center is in a sector the player can walk to, wall everywhere else"""
+        # One cell past the far walls, so the grid has a wall border on every side
+        width = int(self.width // cell_size) + 1
+        height = int(self.height // cell_size) + 1
+        grid = np.full((height, width), WALL, dtype=np.uint8)
+        reachable = self.reachable_sectors()
+        for row in range(height):
+            for column in range(width):
+                if self.sector_at((column + 0.5) * cell_size, (row + 0.5) * cell_size) in reachable:
+                    grid[row, column] = FLOOR
+        return grid
+
+def load_sector_level(path):
+    """A compiled sector map (.bsp) as a playable level.
+
+    The returned Level is the map rasterized onto the cell grid, for the
+    systems that think in cells; its `sectors` attribute is the SectorMap
+    the renderer and player movement use instead of the grid.
+    """
+    from src.game.level_compiler import pack_level
+    with open(path, 'rb') as f:
+        sectors = SectorMap(f.read(), path)
+    level = Level(pack_level(sectors.rasterize()), path)
+    level.sectors = sectors
+    return level
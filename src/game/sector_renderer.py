@@ -0,0 +1,168 @@
+import math
+from src.utils.constants import *
+
+class SectorRenderer:
+    """Draws a sector map by walking its BSP tree front to back, as Doom does.
+
+    Each screen column keeps the vertical window still left to draw in it
+    (`top`/`bottom`). A solid wall fills its columns and closes them; a
+    portal draws its upper and lower steps and narrows the window to the
+    opening, through which the sectors behind are drawn later. Subtrees
+    whose bounding box covers only closed columns are skipped without
+    being visited and the walk stops once every column is closed, so the
+    cost follows what is on screen, not the size of the map.
+
+    Columns are cast like draw_walls casts its rays, so `draw()` returns
+    the same kind of per-column depth buffer for sprites and particles.
+    """
+    def __init__(self, width=WIDTH, height=HEIGHT, fov=FOV):
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.offsets = [(i - width // 2) * (fov / width) for i in range(width)]
+        self.corrections = [math.cos(offset) for offset in self.offsets]
+        # Per-frame counts, for the profiler and benchmarks
+        self.nodes_visited = 0
+        self.segs_drawn = 0
+
+    def _column(self, relative_angle):
+        return relative_angle / self.fov * self.width + self.width // 2
+
+    def _box_columns(self, box, x, y, angle):
+        """First and last column a bounding box can cover, or None when it is out of view"""
+        min_x, min_y, max_x, max_y = box
+        last = self.width - 1
+        if min_x <= x <= max_x and min_y <= y <= max_y:
+            return 0, last
+        # Seen from outside, a box spans less than half a turn: measure its corners from the first one
+        base = None
+        low = high = 0.0
+        for corner_x, corner_y in ((min_x, min_y), (max_x, min_y), (min_x, max_y), (max_x, max_y)):
+            relative = math.atan2(corner_y - y, corner_x - x) - angle
+            if base is None:
+                base = (relative + math.pi) % (2 * math.pi) - math.pi
+                continue
+            offset = (relative - base + math.pi) % (2 * math.pi) - math.pi
+            low, high = min(low, offset), max(high, offset)
+        half = self.fov / 2
+        for turn in (0, 2 * math.pi, -2 * math.pi):
+            if base + high + turn >= -half and base + low + turn <= half:
+                return (max(0, int(self._column(base + low + turn))),
+                        min(last, int(self._column(base + high + turn)) + 1))
+        return None
+
+    def draw(self, screen, sectors, x, y, angle):
+        width, height = self.width, self.height
+        half_height = height / 2
+        depth_buffer = [float('inf')] * width
+        closed = bytearray(width)
+        top = [0] * width
+        bottom = [height] * width
+        remaining = width
+        self.nodes_visited = self.segs_drawn = 0
+
+        sector = sectors.sector_at(x, y)
+        eye = (sectors.floor[sector] if sector >= 0 else 0) + SECTOR_EYE_HEIGHT
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        ray_cos = [math.cos(angle + offset) for offset in self.offsets]
+        ray_sin = [math.sin(angle + offset) for offset in self.offsets]
+        corrections = self.corrections
+        floors, ceilings, lights, colors = sectors.floor, sectors.ceiling, sectors.light, sectors.colors
+        segs, leaves, lines, boxes, children = sectors.segs, sectors.leaves, sectors.lines, sectors.boxes, sectors.children
+        fill = screen.fill
+        screen.fill(SKY_COLOR, (0, 0, width, height))
+
+        stack = [(sectors.root, None)]
+        while stack and remaining:
+            child, span = stack.pop()
+            # Walls drawn since the parent was visited may have covered the whole box
+            if span and closed.find(0, span[0], span[1] + 1) < 0:
+                continue
+            if child >= 0:
+                self.nodes_visited += 1
+                lx, ly, dx, dy = lines[child]
+                near = 0 if dx * (y - ly) - dy * (x - lx) >= 0 else 1
+                for side in (1 - near, near):  # Far side first, so the near side is popped first
+                    span = self._box_columns(boxes[child][4 * side:4 * side + 4], x, y, angle)
+                    if span and closed.find(0, span[0], span[1] + 1) >= 0:
+                        stack.append((children[child][side], span))
+                continue
+            first, count, _ = leaves[~child]
+            for x1, y1, x2, y2, front, back in segs[first:first + count]:
+                seg_x, seg_y = x2 - x1, y2 - y1
+                # Walls are seen from their front side only
+                if seg_x * (y - y1) - seg_y * (x - x1) <= 0:
+                    continue
+                depth1 = (x1 - x) * cos_a + (y1 - y) * sin_a
+                depth2 = (x2 - x) * cos_a + (y2 - y) * sin_a
+                if depth1 < SECTOR_NEAR_PLANE and depth2 < SECTOR_NEAR_PLANE:
+                    continue
+                # Clip the part behind the near plane before measuring angles
+                ax, ay, bx, by = x1, y1, x2, y2
+                if depth1 < SECTOR_NEAR_PLANE:
+                    t = (SECTOR_NEAR_PLANE - depth1) / (depth2 - depth1)
+                    ax, ay, depth1 = x1 + seg_x * t, y1 + seg_y * t, SECTOR_NEAR_PLANE
+                elif depth2 < SECTOR_NEAR_PLANE:
+                    t = (SECTOR_NEAR_PLANE - depth1) / (depth2 - depth1)
+                    bx, by, depth2 = x1 + seg_x * t, y1 + seg_y * t, SECTOR_NEAR_PLANE
+                column_a = self._column(math.atan2((ay - y) * cos_a - (ax - x) * sin_a, depth1))
+                column_b = self._column(math.atan2((by - y) * cos_a - (bx - x) * sin_a, depth2))
+                start = max(0, math.ceil(min(column_a, column_b)))
+                end = min(width - 1, math.floor(max(column_a, column_b)))
+                if start > end or closed.find(0, start, end + 1) < 0:
+                    continue
+                self.segs_drawn += 1
+
+                front_floor, front_ceiling = floors[front] - eye, ceilings[front] - eye
+                light = lights[front]
+                wall_color = colors[front]
+                floor_color = tuple(int(c * light) for c in FLOOR_COLOR)
+                ceiling_color = tuple(int(c * light) for c in SKY_COLOR)
+                if back >= 0:
+                    back_floor, back_ceiling = floors[back] - eye, ceilings[back] - eye
+                    upper = back_ceiling < front_ceiling
+                    lower = back_floor > front_floor
+                to_x, to_y = x1 - x, y1 - y
+                numerator = to_x * seg_y - to_y * seg_x
+                column = closed.find(0, start, end + 1)
+                while column >= 0:
+                    denominator = ray_cos[column] * seg_y - ray_sin[column] * seg_x
+                    ray_length = numerator / denominator if denominator else 0
+                    if ray_length <= 0:
+                        column = closed.find(0, column + 1, end + 1)
+                        continue
+                    distance = ray_length * corrections[column]
+                    scale = height / distance
+                    clip_top, clip_bottom = top[column], bottom[column]
+                    ceiling_y = int(min(max(half_height - front_ceiling * scale, clip_top), clip_bottom))
+                    floor_y = int(max(min(half_height - front_floor * scale, clip_bottom), ceiling_y))
+                    if ceiling_y > clip_top:
+                        fill(ceiling_color, (column, clip_top, 1, ceiling_y - clip_top))
+                    if clip_bottom > floor_y:
+                        fill(floor_color, (column, floor_y, 1, clip_bottom - floor_y))
+                    shade = max(0.2, min(1.0, 1.0 - distance * 0.001)) * light
+                    shaded = (int(wall_color[0] * shade), int(wall_color[1] * shade), int(wall_color[2] * shade))
+                    if back < 0:
+                        if floor_y > ceiling_y:
+                            fill(shaded, (column, ceiling_y, 1, floor_y - ceiling_y))
+                        clip_top = clip_bottom
+                    else:
+                        clip_top, clip_bottom = ceiling_y, floor_y
+                        if upper:
+                            upper_y = int(min(max(half_height - back_ceiling * scale, ceiling_y), floor_y))
+                            if upper_y > ceiling_y:
+                                fill(shaded, (column, ceiling_y, 1, upper_y - ceiling_y))
+                            clip_top = upper_y
+                        if lower:
+                            lower_y = int(max(min(half_height - back_floor * scale, floor_y), clip_top))
+                            if floor_y > lower_y:
+                                fill(shaded, (column, lower_y, 1, floor_y - lower_y))
+                            clip_bottom = lower_y
+                    if clip_top >= clip_bottom:
+                        closed[column] = 1
+                        remaining -= 1
+                        depth_buffer[column] = ray_length
+                    else:
+                        top[column], bottom[column] = clip_top, clip_bottom
+                    column = closed.find(0, column + 1, end + 1)
+        return depth_buffer
@@ -0,0 +1,327 @@
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.game.level import levels
+from src.entities.monster import Monster
+
+# File layout (little endian), written by SaveWriter:
+#   header:   magic, version, section count
+#   sections: tag, payload size in bytes, payload
+#   WRLD: world struct, then the level's name (utf-8)
+#   PLYR: float64 per PLAYER_FIELDS, ability bits (bit i is ABILITIES[i]),
+#         float64 cooldown per ability
+#   RAND: the level RNG's Mersenne Twister state (625 uint32), then its cached gauss
+#   MONS: spawner struct, then MONSTER_DTYPE rows
+#   HRTS: heart count, HEART_DTYPE rows, then float64 (x, y) heart spawn positions
+#   VIST: int32 (x, y) visited cells
+#   TRIG: per trigger system: state struct, then TRIGGER_DTYPE rows
+# Times are stored as read from the game clock, along with the clock's time
+# when the snapshot was taken; loading shifts them by how far the clock has
+# moved since, so cooldowns carry on where they were on either kind of clock.
+SAVE_MAGIC = b'GSAV'
+SAVE_VERSION = 1
+HEADER_FORMAT = struct.Struct('<4sHH')
+SECTION_FORMAT = struct.Struct('<4sI')
+WORLD_FORMAT = struct.Struct('<qIdd?II')  # seed, level, saved at, level start, completed, kills, name size
+ABILITY_FORMAT = struct.Struct('<I')
+RANDOM_FORMAT = struct.Struct('<625I?d')
+SPAWNER_FORMAT = struct.Struct('<Idd?I')  # spawned count, last spawn, last wave, boss spawned, monster count
+COUNT_FORMAT = struct.Struct('<I')
+TRIGGER_SYSTEM_FORMAT = struct.Struct('<iiiI')  # cell x, cell y (-1 for none), region (-1), row count
+
+PLAYER_FIELDS = ('x', 'y', 'angle', 'health', 'speed', 'kill_count', 'level', 'exp', 'exp_to_next_level',
+                 'upgrade_points', 'base_damage', 'base_health', 'base_speed', 'last_hit_time', 'last_shot_time')
+PLAYER_COUNTS = ('kill_count', 'level', 'exp', 'exp_to_next_level', 'upgrade_points')
+PLAYER_TIMES = ('last_hit_time', 'last_shot_time')
+ABILITIES = ('double_shot', 'health_regen', 'slow_time', 'explosive_shot')
+MONSTER_TYPES = tuple(MONSTER_HEALTH)
+MONSTER_DTYPE = np.dtype([('x', '<f8'), ('y', '<f8'), ('health', '<f8'), ('attack_cooldown', '<f8'),
+                          ('type', 'u1'), ('level', '<u2')])
+HEART_DTYPE = np.dtype([('x', '<f8'), ('y', '<f8'), ('collected', '?'), ('pulse_scale', '<f8'),
+                        ('pulse_speed', '<f8'), ('pulse_time', '<f8')])
+TRIGGER_DTYPE = np.dtype([('trigger', '<u2'), ('region', '<i4'), ('time', '<f8')])
+
+def _trigger_state(system):
+    """(cell, region number, [(trigger, region, last fired)]) of a TriggerSystem"""
+    fired = []
+    triggers = [trigger for kind in system.triggers.values() for trigger in kind]
+    for number, trigger in enumerate(triggers):
+        fired.extend((number, region, time) for region, time in trigger.last_fired.items())
+    region = system.region.number if system.region is not None else -1
+    return system.cell, region, fired
+
+class Snapshot:
+    """Everything needed to resume a game: the level, player, monsters, pickups, RNG and timers.
+
+    `capture()` runs on the main thread and only copies the mutable state
+    into tuples and lists nobody else holds, so the game can carry on
+    while `encode()` packs the copy on the save thread. Level data is not
+    saved, only the level's number: it is reloaded from the level files.
+    Particles and dynamic lights are effects and are not saved.
+    """
+    def __init__(self):
+        self.seed = 0
+        self.level = 1
+        self.level_name = ''
+        self.saved_at = 0.0
+        self.level_start_time = 0.0
+        self.level_completed = False
+        self.kill_count = 0
+        self.player = {}
+        self.abilities = {}
+        self.cooldowns = {}
+        self.random_state = None
+        self.spawner = (0, 0.0, 0.0, False)
+        self.monsters = []  # (x, y, health, attack cooldown, type, level) tuples, or MONSTER_DTYPE rows
+        self.hearts = []  # HEART_DTYPE field tuples, or rows
+        self.heart_spawns = []
+        self.visited = []
+        self.triggers = []  # _trigger_state() per trigger system
+
+    @classmethod
+    def capture(cls, map_manager, player, abilities, cooldowns, trigger_systems=()):
+        snapshot = cls()
+        snapshot.seed = map_manager.seed
+        snapshot.level = map_manager.current_level
+        snapshot.level_name = map_manager.level.name
+        snapshot.saved_at = game_clock.time()
+        snapshot.level_start_time = map_manager.level_start_time
+        snapshot.level_completed = map_manager.level_completed
+        snapshot.kill_count = map_manager.kill_count
+        snapshot.player = {name: player[name] for name in PLAYER_FIELDS}
+        snapshot.abilities = {name: abilities[name] for name in ABILITIES}
+        snapshot.cooldowns = {name: cooldowns[name] for name in ABILITIES}
+        snapshot.random_state = map_manager.rng.getstate()
+        manager = map_manager.monster_manager
+        snapshot.spawner = (manager.spawned_count, manager.last_spawn_time, manager.last_wave_time,
+                            manager.boss_spawned)
+        snapshot.monsters = [(m.x, m.y, m.health, m.attack_cooldown, m.type, m.level) for m in manager.monsters]
+        hearts = map_manager.heart_manager
+        snapshot.hearts = [(h['x'], h['y'], h['collected'], h['pulse_scale'], h['pulse_speed'], h['pulse_time'])
+                           for h in hearts.hearts]
+        snapshot.heart_spawns = list(hearts.spawn_positions)
+        snapshot.visited = list(map_manager.visited_cells)
+        snapshot.triggers = [_trigger_state(system) for system in trigger_systems if system is not None]
+        return snapshot
+
+    def encode(self):
+        """The snapshot as save file contents"""
+        name = self.level_name.encode()
+        sections = [(b'WRLD', WORLD_FORMAT.pack(self.seed, self.level, self.saved_at, self.level_start_time,
+                                                self.level_completed, self.kill_count, len(name)) + name)]
+
+        bits = sum(1 << i for i, ability in enumerate(ABILITIES) if self.abilities[ability])
+        player = np.array([self.player[field] for field in PLAYER_FIELDS], dtype='<f8').tobytes()
+        cooldowns = np.array([self.cooldowns[ability] for ability in ABILITIES], dtype='<f8').tobytes()
+        sections.append((b'PLYR', player + ABILITY_FORMAT.pack(bits) + cooldowns))
+
+        _, words, gauss = self.random_state
+        sections.append((b'RAND', RANDOM_FORMAT.pack(*words, gauss is not None, gauss or 0.0)))
+
+        monsters = np.array(self.monsters, dtype=[('x', '<f8'), ('y', '<f8'), ('health', '<f8'),
+                                                  ('attack_cooldown', '<f8'), ('type', 'U8'), ('level', '<u2')])
+        rows = np.zeros(len(monsters), dtype=MONSTER_DTYPE)
+        for field in ('x', 'y', 'health', 'attack_cooldown', 'level'):
+            rows[field] = monsters[field]
+        for code, monster_type in enumerate(MONSTER_TYPES):
+            rows['type'][monsters['type'] == monster_type] = code
+        sections.append((b'MONS', SPAWNER_FORMAT.pack(*self.spawner, len(rows)) + rows.tobytes()))
+
+        hearts = np.array(self.hearts, dtype=HEART_DTYPE)
+        spawns = np.array(self.heart_spawns, dtype='<f8').reshape(-1, 2)
+        sections.append((b'HRTS', COUNT_FORMAT.pack(len(hearts)) + hearts.tobytes() + spawns.tobytes()))
+
+        sections.append((b'VIST', np.array(self.visited, dtype='<i4').reshape(-1, 2).tobytes()))
+
+        triggers = []
+        for cell, region, fired in self.triggers:
+            cell_x, cell_y = cell if cell is not None else (-1, -1)
+            triggers.append(TRIGGER_SYSTEM_FORMAT.pack(cell_x, cell_y, region, len(fired)))
+            triggers.append(np.array(fired, dtype=TRIGGER_DTYPE).tobytes())
+        sections.append((b'TRIG', COUNT_FORMAT.pack(len(self.triggers)) + b''.join(triggers)))
+
+        chunks = [HEADER_FORMAT.pack(SAVE_MAGIC, SAVE_VERSION, len(sections))]
+        for tag, payload in sections:
+            chunks.append(SECTION_FORMAT.pack(tag, len(payload)))
+            chunks.append(payload)
+        return b''.join(chunks)
+
+    @classmethod
+    def decode(cls, buffer, name=''):
+        if len(buffer) < HEADER_FORMAT.size:
+            raise ValueError(f"{name} is not a saved game")
+        magic, version, count = HEADER_FORMAT.unpack_from(buffer)
+        if magic != SAVE_MAGIC:
+            raise ValueError(f"{name} is not a saved game")
+        if version != SAVE_VERSION:
+            raise ValueError(f"{name} has unsupported save format version {version}")
+        sections = {}
+        offset = HEADER_FORMAT.size
+        for _ in range(count):
+            if offset + SECTION_FORMAT.size > len(buffer):
+                raise ValueError(f"{name} is truncated")
+            tag, size = SECTION_FORMAT.unpack_from(buffer, offset)
+            offset += SECTION_FORMAT.size
+            sections[tag] = memoryview(buffer)[offset:offset + size]
+            offset += size
+        if offset > len(buffer) or any(tag not in sections for tag in (b'WRLD', b'PLYR', b'RAND', b'MONS', b'HRTS')):
+            raise ValueError(f"{name} is truncated")
+        try:
+            return cls._from_sections(sections)
+        except (struct.error, IndexError) as e:
+            # A section shorter than its fixed fields, or with counts past its end
+            raise ValueError(f"corrupt snapshot {name}: {e}") from e
+
+    @classmethod
+    def _from_sections(cls, sections):
+        snapshot = cls()
+        world = sections[b'WRLD']
+        (snapshot.seed, snapshot.level, snapshot.saved_at, snapshot.level_start_time,
+         snapshot.level_completed, snapshot.kill_count, name_size) = WORLD_FORMAT.unpack_from(world)
+        snapshot.level_name = bytes(world[WORLD_FORMAT.size:WORLD_FORMAT.size + name_size]).decode()
+
+        player = sections[b'PLYR']
+        values = np.frombuffer(player, dtype='<f8', count=len(PLAYER_FIELDS)).tolist()
+        snapshot.player = dict(zip(PLAYER_FIELDS, values))
+        for field in PLAYER_COUNTS:
+            snapshot.player[field] = int(snapshot.player[field])
+        offset = len(PLAYER_FIELDS) * 8
+        bits, = ABILITY_FORMAT.unpack_from(player, offset)
+        snapshot.abilities = {ability: bool(bits & (1 << i)) for i, ability in enumerate(ABILITIES)}
+        cooldowns = np.frombuffer(player, dtype='<f8', count=len(ABILITIES), offset=offset + ABILITY_FORMAT.size)
+        snapshot.cooldowns = dict(zip(ABILITIES, cooldowns.tolist()))
+
+        fields = RANDOM_FORMAT.unpack_from(sections[b'RAND'])
+        snapshot.random_state = (3, fields[:625], fields[626] if fields[625] else None)
+
+        spawner = sections[b'MONS']
+        *snapshot.spawner, monster_count = SPAWNER_FORMAT.unpack_from(spawner)
+        snapshot.monsters = np.frombuffer(spawner, dtype=MONSTER_DTYPE, count=monster_count,
+                                          offset=SPAWNER_FORMAT.size)
+
+        hearts = sections[b'HRTS']
+        heart_count, = COUNT_FORMAT.unpack_from(hearts)
+        snapshot.hearts = np.frombuffer(hearts, dtype=HEART_DTYPE, count=heart_count, offset=COUNT_FORMAT.size)
+        spawns = np.frombuffer(hearts, dtype='<f8', offset=COUNT_FORMAT.size + snapshot.hearts.nbytes)
+        snapshot.heart_spawns = [tuple(position) for position in spawns.reshape(-1, 2).tolist()]
+
+        visited = np.frombuffer(sections.get(b'VIST', b''), dtype='<i4')
+        snapshot.visited = visited.reshape(-1, 2).tolist()
+
+        triggers = sections.get(b'TRIG')
+        if triggers is not None:
+            system_count, = COUNT_FORMAT.unpack_from(triggers)
+            offset = COUNT_FORMAT.size
+            for _ in range(system_count):
+                cell_x, cell_y, region, rows = TRIGGER_SYSTEM_FORMAT.unpack_from(triggers, offset)
+                offset += TRIGGER_SYSTEM_FORMAT.size
+                fired = np.frombuffer(triggers, dtype=TRIGGER_DTYPE, count=rows, offset=offset)
+                offset += fired.nbytes
+                cell = (cell_x, cell_y) if cell_x >= 0 else None
+                snapshot.triggers.append((cell, region, fired.tolist()))
+        return snapshot
+
+    def restore(self, map_manager):
+        """Put `map_manager` back in the saved state: reload the saved level, then its
+        RNG, monsters, hearts, visited cells and timers. Raises ValueError when the
+        level with the saved number isn't the level the game was saved on."""
+        level = levels.get(self.level)
+        if level.name != self.level_name:
+            raise ValueError(f"saved on {self.level_name}, but level {self.level} is {level.name}")
+        shift = game_clock.time() - self.saved_at
+        map_manager.seed = self.seed
+        map_manager.current_level = self.level
+        map_manager.reset_level()
+        map_manager.rng.setstate(self.random_state)
+        map_manager.level_start_time = self.level_start_time + shift
+        map_manager.level_completed = self.level_completed
+        map_manager.kill_count = self.kill_count
+        map_manager.visited_cells.update(map(tuple, self.visited))
+
+        manager = map_manager.monster_manager
+        spawned_count, last_spawn_time, last_wave_time, boss_spawned = self.spawner
+        manager.spawned_count = spawned_count
+        manager.last_spawn_time = last_spawn_time + shift
+        manager.last_wave_time = last_wave_time + shift
+        manager.boss_spawned = boss_spawned
+        rows = np.asarray(self.monsters, dtype=MONSTER_DTYPE)
+        for x, y, health, attack_cooldown, code, monster_level in rows.tolist():
+            monster = Monster(x, y, MONSTER_TYPES[code], monster_level)
+            monster.health = health
+            monster.attack_cooldown = attack_cooldown
+            manager.monsters.append(monster)
+
+        hearts = map_manager.heart_manager
+        hearts.spawn_positions = list(self.heart_spawns)
+        names = HEART_DTYPE.names
+        hearts.hearts = [dict(zip(names, row)) for row in np.asarray(self.hearts, dtype=HEART_DTYPE).tolist()]
+
+    def restore_triggers(self, trigger_systems):
+        """Re-arm trigger systems, in the order they were captured, as they were when saved"""
+        shift = game_clock.time() - self.saved_at
+        for system, (cell, region, fired) in zip(trigger_systems, self.triggers):
+            if system is None:
+                continue
+            system.reset()
+            system.cell = tuple(cell) if cell is not None else None
+            regions = system.regions.regions
+            system.region = regions[region] if 0 <= region < len(regions) else None
+            triggers = [trigger for kind in system.triggers.values() for trigger in kind]
+            for number, region_number, time in fired:
+                if number < len(triggers):
+                    triggers[number].last_fired[region_number] = time + shift
+
+    def player_state(self):
+        """The saved player values, with times moved onto the current clock"""
+        shift = game_clock.time() - self.saved_at
+        player = dict(self.player)
+        for field in PLAYER_TIMES:
+            player[field] += shift
+        cooldowns = {ability: time + shift for ability, time in self.cooldowns.items()}
+        return player, dict(self.abilities), cooldowns
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        return Snapshot.decode(f.read(), path)
+
+class SaveWriter:
+    """Writes snapshots to disk on a background thread.
+
+    `save()` takes a captured Snapshot and returns at once; encoding and
+    the file write happen on the save thread. The file is written beside
+    its destination and renamed over it, so a crash mid-save leaves the
+    previous save intact.
+    """
+    def __init__(self):
+        self.executor = None
+        self.pending = None
+
+    def save(self, path, snapshot):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='save')
+        self.pending = self.executor.submit(self._write, path, snapshot)
+        return self.pending
+
+    def _write(self, path, snapshot):
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(snapshot.encode())
+        os.replace(temporary, path)
+        return path
+
+    def wait(self):
+        """Block until the last save is on disk; re-raises its error if it failed"""
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            pending.result()
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+# Shared save writer
+saves = SaveWriter()
@@ -0,0 +1,95 @@
+import math
+from array import array
+from src.utils.constants import *
+from src.game.level import WALL, FLOOR
+
+class SpawnIndex:
+    """Plain floor cells around the player, grouped by path distance.
+
+    A breadth-first search from the player's cell (through every non-wall
+    cell, up to SPAWN_MAX_PATH_DISTANCE steps) lists the floor cells in the
+    order it reaches them, so the cells at any range of path distances are
+    one contiguous slice of that list and sampling one is a single random
+    index. Cells the player can't walk to are never chosen.
+
+    `move_to()` is called with the player's cell every tick; the search is
+    redone lazily, on the first sample after the player changed cell.
+    """
+    def __init__(self, level):
+        self.cells = level.cells
+        self.height, self.width = self.cells.shape
+        self.center = None
+        self.searched = None  # Cell the current tables were built from
+        self.order_x = array('i')  # Floor cells in breadth-first order
+        self.order_y = array('i')
+        self.bounds = [0]  # bounds[d]: index in the order of the first cell d steps away
+        self.distances = {}  # y * width + x -> path distance, for every cell reached
+        self.searches = 0
+
+    def move_to(self, cell_x, cell_y):
+        """Record the player's current cell"""
+        self.center = (cell_x, cell_y)
+
+    def _refresh(self):
+        if self.center == self.searched or self.center is None:
+            return
+        self.searched = self.center
+        self.searches += 1
+        cells, width, height = self.cells, self.width, self.height
+        order_x, order_y = array('i'), array('i')
+        bounds = []
+        start_x, start_y = self.center
+        distances = {start_y * width + start_x: 0}
+        frontier = [(start_x, start_y)]
+        distance = 0
+        while frontier:
+            bounds.append(len(order_x))
+            for x, y in frontier:
+                if cells[y, x] == FLOOR:
+                    order_x.append(x)
+                    order_y.append(y)
+            if distance == SPAWN_MAX_PATH_DISTANCE:
+                break
+            distance += 1
+            reached = []
+            for x, y in frontier:
+                for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                    if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                        continue
+                    key = ny * width + nx
+                    if key in distances or cells[ny, nx] == WALL:
+                        continue
+                    distances[key] = distance
+                    reached.append((nx, ny))
+            frontier = reached
+        bounds.append(len(order_x))
+        self.order_x, self.order_y = order_x, order_y
+        self.bounds = bounds
+        self.distances = distances
+
+    def distance(self, cell_x, cell_y):
+        """Path distance in cells from the player, or None beyond the search"""
+        self._refresh()
+        return self.distances.get(cell_y * self.width + cell_x)
+
+    def sample(self, rng, min_distance=0, max_distance=SPAWN_MAX_PATH_DISTANCE):
+        """A random floor cell (x, y) within the path distance range, or None"""
+        self._refresh()
+        last = len(self.bounds) - 1
+        start = self.bounds[min(min_distance, last)]
+        end = self.bounds[min(max_distance + 1, last)]
+        if start >= end:
+            return None
+        i = rng.randrange(start, end)
+        return self.order_x[i], self.order_y[i]
+
+    def sample_position(self, rng, min_distance=0, max_distance=SPAWN_MAX_PATH_DISTANCE):
+        """World coordinates of the middle of a sampled cell, or None"""
+        cell = self.sample(rng, min_distance, max_distance)
+        if cell is None:
+            return None
+        return cell[0] * CELL_SIZE + CELL_SIZE // 2, cell[1] * CELL_SIZE + CELL_SIZE // 2
+
+def spawn_distance(pixels):
+    """Path distance in cells standing in for a straight-line spawn distance"""
+    return math.ceil(pixels / CELL_SIZE)
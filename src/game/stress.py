@@ -0,0 +1,180 @@
+import json
+import math
+import random
+from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.entities.monster import Monster
+
+# Profiler spans that don't contain one another: together they cover the frame,
+# so the one that grows fastest is where the frame time goes as the load rises
+SUBSYSTEMS = ('input', 'MonsterManager.spawn', 'MonsterManager.move', 'HeartManager.update',
+              'particles.update', 'cast_rays.walls', 'cast_rays.sprites', 'cast_rays.particles',
+              'hud', 'UIManager.status', 'UIManager.minimap', 'UIManager.compass', 'UIManager.draw', 'flip')
+CONFIG_KEYS = ('monsters', 'hearts', 'particles', 'steps', 'step_ticks', 'output')
+MONSTER_MIX = ('normal', 'normal', 'normal', 'elite')
+PARTICLE_COLOR = (90, 160, 255)
+PARTICLE_LIFE = 3.0  # Seconds; expired particles are replaced on the next tick
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else 0.0
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def read_config(path):
+    """Stress settings from a JSON file with any of the CONFIG_KEYS"""
+    with open(path) as f:
+        config = json.load(f)
+    if not isinstance(config, dict) or any(key not in CONFIG_KEYS for key in config):
+        raise ValueError(f"{path} is not a stress config (expected keys: {', '.join(CONFIG_KEYS)})")
+    return config
+
+class StressScenario:
+    """Fills the running level with monsters, hearts and particles in steps and
+    records frame time against the entity count at each one.
+
+    The ramp has `steps` steps of `step_ticks` ticks; step k holds k/steps
+    of every target. `populate()` tops the counts up at the start of each
+    tick (monsters and hearts are never removed by it, and nothing kills
+    them: the player is invulnerable and doesn't shoot), and holds the
+    level's spawn and time-limit timers still so the counts are the ones
+    asked for. `record()` takes the profiler's per-span totals of the
+    frame just finished; each step's medians make one point of the
+    scaling curve.
+    """
+    def __init__(self, monsters=STRESS_MONSTERS, hearts=STRESS_HEARTS, particles=STRESS_PARTICLES,
+                 steps=STRESS_STEPS, step_ticks=STRESS_STEP_TICKS, output=STRESS_OUTPUT, seed=0):
+        self.targets = {'monsters': monsters, 'hearts': hearts, 'particles': min(particles, PARTICLE_CAPACITY)}
+        if particles > PARTICLE_CAPACITY:
+            print(f"Stress: {particles} particles asked for, the particle system holds {PARTICLE_CAPACITY}")
+        self.steps = max(1, steps)
+        self.step_ticks = max(STRESS_SETTLE_TICKS + 1, step_ticks)
+        self.output = output
+        self.rng = random.Random(f"stress:{seed}")
+        self.step = 0
+        self.tick = 0
+        self.frames = []  # (frame seconds, {span: seconds}) of the current step
+        self.curve = []  # One point per finished step
+
+    @classmethod
+    def from_config(cls, path=None, seed=0, **overrides):
+        """Defaults from constants.py, then the config file at `path`, then any override that isn't None"""
+        config = read_config(path) if path else {}
+        config.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(seed=seed, **config)
+
+    def finished(self):
+        return self.step >= self.steps
+
+    def target(self, kind):
+        return self.targets[kind] * (self.step + 1) // self.steps
+
+    def counts(self, map_manager, particle_system):
+        hearts = sum(1 for heart in map_manager.heart_manager.hearts if not heart['collected'])
+        return {'monsters': len(map_manager.monster_manager.monsters), 'hearts': hearts,
+                'particles': particle_system.count}
+
+    def populate(self, map_manager, particle_system, player_x, player_y, player_angle):
+        """Bring every count up to the current step's target"""
+        now = game_clock.time()
+        monsters = map_manager.monster_manager
+        monsters.last_spawn_time = monsters.last_wave_time = now
+        map_manager.level_start_time = now
+        cells = map_manager.level.spawn_candidates
+        level = map_manager.level
+
+        for _ in range(self.target('monsters') - len(monsters.monsters)):
+            x, y = level.cell_center(*cells[self.rng.randrange(len(cells))].tolist())
+            monsters.monsters.append(Monster(x, y, self.rng.choice(MONSTER_MIX), map_manager.current_level))
+            monsters.spawned_count += 1
+
+        hearts = map_manager.heart_manager
+        missing = self.target('hearts') - sum(1 for heart in hearts.hearts if not heart['collected'])
+        for _ in range(missing):
+            x, y = level.cell_center(*cells[self.rng.randrange(len(cells))].tolist())
+            hearts.hearts.append({'x': x, 'y': y, 'collected': False, 'pulse_scale': 1.0,
+                                  'pulse_speed': 0.1, 'pulse_time': self.rng.random() * 2 * math.pi})
+
+        # Particles drift in a cloud in front of the player, where they are drawn
+        missing = self.target('particles') - particle_system.count
+        if missing > 0:
+            x = player_x + math.cos(player_angle) * CELL_SIZE
+            y = player_y + math.sin(player_angle) * CELL_SIZE
+            particle_system.emit(missing, x, y, PARTICLE_EYE_HEIGHT, PARTICLE_COLOR, speed=60,
+                                 life=PARTICLE_LIFE, size=2, lift=60)
+
+    def record(self, frame_totals, counts):
+        """Add a finished frame (profiler totals in nanoseconds); False once the ramp is over"""
+        self.tick += 1
+        if self.tick > STRESS_SETTLE_TICKS:
+            spans = {name: duration / 1e9 for name, duration in frame_totals.items()}
+            self.frames.append((spans.get('frame', 0.0), spans))
+        if self.tick >= self.step_ticks:
+            self._finish_step(counts)
+        return not self.finished()
+
+    def _finish_step(self, counts):
+        frame_times = [frame for frame, _ in self.frames]
+        point = dict(counts)
+        point['step'] = self.step + 1
+        point['frame_ms'] = _median(frame_times) * 1000
+        point['frame_p95_ms'] = _percentile(frame_times, 0.95) * 1000
+        point['subsystems'] = {name: _median([spans.get(name, 0.0) for _, spans in self.frames]) * 1000
+                               for name in SUBSYSTEMS}
+        self.curve.append(point)
+        print(f"Stress step {point['step']}/{self.steps}: {point['monsters']} monsters, {point['hearts']} hearts, "
+              f"{point['particles']} particles: {point['frame_ms']:.1f} ms median, {point['frame_p95_ms']:.1f} ms p95")
+        self.step += 1
+        self.tick = 0
+        self.frames = []
+
+    def breaking_point(self):
+        """The first step over the frame budget and the subsystem taking most of that frame,
+        and the subsystem whose time grew most from the first step to the last"""
+        if not self.curve:
+            return None
+        budget = STRESS_FRAME_BUDGET * 1000
+        over = next((point for point in self.curve if point['frame_ms'] > budget), None)
+        point = over or self.curve[-1]
+        largest = max(SUBSYSTEMS, key=point['subsystems'].get)
+        first, last = self.curve[0]['subsystems'], self.curve[-1]['subsystems']
+        growth = {name: last[name] - first[name] for name in SUBSYSTEMS}
+        growing = max(growth, key=growth.get)
+        return {'step': point['step'] if over else None, 'monsters': point['monsters'], 'hearts': point['hearts'],
+                'particles': point['particles'], 'frame_ms': point['frame_ms'],
+                'largest': largest, 'largest_ms': point['subsystems'][largest],
+                'fastest_growing': growing, 'growth_ms': growth[growing]}
+
+    def report(self):
+        """The scaling curve as the JSON document write() saves"""
+        return {'targets': self.targets, 'steps': self.steps, 'step_ticks': self.step_ticks,
+                'frame_budget_ms': STRESS_FRAME_BUDGET * 1000, 'curve': self.curve,
+                'breaking_point': self.breaking_point()}
+
+    def write(self, path=None):
+        path = path or self.output
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def print_report(self):
+        print(f"{'step':>4} {'monsters':>9} {'hearts':>7} {'particles':>9} {'frame ms':>9} {'p95 ms':>8}  largest subsystems")
+        for point in self.curve:
+            largest = sorted(point['subsystems'].items(), key=lambda item: item[1], reverse=True)[:3]
+            print(f"{point['step']:>4} {point['monsters']:>9} {point['hearts']:>7} {point['particles']:>9} "
+                  f"{point['frame_ms']:>9.1f} {point['frame_p95_ms']:>8.1f}  "
+                  + ', '.join(f"{name} {ms:.1f}" for name, ms in largest))
+        breaking = self.breaking_point()
+        if breaking is None:
+            return
+        if breaking['step'] is None:
+            print(f"Every step stayed within the {STRESS_FRAME_BUDGET * 1000:.1f} ms frame budget; "
+                  f"at the last one {breaking['largest']} took {breaking['largest_ms']:.1f} ms")
+        else:
+            print(f"Frame budget of {STRESS_FRAME_BUDGET * 1000:.1f} ms first exceeded at step {breaking['step']} "
+                  f"({breaking['monsters']} monsters, {breaking['hearts']} hearts, {breaking['particles']} particles), "
+                  f"where {breaking['largest']} took {breaking['largest_ms']:.1f} ms")
+        print(f"Fastest growing with the load: {breaking['fastest_growing']} "
+              f"(+{breaking['growth_ms']:.1f} ms from step 1 to {len(self.curve)})")
@@ -0,0 +1,105 @@
+from src.utils.constants import *
+from src.utils.game_clock import game_clock
+
+# Level tables holding the cells of each kind of special area
+REGION_TABLES = {'treasure': 'treasure', 'trap': 'traps', 'boss': 'boss', 'exit': 'exits'}
+
+class Region:
+    """A 4-connected patch of special-area cells of one kind"""
+    def __init__(self, number, kind):
+        self.number = number
+        self.kind = kind
+        self.cells = []
+
+class RegionIndex:
+    """Special-area regions of a level, looked up by cell in O(1).
+
+    Built once per level from the level's treasure, trap, boss and exit
+    cell lists, so its cost depends on the special cells only, never on
+    the size of the map.
+    """
+    def __init__(self, level):
+        self.regions = []
+        self.region_at = {}  # (x, y) -> Region
+        for kind, table in REGION_TABLES.items():
+            cells = getattr(level, table)
+            if cells is None:
+                continue
+            remaining = set(map(tuple, cells.tolist()))
+            while remaining:
+                region = Region(len(self.regions), kind)
+                self.regions.append(region)
+                stack = [remaining.pop()]
+                while stack:
+                    x, y = stack.pop()
+                    region.cells.append((x, y))
+                    self.region_at[(x, y)] = region
+                    for neighbour in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                        if neighbour in remaining:
+                            remaining.remove(neighbour)
+                            stack.append(neighbour)
+
+    def region(self, cell_x, cell_y):
+        return self.region_at.get((cell_x, cell_y))
+
+class Trigger:
+    def __init__(self, kind, callback, on, cooldown, once):
+        self.kind = kind
+        self.callback = callback
+        self.on = on  # 'cell' or 'region'
+        self.cooldown = cooldown
+        self.once = once
+        self.last_fired = {}  # Region number -> game time it last fired
+
+class TriggerSystem:
+    """Fires callbacks when the player enters special-area cells or regions.
+
+    `update()` takes the player's cell every frame and does nothing unless
+    the cell changed, so standing in a room fires nothing. 'cell' triggers
+    fire on every step onto a new cell of their kind, 'region' triggers
+    only when the player comes into a region from outside it. A trigger
+    waits `cooldown` seconds before firing again in the same region, and
+    a `once` trigger fires at most once per region per level.
+    """
+    def __init__(self, level):
+        self.regions = RegionIndex(level)
+        self.triggers = {}  # Kind -> [Trigger]
+        self.cell = None
+        self.region = None
+
+    def on_enter(self, kind, callback, on='region', cooldown=0.0, once=False):
+        """Call `callback(*args)` (the args given to update) when the player enters an area of `kind`"""
+        self.triggers.setdefault(kind, []).append(Trigger(kind, callback, on, cooldown, once))
+
+    def reset(self):
+        """Forget where the player was and re-arm every trigger"""
+        self.cell = None
+        self.region = None
+        for triggers in self.triggers.values():
+            for trigger in triggers:
+                trigger.last_fired.clear()
+
+    def update(self, cell_x, cell_y, *args):
+        """Report the player's cell; returns True if a fired callback returned True"""
+        cell = (cell_x, cell_y)
+        if cell == self.cell:
+            return False
+        self.cell = cell
+        region = self.regions.region_at.get(cell)
+        entered_region = region is not self.region
+        self.region = region
+        if region is None:
+            return False
+
+        result = False
+        now = game_clock.time()
+        for trigger in self.triggers.get(region.kind, ()):
+            if trigger.on == 'region' and not entered_region:
+                continue
+            last = trigger.last_fired.get(region.number)
+            if last is not None and (trigger.once or now - last < trigger.cooldown):
+                continue
+            trigger.last_fired[region.number] = now
+            if trigger.callback(*args):
+                result = True
+        return result
@@ -0,0 +1,190 @@
+import math
+import os
+import struct
+import numpy as np
+from src.utils.constants import *
+from src.game.level import WALL
+
+# File layout (little endian), stored next to the compiled level as level<n>.sdf:
+#   header: magic, version, samples per cell, level width, level height,
+#           distance clamp in world units
+#   field:  (height * samples) x (width * samples) float32, row-major
+FIELD_MAGIC = b'GSDF'
+FIELD_VERSION = 1
+HEADER_FORMAT = struct.Struct('<4sHHIIf')
+
+def _row_distance(solid, limit):
+    """Samples along each row to the nearest solid sample, clamped to `limit`"""
+    height, width = solid.shape
+    columns = np.arange(width, dtype=np.int32)
+    before = np.where(solid, columns, -limit - width)
+    np.maximum.accumulate(before, axis=1, out=before)
+    after = np.where(solid, columns, limit + 2 * width)
+    after = np.minimum.accumulate(after[:, ::-1], axis=1)[:, ::-1]
+    distance = np.minimum(columns - before, after - columns)
+    return np.minimum(distance, limit).astype(np.float32)
+
+def _box_distance(solid, limit):
+    """Distance in samples from each sample's center to the nearest solid sample square.
+
+    Squares are handled exactly by measuring each axis to the square's
+    near edge (offset - 0.5): the row pass finds the nearest solid sample
+    in every row and the column pass combines rows up to `limit` samples
+    above and below, one shifted array operation per row offset.
+    """
+    height, width = solid.shape
+    across = np.maximum(_row_distance(solid, limit) - 0.5, 0)
+    across *= across
+    best = across.copy()
+    for offset in range(1, limit + 1):
+        vertical = (offset - 0.5) ** 2
+        np.minimum(best[offset:], across[:-offset] + vertical, out=best[offset:])
+        np.minimum(best[:-offset], across[offset:] + vertical, out=best[:-offset])
+    np.sqrt(best, out=best)
+    return np.minimum(best, limit - 0.5, out=best)
+
+def build_field(grid, resolution=WALL_FIELD_RESOLUTION, max_distance=WALL_FIELD_MAX_DISTANCE):
+    """Signed distance (world units) from sample centers to the nearest wall surface.
+
+    Positive in open space, negative inside walls. Exit cells count as solid,
+    like walls, because rays stop at them and nothing walks through them.
+    """
+    solid_cells = (grid == WALL) | (grid == SPECIAL_AREAS['exit'])
+    solid = np.repeat(np.repeat(solid_cells, resolution, axis=0), resolution, axis=1)
+    # A ring of solid samples makes the map border a wall
+    solid = np.pad(solid, 1, constant_values=True)
+    step = CELL_SIZE / resolution
+    limit = max(1, int(math.ceil(max_distance / step)))
+    field = _box_distance(solid, limit)
+    field -= _box_distance(~solid, limit)
+    field *= step
+    return np.ascontiguousarray(field[1:-1, 1:-1])
+
+class WallField:
+    """A level's signed distance field of walls, sampled several times per cell.
+
+    `distance(x, y)` is the bilinearly interpolated distance from a world
+    position to the nearest wall (negative inside one, clamped to
+    WALL_FIELD_MAX_DISTANCE); `safe_step(x, y)` is a distance it is always
+    safe to move in any direction without touching a wall, for sphere
+    tracing. The map border counts as a wall.
+    """
+    def __init__(self, field, resolution):
+        self.field = field
+        self.resolution = resolution
+        self.rows, self.columns = field.shape
+        self.step = CELL_SIZE / resolution
+        self.scale = resolution / CELL_SIZE
+        # The field is 1-Lipschitz, so a sample is off by at most half its diagonal anywhere in its square
+        self.margin = self.step * math.sqrt(2) / 2
+        self.values = memoryview(np.ascontiguousarray(field, dtype=np.float32)).cast('B').cast('f', field.shape)
+
+    def _sample(self, column, row):
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return self.values[row, column]
+        return -self.step
+
+    def distance(self, x, y):
+        u = x * self.scale - 0.5
+        v = y * self.scale - 0.5
+        column, row = math.floor(u), math.floor(v)
+        fu, fv = u - column, v - row
+        sample = self._sample
+        top = sample(column, row) * (1 - fu) + sample(column + 1, row) * fu
+        bottom = sample(column, row + 1) * (1 - fu) + sample(column + 1, row + 1) * fu
+        return top * (1 - fv) + bottom * fv
+
+    def safe_step(self, x, y):
+        return self._sample(int(x * self.scale), int(y * self.scale)) - self.margin
+
+    def clearance(self, x, y, radius):
+        """True when a circle of `radius` at (x, y) touches no wall"""
+        return self.distance(x, y) >= radius
+
+# Cells nothing walks into; exits are reached by touching them
+SOLID_CELLS = (WALL, SPECIAL_AREAS['exit'])
+
+def slide_move(field, maze, x, y, dx, dy, radius):
+    """Move a circle of `radius` by (dx, dy), sliding along walls it would hit.
+
+    The center must stay off wall and exit cells, the cells the field
+    counts as solid, so treasure, trap and boss rooms are walked into like
+    floor; with a wall field the whole circle must also stay clear of
+    walls. Returns the new position.
+    """
+    height, width = maze.shape
+    for next_x, next_y in ((x + dx, y + dy), (x + dx, y), (x, y + dy)):
+        cell_x, cell_y = int(next_x // CELL_SIZE), int(next_y // CELL_SIZE)
+        if not (0 <= cell_x < width and 0 <= cell_y < height) or maze[cell_y, cell_x] in SOLID_CELLS:
+            continue
+        if field is None or field.distance(next_x, next_y) >= radius:
+            return next_x, next_y
+    return x, y
+
+def field_path(level):
+    """Where a level's field is cached, or None for levels that aren't files"""
+    name = getattr(level, 'name', '')
+    if name.endswith('.lvl') and os.path.exists(name):
+        return os.path.splitext(name)[0] + '.sdf'
+    return None
+
+def read_field(path, level, resolution):
+    """The cached field for `level`, or None if it is missing, stale or for other settings"""
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(level.name):
+            return None
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_FORMAT.size)
+    except OSError:
+        return None
+    if len(header) < HEADER_FORMAT.size:
+        return None
+    magic, version, samples, width, height, max_distance = HEADER_FORMAT.unpack(header)
+    if (magic != FIELD_MAGIC or version != FIELD_VERSION or samples != resolution
+            or (width, height) != (level.width, level.height) or max_distance != np.float32(WALL_FIELD_MAX_DISTANCE)):
+        return None
+    # Memory-mapped, like large compiled levels
+    return np.memmap(path, dtype='<f4', mode='r', offset=HEADER_FORMAT.size,
+                     shape=(height * samples, width * samples))
+
+def write_field(path, field, level, resolution):
+    with open(path, 'wb') as f:
+        f.write(HEADER_FORMAT.pack(FIELD_MAGIC, FIELD_VERSION, resolution, level.width, level.height,
+                                   WALL_FIELD_MAX_DISTANCE))
+        f.write(field.astype('<f4').tobytes())
+
+class WallFieldCache:
+    """One WallField per level: read from the .sdf next to its .lvl, or built and saved there"""
+    def __init__(self, resolution=WALL_FIELD_RESOLUTION):
+        self.resolution = resolution
+        self.fields = {}
+
+    def get(self, level):
+        """The level's wall field, or None for chunked worlds (they have no full grid)"""
+        if level.grid is None:
+            return None
+        field = self.fields.get(level.name)
+        if field is None:
+            field = WallField(self._load(level), self.resolution)
+            self.fields[level.name] = field
+        return field
+
+    def _load(self, level):
+        path = field_path(level)
+        if path:
+            field = read_field(path, level, self.resolution)
+            if field is not None:
+                return field
+        field = build_field(level.grid, self.resolution)
+        if path:
+            try:
+                write_field(path, field, level, self.resolution)
+            except OSError:
+                pass  # Read-only level folder: rebuild next time
+        return field
+
+    def clear(self):
+        self.fields.clear()
+
+# Shared wall fields
+wall_fields = WallFieldCache()
@@ -0,0 +1,89 @@
+import pygame
+
+class Compositor:
+    """Decides what part of the screen has to be pushed to the display.
+
+    While the 3D view is animating every frame is a full flip. On static
+    screens (title, pause, upgrade, game over) the scene under the HUD is
+    drawn once and kept in `background`; afterwards only HUD elements whose
+    content key changed are restored from it, redrawn and pushed with
+    `pygame.display.update(rects)`.
+    """
+    def __init__(self):
+        self.size = None
+        self.background = None
+        self.world = None  # Last rendered 3D view + in-world HUD, reused while paused
+        self.world_key = None
+        self.scene_key = None
+        self.elements = {}  # name -> (rect, content key) as last pushed
+        self.dirty = []
+        self.full_update = True
+
+    def resize(self, size):
+        """Allocate the cached layers for a new screen size"""
+        if size == self.size:
+            return
+        self.size = size
+        self.background = pygame.Surface(size)
+        self.world = pygame.Surface(size)
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget all cached state; the next present is a full flip"""
+        self.full_update = True
+        self.world_key = None
+        self.scene_key = None
+        self.elements.clear()
+
+    def begin_scene(self, key):
+        """Return True if the static scene changed and must be redrawn in full"""
+        if key == self.scene_key:
+            return False
+        self.scene_key = key
+        self.full_update = True
+        self.elements.clear()
+        return True
+
+    def store_background(self, screen):
+        self.background.blit(screen, (0, 0))
+
+    def has_world(self, key):
+        return self.world_key is not None and self.world_key == key
+
+    def store_world(self, screen, key):
+        self.world.blit(screen, (0, 0))
+        self.world_key = key
+
+    def restore_world(self, screen):
+        screen.blit(self.world, (0, 0))
+
+    def element_changed(self, screen, name, rect, key):
+        """Track a HUD element; True if it must be redrawn this frame.
+
+        On a partial update the element's old and new rectangles are painted
+        back from the background and queued for the next present.
+        """
+        rect = pygame.Rect(rect)
+        previous = self.elements.get(name)
+        if previous is not None and previous == (rect, key):
+            return False
+        self.elements[name] = (rect, key)
+        if self.full_update:
+            return True
+        for area in (rect, previous[0] if previous else None):
+            if area is not None and area.width and area.height:
+                screen.blit(self.background, area, area)
+                self.dirty.append(area)
+        return True
+
+    def present(self):
+        """Push this frame to the display: a full flip or just the dirty rectangles"""
+        if self.full_update:
+            pygame.display.flip()
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+        self.full_update = False
+        self.dirty.clear()
+
+# Shared compositor used by the launcher's main loop
+compositor = Compositor()
@@ -0,0 +1,49 @@
+import pygame
+
+# Full-screen overlays kept allocated for the life of the display
+OVERLAY_NAMES = ('dim', 'blood')
+
+class OverlayCache:
+    """Pre-allocated full-screen tint overlays reused across frames.
+
+    Each overlay is a plain surface filled with one colour and blended with
+    surface alpha, so changing its opacity is a `set_alpha` call rather than
+    a new SRCALPHA surface. Surfaces are only reallocated when the screen
+    size changes.
+    """
+    def __init__(self):
+        self.size = None
+        self.overlays = {}
+        self.colors = {}
+        self.alphas = {}
+
+    def resize(self, size):
+        """(Re)allocate every overlay for a new screen size"""
+        if size == self.size:
+            return
+        self.size = size
+        for name in OVERLAY_NAMES:
+            self.overlays[name] = pygame.Surface(size)
+            self.colors[name] = None
+            self.alphas[name] = None
+
+    def get(self, name, color, alpha):
+        """Return the named overlay tinted `color` at opacity `alpha` (0-255)"""
+        overlay = self.overlays[name]
+        color = tuple(color[:3])
+        if self.colors[name] != color:
+            overlay.fill(color)
+            self.colors[name] = color
+        alpha = int(alpha)
+        if self.alphas[name] != alpha:
+            overlay.set_alpha(alpha)
+            self.alphas[name] = alpha
+        return overlay
+
+    def draw(self, screen, name, color, alpha):
+        """Blend the named overlay over the whole screen"""
+        self.resize(screen.get_size())
+        screen.blit(self.get(name, color, alpha), (0, 0))
+
+# Shared overlay cache used by the launcher's full-screen effects and menus
+overlay_cache = OverlayCache()
@@ -0,0 +1,111 @@
+import pygame
+from collections import deque
+from src.utils.constants import *
+from src.ui.text_cache import text_cache
+
+class PerfOverlay:
+    """Frame statistics panel: FPS, frame-time graph, entity counts and stage timings.
+
+    Text and graph are redrawn into a cached surface only every
+    PERF_OVERLAY_REFRESH seconds; other frames just blit that surface.
+    """
+    def __init__(self, history=PERF_HISTORY_FRAMES):
+        self.frame_times = deque(maxlen=history)  # Seconds per frame, newest last
+        self.visible = False
+        self.surface = pygame.Surface((PERF_OVERLAY_WIDTH, PERF_OVERLAY_HEIGHT), pygame.SRCALPHA)
+        self.last_refresh = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.last_refresh = None  # Redraw as soon as it is shown
+
+    def add_frame(self, seconds):
+        """Record the duration of one full main loop iteration"""
+        self.frame_times.append(seconds)
+
+    def stats(self):
+        """Current, average and 1%-low FPS over the history window"""
+        if not self.frame_times:
+            return {'current_fps': 0.0, 'average_fps': 0.0, 'low_1_fps': 0.0, 'frame_ms': 0.0}
+        current = self.frame_times[-1]
+        average = sum(self.frame_times) / len(self.frame_times)
+        # 1% low: average frame rate over the slowest 1% of frames
+        slowest = sorted(self.frame_times, reverse=True)[:max(1, len(self.frame_times) // 100)]
+        low = sum(slowest) / len(slowest)
+        return {
+            'current_fps': 1.0 / current if current > 0 else 0.0,
+            'average_fps': 1.0 / average if average > 0 else 0.0,
+            'low_1_fps': 1.0 / low if low > 0 else 0.0,
+            'frame_ms': current * 1000
+        }
+
+    def update(self, now, entity_counts, stage_times):
+        """Refresh the cached surface if the refresh interval has passed.
+
+        `entity_counts` maps a label to a count; `stage_times` maps a span
+        name to its duration in nanoseconds for the last frame.
+        """
+        if not self.visible:
+            return
+        if self.last_refresh is not None and now - self.last_refresh < PERF_OVERLAY_REFRESH:
+            return
+        self.last_refresh = now
+        self._redraw(entity_counts, stage_times)
+
+    def _text(self, text):
+        return text_cache.render(text, PERF_OVERLAY_FONT_SIZE, UI_FONT_COLOR)
+
+    def _redraw(self, entity_counts, stage_times):
+        self.surface.fill(UI_BACKGROUND_COLOR)
+        stats = self.stats()
+        cache = text_cache.stats()
+        lines = [
+            f"FPS: {stats['current_fps']:.0f}  avg: {stats['average_fps']:.0f}  1% low: {stats['low_1_fps']:.0f}",
+            f"Frame: {stats['frame_ms']:.1f} ms",
+            f"Text cache: {cache['hit_rate'] * 100:.1f}% hits, {cache['surfaces']} surfaces"
+        ]
+        y = 5
+        for line in lines:
+            self.surface.blit(self._text(line), (5, y))
+            y += PERF_OVERLAY_FONT_SIZE
+
+        self._draw_graph(pygame.Rect(5, y, PERF_OVERLAY_WIDTH - 10, PERF_GRAPH_HEIGHT))
+        y += PERF_GRAPH_HEIGHT + 5
+
+        counts = ", ".join(f"{label}: {count}" for label, count in entity_counts.items())
+        self.surface.blit(self._text(counts or "No entities"), (5, y))
+        y += PERF_OVERLAY_FONT_SIZE + 5
+
+        if not stage_times:
+            self.surface.blit(self._text("Stage timings need --profile"), (5, y))
+            return
+        for name, duration in sorted(stage_times.items(), key=lambda item: item[1], reverse=True):
+            if y + PERF_OVERLAY_FONT_SIZE > PERF_OVERLAY_HEIGHT:
+                break
+            text = self._text(f"{name}: {duration / 1e6:.2f} ms")
+            self.surface.blit(text, (5, y))
+            y += PERF_OVERLAY_FONT_SIZE
+
+    def _draw_graph(self, rect):
+        pygame.draw.rect(self.surface, (0, 0, 0, 160), rect)
+        if not self.frame_times:
+            return
+        bar_width = rect.width / self.frame_times.maxlen
+        for i, seconds in enumerate(self.frame_times):
+            ms = seconds * 1000
+            height = min(rect.height, int(ms / PERF_GRAPH_MAX_MS * rect.height))
+            color = PERF_GRAPH_SLOW_COLOR if ms > PERF_TARGET_FRAME_MS else PERF_GRAPH_COLOR
+            x = rect.x + int(i * bar_width)
+            pygame.draw.line(self.surface, color, (x, rect.bottom - 1), (x, rect.bottom - 1 - height))
+        # Target frame time marker
+        target_y = rect.bottom - int(PERF_TARGET_FRAME_MS / PERF_GRAPH_MAX_MS * rect.height)
+        pygame.draw.line(self.surface, UI_FONT_COLOR, (rect.x, target_y), (rect.right, target_y))
+
+    def rect(self):
+        if not self.visible:
+            return pygame.Rect(0, 0, 0, 0)
+        return pygame.Rect(PERF_OVERLAY_POSITION, (PERF_OVERLAY_WIDTH, PERF_OVERLAY_HEIGHT))
+
+    def draw(self, screen):
+        if self.visible:
+            screen.blit(self.surface, PERF_OVERLAY_POSITION)
@@ -0,0 +1,68 @@
+import pygame
+from collections import OrderedDict
+from src.utils.constants import *
+
+class TextCache:
+    """Shared fonts and rendered text surfaces for all HUD code.
+
+    Fonts are cached by (face, size) for the life of the game. Rendered
+    surfaces are cached by (face, size, text, colour, antialias) in a
+    bounded LRU, so a string that doesn't change is only rendered once.
+    Callers must treat returned surfaces as read-only.
+    """
+    def __init__(self, max_surfaces=TEXT_CACHE_SIZE):
+        self.max_surfaces = max_surfaces
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size, face=None):
+        """Return the Font for (face, size); missing font files fall back to the default face"""
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            try:
+                font = pygame.font.Font(face, size)
+            except (OSError, pygame.error):
+                font = self.font(size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, size, color, face=None, antialias=True):
+        """Return a surface with `text` rendered, reusing a cached one when possible"""
+        key = (face, size, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.font(size, face).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'surfaces': len(self.surfaces),
+            'fonts': len(self.fonts)
+        }
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+# Shared text cache used by the launcher and all UI code
+text_cache = TextCache()
@@ -1,37 +1,111 @@
 import pygame
 import math
 from src.utils.constants import *
+from src.utils.profiler import profiler
+from src.ui.text_cache import text_cache
 
 class UIManager:
     def __init__(self, maze):
-        self.maze = maze
-        self.visited_cells = set()
-        self.font = pygame.font.Font(None, UI_FONT_SIZE)
-        self.boss_warning_font = pygame.font.Font(None, BOSS_WARNING_SIZE)
-        
         # Create surfaces for UI elements
         self.status_surface = pygame.Surface((STATUS_WIDTH, STATUS_HEIGHT), pygame.SRCALPHA)
         self.minimap_surface = pygame.Surface((MINIMAP_SIZE, MINIMAP_SIZE), pygame.SRCALPHA)
         self.compass_surface = pygame.Surface((COMPASS_SIZE, COMPASS_SIZE), pygame.SRCALPHA)
         self.quest_surface = pygame.Surface((QUEST_WIDTH, QUEST_HEIGHT), pygame.SRCALPHA)
-        
-        # Calculate minimap scale
-        self.minimap_scale = MINIMAP_SIZE / (max(len(maze[0]), len(maze)) * CELL_SIZE)
+        self.compass_face = self._bake_compass_face()
         
         # Boss warning
         self.boss_warning_timer = 0
         self.boss_warning_text = None
+        
+        # Content of each element as last drawn, for dirty-rectangle tracking
+        self.status_key = None
+        self.minimap_key = None
+        self.compass_key = None
+        
+        self.set_maze(maze)
 
+    def set_maze(self, maze):
+        """Bake the minimap layers for a new level"""
+        self.maze = maze
+        # Chunked worlds are too big to bake cell by cell; their minimap is
+        # built from a downsampled overview where one cell covers step x step
+        overview = getattr(maze, 'overview', None)
+        self.minimap_step = maze.overview_step if overview is not None else 1
+        self.minimap_cells = overview if overview is not None else maze
+        self.cell_span = CELL_SIZE * self.minimap_step  # World units per minimap cell
+        self.map_height, self.map_width = self.minimap_cells.shape
+        
+        # One byte per cell, row-major; non-zero once the player has been there
+        self.visited = bytearray(self.map_width * self.map_height)
+        self.visited_count = 0
+        
+        # Large maps get smaller cells; past one pixel per cell the layers are
+        # baked at one pixel per cell and scaled down to fit
+        longest = max(self.map_width, self.map_height)
+        self.minimap_cell_size = max(1, min(MINIMAP_CELL_SIZE, MINIMAP_SIZE // longest))
+        self.minimap_scale = min(1.0, MINIMAP_SIZE / (longest * self.minimap_cell_size))
+        
+        self.wall_layer = self._bake_wall_layer()
+        self.explored_layer = pygame.Surface(self.wall_layer.get_size(), pygame.SRCALPHA)
+        self.explored_layer.fill(MINIMAP_UNVISITED_COLOR)
+        self.explored_view = self.explored_layer
+        self.explored_dirty = False
+
+    def _bake_wall_layer(self):
+        """Render every cell once into a palettised surface, then scale it to cell size"""
+        # Cell values index the palette directly: 1 is a wall, everything else is open.
+        # The grid is wrapped without copying; convert() below makes the only copy
+        layer = pygame.image.frombuffer(self.minimap_cells, (self.map_width, self.map_height), 'P')
+        layer.set_palette([MINIMAP_VISITED_COLOR, MINIMAP_WALL_COLOR] + [MINIMAP_VISITED_COLOR] * 254)
+        layer = layer.convert(32, 0)
+        if self.minimap_cell_size > 1:
+            layer = pygame.transform.scale(layer, (self.map_width * self.minimap_cell_size,
+                                                   self.map_height * self.minimap_cell_size))
+        return layer
+
+    def mark_visited(self, cell_x, cell_y):
+        """Reveal a cell in the fog layer the first time the player enters it"""
+        if not (0 <= cell_x < self.map_width and 0 <= cell_y < self.map_height):
+            return
+        index = cell_y * self.map_width + cell_x
+        if self.visited[index]:
+            return
+        self.visited[index] = 1
+        self.visited_count += 1
+        size = self.minimap_cell_size
+        area = pygame.Rect(cell_x * size, cell_y * size, size, size)
+        self.explored_layer.blit(self.wall_layer, area, area)
+        self.explored_dirty = True
+
+    def reveal_cells(self, cells):
+        """Mark level cells (x, y) visited, e.g. the ones a loaded save had visited"""
+        step = self.minimap_step
+        for cell_x, cell_y in cells:
+            self.mark_visited(cell_x // step, cell_y // step)
+
+    def is_visited(self, cell_x, cell_y):
+        return (0 <= cell_x < self.map_width and 0 <= cell_y < self.map_height
+                and self.visited[cell_y * self.map_width + cell_x] != 0)
+
+    @profiler.timed('UIManager.update')
     def update(self, player_info, monsters):
         # Update visited cells
-        cell_x = int(player_info['position'][0] / CELL_SIZE)
-        cell_y = int(player_info['position'][1] / CELL_SIZE)
-        self.visited_cells.add((cell_x, cell_y))
+        cell_x = int(player_info['position'][0] / self.cell_span)
+        cell_y = int(player_info['position'][1] / self.cell_span)
+        self.mark_visited(cell_x, cell_y)
         
         # Update all UI elements
-        self._update_status(player_info)
-        self._update_minimap(player_info, monsters)
-        self._update_compass(player_info)
+        with profiler.span('UIManager.status'):
+            self._update_status(player_info)
+        with profiler.span('UIManager.minimap'):
+            self._update_minimap(player_info, monsters)
+        with profiler.span('UIManager.compass'):
+            self._update_compass(player_info)
+        
+        # The warning counts down here rather than when drawn: static screens
+        # only redraw elements that changed, so drawing can't drive the timer
+        if self.boss_warning_timer > 0:
+            self.boss_warning_timer = max(0, self.boss_warning_timer - 1/60)  # Assuming 60 FPS
         
         # Check for boss warning
         for monster in monsters:
@@ -49,88 +123,79 @@ class UIManager:
             f"Health: {player_info['health']}/10",
             f"Kills: {player_info['kill_count']}",
             f"Position: ({int(player_info['position'][0])}, {int(player_info['position'][1])})",
-            f"FPS: {int(pygame.time.Clock().get_fps())}"
+            f"FPS: {int(player_info.get('fps', 0))}"
         ]
         
+        self.status_key = tuple(texts)
         for i, text in enumerate(texts):
-            text_surface = self.font.render(text, True, UI_FONT_COLOR)
+            text_surface = text_cache.render(text, UI_FONT_SIZE, UI_FONT_COLOR)
             self.status_surface.blit(text_surface, (10, 10 + i * 30))
 
     def _update_minimap(self, player_info, monsters):
         # Clear minimap surface
         self.minimap_surface.fill((0, 0, 0, 0))
         
-        # Calculate scale factors
-        map_width = len(self.maze[0])
-        map_height = len(self.maze)
-        scale_x = MINIMAP_SIZE / (map_width * CELL_SIZE)
-        scale_y = MINIMAP_SIZE / (map_height * CELL_SIZE)
-        
-        # Draw maze
-        for y in range(map_height):
-            for x in range(map_width):
-                # Only draw visited cells
-                if (x, y) in self.visited_cells:
-                    cell_color = MINIMAP_VISITED_COLOR if self.maze[y][x] == 0 else MINIMAP_WALL_COLOR
-                else:
-                    cell_color = MINIMAP_UNVISITED_COLOR
-                
-                # Draw cell with proper scaling
-                cell_rect = pygame.Rect(
-                    x * MINIMAP_CELL_SIZE,
-                    y * MINIMAP_CELL_SIZE,
-                    MINIMAP_CELL_SIZE,
-                    MINIMAP_CELL_SIZE
-                )
-                pygame.draw.rect(self.minimap_surface, cell_color, cell_rect)
+        # Static walls and fog of war only change when a new cell is revealed
+        if self.explored_dirty and self.minimap_scale < 1.0:
+            view_size = (max(1, int(self.explored_layer.get_width() * self.minimap_scale)),
+                         max(1, int(self.explored_layer.get_height() * self.minimap_scale)))
+            self.explored_view = pygame.transform.scale(self.explored_layer, view_size)
+        self.explored_dirty = False
+        self.minimap_surface.blit(self.explored_view, (0, 0))
+        
+        # Minimap pixels per cell after scaling
+        cell_size = self.minimap_cell_size * self.minimap_scale
+        dot_size = max(1, int(cell_size // 2))
+        
+        dots = []
         
         # Draw monsters
         for monster in monsters:
             # Convert monster position to cell coordinates
-            monster_cell_x = int(monster.x / CELL_SIZE)
-            monster_cell_y = int(monster.y / CELL_SIZE)
+            monster_cell_x = int(monster.x / self.cell_span)
+            monster_cell_y = int(monster.y / self.cell_span)
             
             # Only draw monsters in visited cells
-            if (monster_cell_x, monster_cell_y) in self.visited_cells:
+            if self.is_visited(monster_cell_x, monster_cell_y):
                 # Convert monster position to minimap coordinates
-                monster_x = monster_cell_x * MINIMAP_CELL_SIZE + MINIMAP_CELL_SIZE // 2
-                monster_y = monster_cell_y * MINIMAP_CELL_SIZE + MINIMAP_CELL_SIZE // 2
+                monster_x = int((monster_cell_x + 0.5) * cell_size)
+                monster_y = int((monster_cell_y + 0.5) * cell_size)
                 
                 # Determine monster color based on type
                 color = MINIMAP_MONSTER_COLORS['boss'] if hasattr(monster, 'is_boss') and monster.is_boss else MINIMAP_MONSTER_COLORS['normal']
+                dots.append((monster_x, monster_y, color))
                 
-                # Draw monster with proper scaling
-                monster_size = MINIMAP_CELL_SIZE // 2
                 pygame.draw.circle(
                     self.minimap_surface,
                     color,
                     (monster_x, monster_y),
-                    monster_size
+                    dot_size
                 )
         
         # Draw player
-        player_cell_x = int(player_info['position'][0] / CELL_SIZE)
-        player_cell_y = int(player_info['position'][1] / CELL_SIZE)
+        player_cell_x = int(player_info['position'][0] / self.cell_span)
+        player_cell_y = int(player_info['position'][1] / self.cell_span)
         
         # Ensure player stays within minimap bounds
-        player_cell_x = max(0, min(player_cell_x, map_width - 1))
-        player_cell_y = max(0, min(player_cell_y, map_height - 1))
+        player_cell_x = max(0, min(player_cell_x, self.map_width - 1))
+        player_cell_y = max(0, min(player_cell_y, self.map_height - 1))
         
         # Convert player position to minimap coordinates
-        player_x = player_cell_x * MINIMAP_CELL_SIZE + MINIMAP_CELL_SIZE // 2
-        player_y = player_cell_y * MINIMAP_CELL_SIZE + MINIMAP_CELL_SIZE // 2
+        player_x = int((player_cell_x + 0.5) * cell_size)
+        player_y = int((player_cell_y + 0.5) * cell_size)
         
         # Draw player
         pygame.draw.circle(
             self.minimap_surface,
             MINIMAP_PLAYER_COLOR,
             (player_x, player_y),
-            MINIMAP_CELL_SIZE // 2
+            max(2, dot_size)
         )
         
         # Draw player direction indicator
         angle = player_info['angle']
-        indicator_length = MINIMAP_CELL_SIZE
+        self.minimap_key = (player_x, player_y, angle, self.visited_count, tuple(dots))
+        indicator_length = max(MINIMAP_CELL_SIZE, cell_size)
         indicator_x = player_x + math.cos(angle) * indicator_length
         indicator_y = player_y - math.sin(angle) * indicator_length
         pygame.draw.line(
@@ -141,12 +206,12 @@ class UIManager:
             2
         )
 
-    def _update_compass(self, player_info):
-        # Clear compass surface
-        self.compass_surface.fill((0, 0, 0, 0))
+    def _bake_compass_face(self):
+        """Draw the parts of the compass that never change"""
+        face = pygame.Surface((COMPASS_SIZE, COMPASS_SIZE), pygame.SRCALPHA)
         
         # Draw compass circle
-        pygame.draw.circle(self.compass_surface, UI_FONT_COLOR, 
+        pygame.draw.circle(face, UI_FONT_COLOR,
                          (COMPASS_SIZE//2, COMPASS_SIZE//2), COMPASS_SIZE//2, 2)
         
         # Draw cardinal directions
@@ -157,12 +222,19 @@ class UIManager:
             y = COMPASS_SIZE//2 - math.sin(angle) * (COMPASS_SIZE//2 - 10)
             
             # Draw direction text
-            text = self.font.render(direction, True, COMPASS_COLORS[direction])
+            text = text_cache.render(direction, UI_FONT_SIZE, COMPASS_COLORS[direction])
             text_rect = text.get_rect(center=(x, y))
-            self.compass_surface.blit(text, text_rect)
+            face.blit(text, text_rect)
+        return face
+
+    def _update_compass(self, player_info):
+        # Static face, then only the needle
+        self.compass_surface.fill((0, 0, 0, 0))
+        self.compass_surface.blit(self.compass_face, (0, 0))
         
         # Draw player direction indicator
         player_angle = player_info['angle']
+        self.compass_key = player_angle
         indicator_x = COMPASS_SIZE//2 + math.cos(player_angle) * (COMPASS_SIZE//2 - 20)
         indicator_y = COMPASS_SIZE//2 - math.sin(player_angle) * (COMPASS_SIZE//2 - 20)
         pygame.draw.line(self.compass_surface, UI_FONT_COLOR,
@@ -171,25 +243,43 @@ class UIManager:
 
     def show_boss_warning(self, boss_name):
         self.boss_warning_timer = BOSS_WARNING_DURATION
-        self.boss_warning_text = self.boss_warning_font.render(
-            f"WARNING: {boss_name} APPROACHING!", True, BOSS_WARNING_COLOR)
+        self.boss_warning_text = text_cache.render(
+            f"WARNING: {boss_name} APPROACHING!", BOSS_WARNING_SIZE, BOSS_WARNING_COLOR)
+
+    def elements(self):
+        """(name, rect, content key) for each UI element, for dirty-rectangle tracking"""
+        boss_rect = pygame.Rect(0, 0, 0, 0)
+        if self.boss_warning_timer > 0 and self.boss_warning_text:
+            boss_rect = self.boss_warning_text.get_rect(center=(WIDTH//2, HEIGHT//4))
+        return [
+            ('status', (*STATUS_POSITION, STATUS_WIDTH, STATUS_HEIGHT), self.status_key),
+            ('minimap', (*MINIMAP_POSITION, MINIMAP_SIZE, MINIMAP_SIZE), self.minimap_key),
+            ('compass', (*COMPASS_POSITION, COMPASS_SIZE, COMPASS_SIZE), self.compass_key),
+            ('boss_warning', boss_rect, (self.boss_warning_text, self.boss_warning_timer > 0))
+        ]
+
+    def draw_element(self, screen, name):
+        if name == 'status':
+            screen.blit(self.status_surface, STATUS_POSITION)
+        elif name == 'minimap':
+            screen.blit(self.minimap_surface, MINIMAP_POSITION)
+            
+            # Draw minimap border
+            pygame.draw.rect(
+                screen,
+                UI_FONT_COLOR,
+                (*MINIMAP_POSITION, MINIMAP_SIZE, MINIMAP_SIZE),
+                2
+            )
+        elif name == 'compass':
+            screen.blit(self.compass_surface, COMPASS_POSITION)
+        elif name == 'boss_warning':
+            # Draw boss warning if active
+            if self.boss_warning_timer > 0 and self.boss_warning_text:
+                text_rect = self.boss_warning_text.get_rect(center=(WIDTH//2, HEIGHT//4))
+                screen.blit(self.boss_warning_text, text_rect)
 
     def draw(self, screen):
         # Draw all UI elements
-        screen.blit(self.status_surface, STATUS_POSITION)
-        screen.blit(self.minimap_surface, MINIMAP_POSITION)
-        screen.blit(self.compass_surface, COMPASS_POSITION)
-        
-        # Draw minimap border
-        pygame.draw.rect(
-            screen,
-            UI_FONT_COLOR,
-            (*MINIMAP_POSITION, MINIMAP_SIZE, MINIMAP_SIZE),
-            2
-        )
-        
-        # Draw boss warning if active
-        if self.boss_warning_timer > 0 and self.boss_warning_text:
-            text_rect = self.boss_warning_text.get_rect(center=(WIDTH//2, HEIGHT//4))
-            screen.blit(self.boss_warning_text, text_rect)
-            self.boss_warning_timer -= 1/60  # Assuming 60 FPS 
\ No newline at end of file
+        for name in ('status', 'minimap', 'compass', 'boss_warning'):
+            self.draw_element(screen, name)
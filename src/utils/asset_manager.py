@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.constants import *
+
+class AssetManager:
+    """Single registry for every image the game uses.
+
+    The images folder is scanned once, so lookups for files that don't exist
+    never touch the filesystem again. `preload()` decodes every image on a
+    background thread pool (typically while the title screen is up). `get()`
+    hands out one shared, `convert_alpha`'d surface per (name, size);
+    callers must not draw onto it.
+    """
+    def __init__(self, directory=IMAGES_DIR):
+        self.directory = directory
+        self.paths = None  # File name -> path, filled by scan()
+        self.futures = {}  # File name -> Future of the decoded surface
+        self.decoded = {}  # File name -> surface straight from the decoder
+        self.surfaces = {}  # (file name, size) -> converted (and scaled) surface
+        self.stats = {}  # File name -> load statistics
+        self.missing_reported = set()
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def scan(self):
+        """Index the images folder once"""
+        if self.paths is not None:
+            return self.paths
+        self.paths = {}
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if os.path.isfile(path) and not name.startswith('.'):
+                    self.paths[name] = path
+        return self.paths
+
+    def exists(self, name):
+        return name in self.scan()
+
+    def frames(self, prefix, extension='.png'):
+        """Names of numbered frames prefix1, prefix2, ... up to the first gap"""
+        names = []
+        while self.exists(f"{prefix}{len(names) + 1}{extension}"):
+            names.append(f"{prefix}{len(names) + 1}{extension}")
+        return names
+
+    def _decode(self, name):
+        start = time.perf_counter()
+        surface = pygame.image.load(self.paths[name])
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.stats[name] = {
+                'decode_ms': elapsed * 1000,
+                'convert_ms': 0.0,
+                'size': surface.get_size(),
+                'bytes': surface.get_width() * surface.get_height() * surface.get_bytesize(),
+                'thread': threading.current_thread().name
+            }
+        return surface
+
+    def preload(self, names=None, workers=ASSET_LOADER_THREADS):
+        """Start decoding images on a background thread pool"""
+        self.scan()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assets')
+        for name in names or self.paths:
+            if name in self.paths and name not in self.futures and name not in self.decoded:
+                self.futures[name] = self.executor.submit(self._decode, name)
+
+    def wait(self):
+        """Block until every queued image is decoded"""
+        for name in list(self.futures):
+            self._decoded_surface(name)
+
+    def _decoded_surface(self, name):
+        surface = self.decoded.get(name)
+        if surface is not None:
+            return surface
+        future = self.futures.pop(name, None)
+        try:
+            surface = future.result() if future else self._decode(name)
+        except (pygame.error, OSError) as e:
+            print(f"Error loading image {name}: {e}")
+            surface = None
+        self.decoded[name] = surface
+        return surface
+
+    def get(self, name, size=None):
+        """Shared surface for `name` scaled to `size`, or None if the image doesn't exist"""
+        key = (name, size)
+        if key in self.surfaces:
+            return self.surfaces[key]
+        if not self.exists(name):
+            if name not in self.missing_reported:
+                self.missing_reported.add(name)
+                print(f"Image {name} not found in {self.directory}")
+            self.surfaces[key] = None
+            return None
+        surface = self._decoded_surface(name)
+        # convert_alpha needs a display mode; until one exists hand out (but
+        # don't cache) the decoded pixels so a later call gets the fast copy
+        converted = pygame.display.get_surface() is not None
+        if surface is None:
+            self.surfaces[key] = None
+            return None
+        start = time.perf_counter()
+        if converted:
+            surface = surface.convert_alpha()
+        if size is not None:
+            surface = pygame.transform.scale(surface, size)
+        if converted:
+            self.surfaces[key] = surface
+            with self.lock:
+                # Memory covers the decoded image plus every cached converted/scaled copy
+                stats = self.stats[name]
+                stats['convert_ms'] += (time.perf_counter() - start) * 1000
+                stats['bytes'] += surface.get_width() * surface.get_height() * surface.get_bytesize()
+        return surface
+
+    def report(self):
+        """Per-asset load times and memory, largest first"""
+        with self.lock:
+            rows = [dict(name=name, **stats) for name, stats in self.stats.items()]
+        return sorted(rows, key=lambda row: row['bytes'], reverse=True)
+
+    def print_report(self):
+        total = 0
+        for row in self.report():
+            total += row['bytes']
+            print(f"{row['name']:<40} {row['size'][0]:>5}x{row['size'][1]:<5} "
+                  f"decode {row['decode_ms']:7.2f} ms  convert {row['convert_ms']:7.2f} ms  "
+                  f"{row['bytes'] / 1024:8.1f} KiB  ({row['thread']})")
+        print(f"{len(self.stats)} images, {total / 1024:.1f} KiB")
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+# Shared asset registry
+assets = AssetManager()
@@ -19,48 +19,6 @@ WEAPON_SCALE = 0.5
 MAX_SHOOT_FRAMES = 3  # Reduced from 5 to 3 for faster shooting
 SHOOT_COOLDOWN = 0.1  # Reduced from 0.2 to 0.1 for 10 shots per second
 
-# Game maps
-MAPS = [
-    # Level 1
-    [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 0, 1, 1, 0, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 0, 1, 1, 0, 1, 1, 0, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 0, 1, 1, 0, 1, 1, 0, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 1, 1, 1, 0, 1, 1, 0, 1, 1, 1, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 0, 1, 1, 0, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 0, 1, 1, 0, 1, 1, 0, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ],
-    # Level 2
-    [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 1, 1, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 0, 0, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 0, 0, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 1, 1, 1, 1, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
-        [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
-        [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ]
-]
-
 # Colors
 SKY_COLOR = (20, 20, 30)  # Darker blue for dungeon atmosphere
 FLOOR_COLOR = (40, 35, 30)  # Dark brown for dungeon floor
@@ -81,6 +39,7 @@ SPECIAL_AREAS = {
     'boss': 4,      # Boss room
     'exit': 5       # Level exit
 }
+TRAP_TRIGGER_COOLDOWN = 20.0  # Seconds before a trap room can spring again
 
 # Monster settings per level
 MONSTERS_PER_LEVEL = {
@@ -235,6 +194,22 @@ BOSS_WARNING_DURATION = 3.0  # Seconds
 BOSS_WARNING_COLOR = (255, 0, 0, 200)  # Semi-transparent red
 BOSS_WARNING_SIZE = 48
 
+# Text Cache
+TEXT_CACHE_SIZE = 512  # Rendered text surfaces kept before evicting the least recently used
+
+# Performance Overlay
+PERF_OVERLAY_POSITION = (UI_PADDING, 130)
+PERF_OVERLAY_WIDTH = 320
+PERF_OVERLAY_HEIGHT = 330
+PERF_OVERLAY_FONT_SIZE = 20
+PERF_OVERLAY_REFRESH = 0.25  # Seconds between text/graph refreshes
+PERF_HISTORY_FRAMES = 300  # Frame times kept (about 5 seconds at 60 FPS)
+PERF_GRAPH_HEIGHT = 60
+PERF_GRAPH_MAX_MS = 50.0  # Frame time at the top of the graph
+PERF_TARGET_FRAME_MS = 1000 / 60
+PERF_GRAPH_COLOR = (0, 200, 255)
+PERF_GRAPH_SLOW_COLOR = (255, 80, 0)  # Frames slower than the target
+
 # Minimap Settings
 MINIMAP_CELL_SIZE = 8  # Size of each cell in the minimap
 MINIMAP_SIZE = 200  # Size of the minimap in pixels
@@ -267,7 +242,8 @@ MAX_MONSTERS_PER_LEVEL = {
 SPAWN_INTERVAL = 5.0  # Time between regular monster spawns
 WAVE_INTERVAL = 30.0  # Time between monster waves
 WAVE_SIZE = 3  # Number of monsters per wave
-MAX_SPAWN_ATTEMPTS = 50  # Maximum attempts to find valid spawn position
+MAX_SPAWN_ATTEMPTS = 50  # Maximum resamples when a spawn cell is crowded by other monsters
+SPAWN_MAX_PATH_DISTANCE = 48  # Cells searched around the player for spawn cells
 
 # Monster attributes
 MONSTER_SPEED = {
@@ -300,6 +276,13 @@ MONSTER_SIZE = {
     'boss': 30
 }
 
+# Sprite of each monster type in IMAGES_DIR
+MONSTER_IMAGES = {
+    'normal': 'slime1.png',
+    'elite': 'slime2.png',
+    'boss': 'slime3.png'
+}
+
 MONSTER_COLORS = {
     'normal': (255, 0, 0),
     'elite': (255, 128, 0),
@@ -310,12 +293,77 @@ MONSTER_ATTACK_COOLDOWN = 1.0  # Time between monster attacks
 BOSS_SPECIAL_ABILITY_DURATION = 5.0  # Duration of boss special ability
 BOSS_SPECIAL_ABILITY_COOLDOWN = 15.0  # Time between boss special abilities
 
+# Assets
+IMAGES_DIR = 'Images'
+LEVELS_DIR = 'levels'  # levelN.txt/.json sources and their compiled levelN.lvl files
+LEVEL_MMAP_THRESHOLD = 1 << 20  # Compiled levels this big (bytes) are memory-mapped, not read
+WORLD_CHUNK_SIZE = 128  # Cells per side of a chunked world region (power of two)
+WORLD_STREAM_RADIUS = 2  # Regions loaded around the player's region in each direction
+WORLD_CACHE_BUDGET = 16 << 20  # Bytes of regions kept in memory
+WORLD_OVERVIEW_SIZE = 512  # Longest side of the downsampled minimap overview
+WALL_FIELD_RESOLUTION = 4  # Wall distance field samples per cell side
+WALL_FIELD_MAX_DISTANCE = 128  # Distances beyond this (world units) are clamped
+PLAYER_RADIUS = 12  # Collision radius of the player against walls
+BOSS_SPAWN_CLEARANCE = 24  # Free space around a boss spawn point, beyond its collision radius
+BOSS_SPAWN_RADIUS = MONSTER_SIZE['boss'] / 2 + BOSS_SPAWN_CLEARANCE  # Wall-free radius around a boss spawn point
+GENERATED_LEVEL_SIZE = 65  # Default grid side of procedurally generated levels
+BSP_SPLITTER_CANDIDATES = 32  # Segments scored as the partition line of each BSP node
+BSP_SPLIT_COST = 8  # Score of splitting one segment, against 1 per segment of imbalance
+SECTOR_BLOCK_SIZE = 128  # Side of the collision blockmap squares of sector maps (world units)
+SECTOR_STEP_HEIGHT = 24  # Highest floor step the player can walk up or down in sector maps
+SECTOR_PLAYER_HEIGHT = 56  # Headroom the player needs to pass between sectors
+SECTOR_EYE_HEIGHT = CELL_SIZE // 2  # Camera height above the floor in sector maps
+SECTOR_NEAR_PLANE = 2  # Walls are clipped this far in front of the camera
+ASSET_LOADER_THREADS = 4  # Background threads decoding images at startup
+SAVE_PATH = 'quicksave.sav'  # F5 quick saves the game here and F8 loads it back
+
+# Lighting
+LIGHT_AMBIENT = 0.3  # Light level of places no light source reaches (0..1)
+LIGHT_TORCH_SPACING = 6 * CELL_SIZE  # Minimum distance between the torches spread over a level
+LIGHT_TORCH_RADIUS = 5 * CELL_SIZE  # Reach of a torch's light
+LIGHT_TORCH_INTENSITY = 0.8  # Light a torch adds right next to it
+AREA_LIGHTS = {  # (radius, intensity) of the light in the middle of each kind of special area
+    'treasure': (4 * CELL_SIZE, 0.9),
+    'trap': (3 * CELL_SIZE, 0.5),
+    'boss': (6 * CELL_SIZE, 1.0),
+    'exit': (5 * CELL_SIZE, 1.0)
+}
+LIGHT_SAMPLE_STEP = CELL_SIZE // 4  # Spacing of the occlusion tests along a light ray when baking
+LIGHTMAP_BAKE_WORKERS = 4  # Threads baking a level's lightmap
+DYNAMIC_LIGHT_REACH = 16  # Cells around the player covered by the dynamic light buffer
+MUZZLE_FLASH_LIGHT = (4 * CELL_SIZE, 0.7, 0.1)  # (radius, intensity, seconds) of a shot's flash
+EXPLOSION_LIGHT = (6 * CELL_SIZE, 1.0, 0.4)  # (radius, intensity, seconds) of an explosion
+
+# Particle settings
+PARTICLE_CAPACITY = 8192  # Fixed size of the particle arrays; new particles are dropped when full
+PARTICLE_GRAVITY = 400  # World units per second squared
+PARTICLE_DRAG = 0.96  # Horizontal velocity kept per tick
+PARTICLE_EYE_HEIGHT = CELL_SIZE // 2  # Camera height; walls span 0..CELL_SIZE
+EXPLOSION_RADIUS = 100  # Splash radius of explosive shots
+MUZZLE_FLASH_PARTICLES = 12
+MUZZLE_FLASH_COLOR = (255, 200, 0)
+BLOOD_PARTICLES = 24  # Per hit; kills emit three times as many
+BLOOD_PARTICLE_COLOR = (170, 0, 0)
+EXPLOSION_PARTICLES = 160
+EXPLOSION_COLOR = (255, 130, 20)
+
 # Heart settings
 HEART_SIZE = 32  # Size of heart image in pixels
 MAX_HEARTS = 5  # Maximum number of hearts in the level
 MIN_HEART_DISTANCE = 100  # Minimum distance between hearts
-MAX_HEART_SPAWN_ATTEMPTS = 50  # Maximum attempts to find valid heart positions
+POISSON_DISK_TRIES = 30  # Candidates tried around each point of a Poisson-disk placement
+POISSON_DISK_SEED_TRIES = 30  # Random free cells tried as starts for new Poisson-disk patches
 HEART_COLLISION_DISTANCE = 20  # Distance for heart collection
 HEART_HEAL_AMOUNT = 20  # Amount of health restored by collecting a heart
 
+# Stress scenarios (--stress)
+STRESS_MONSTERS = 2000  # Monsters at the top of the ramp
+STRESS_HEARTS = 200  # Hearts at the top of the ramp
+STRESS_PARTICLES = 4000  # Live particles at the top of the ramp (at most PARTICLE_CAPACITY)
+STRESS_STEPS = 10  # Ramp steps from a tenth of the targets (by default) up to all of them
+STRESS_STEP_TICKS = 120  # Ticks measured at each step
+STRESS_SETTLE_TICKS = 10  # Ticks left out at the start of each step, while new entities are added
+STRESS_FRAME_BUDGET = 1 / 60  # Frame time (seconds) a step must stay under
+STRESS_OUTPUT = 'stress.json'  # Where the scaling curve is written
+
 # ... existing code ... 
\ No newline at end of file
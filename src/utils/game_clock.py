@@ -0,0 +1,44 @@
+import time
+
+# Fixed-step clocks start here instead of at zero so cooldowns initialised to 0
+# are already expired on the first tick, matching the wall clock behaviour.
+FIXED_CLOCK_EPOCH = 1_000_000.0
+
+class GameClock:
+    """Source of simulation time.
+
+    Uses the wall clock by default. Demo recording and replay switch it to a
+    fixed step per tick so the simulation does not depend on real time.
+    """
+    def __init__(self):
+        self.fixed_step = None
+        self.tick_count = 0
+        self._fixed_time = FIXED_CLOCK_EPOCH
+
+    def use_fixed_step(self, step):
+        """Advance simulation time by `step` seconds per tick"""
+        self.fixed_step = step
+        self.tick_count = 0
+        self._fixed_time = FIXED_CLOCK_EPOCH
+
+    def use_wall_clock(self):
+        """Go back to real time"""
+        self.fixed_step = None
+
+    def is_fixed(self):
+        return self.fixed_step is not None
+
+    def time(self):
+        """Current simulation time in seconds"""
+        if self.fixed_step is None:
+            return time.time()
+        return self._fixed_time
+
+    def tick(self):
+        """Mark the end of a simulation tick"""
+        self.tick_count += 1
+        if self.fixed_step is not None:
+            self._fixed_time = FIXED_CLOCK_EPOCH + self.tick_count * self.fixed_step
+
+# Shared clock used by the launcher and all managers
+game_clock = GameClock()
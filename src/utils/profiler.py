@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+DEFAULT_CAPACITY = 65536  # Spans kept in the ring buffer
+
+class _NullSpan:
+    """Shared do-nothing span handed out while profiling is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        self.profiler.depth -= 1
+        self.profiler.record(self.name, self.start, end - self.start, self.profiler.depth)
+        return False
+
+class Profiler:
+    """Collects nested timing spans into a fixed-size ring buffer.
+
+    Spans are recorded with `with profiler.span('name'):` or the `timed`
+    decorator. While disabled both cost a single attribute check.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.enabled = False
+        self.capacity = capacity
+        self.depth = 0
+        self.origin = time.perf_counter_ns()
+        # Parallel preallocated columns; `head` is the next slot to write
+        self.names = [None] * capacity
+        self.starts = [0] * capacity
+        self.durations = [0] * capacity
+        self.depths = [0] * capacity
+        self.threads = [0] * capacity
+        self.head = 0
+        self.count = 0
+        self.frame_start = None
+        # Summed duration per span name for the frame in progress / last frame
+        self.frame_totals = {}
+        self.last_frame_totals = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.depth = 0
+        self.frame_start = None
+        self.frame_totals = {}
+        self.last_frame_totals = {}
+
+    def span(self, name):
+        """Context manager timing the enclosed block"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def begin_frame(self):
+        """Open the top-level span for one game loop iteration"""
+        if not self.enabled:
+            return
+        self.depth = 1
+        self.frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        """Close the span opened by begin_frame"""
+        if self.frame_start is None:
+            return
+        end = time.perf_counter_ns()
+        self.depth = 0
+        self.record('frame', self.frame_start, end - self.frame_start, 0)
+        self.frame_start = None
+        self.last_frame_totals = self.frame_totals
+        self.frame_totals = {}
+
+    def timed(self, name=None):
+        """Decorator timing every call of the wrapped function"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, start, duration, depth=0):
+        """Store a finished span (times in perf_counter nanoseconds)"""
+        i = self.head
+        self.names[i] = name
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.depths[i] = depth
+        self.threads[i] = threading.get_ident()
+        self.frame_totals[name] = self.frame_totals.get(name, 0) + duration
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def spans(self):
+        """Yield (name, start_ns, duration_ns, depth, thread) oldest first"""
+        first = (self.head - self.count) % self.capacity
+        for n in range(self.count):
+            i = (first + n) % self.capacity
+            yield self.names[i], self.starts[i], self.durations[i], self.depths[i], self.threads[i]
+
+    def to_trace_events(self):
+        """Convert the buffer to Chrome trace_event complete ("X") events"""
+        pid = os.getpid()
+        thread_ids = {}
+        events = []
+        for name, start, duration, depth, thread in self.spans():
+            tid = thread_ids.setdefault(thread, len(thread_ids) + 1)
+            events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (start - self.origin) / 1000.0,
+                'dur': duration / 1000.0,
+                'pid': pid,
+                'tid': tid,
+                'args': {'depth': depth}
+            })
+        for thread, tid in thread_ids.items():
+            thread_name = 'main' if thread == threading.main_thread().ident else f'worker-{tid}'
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': thread_name}})
+        return events
+
+    def dump_chrome_trace(self, path):
+        """Write the buffer as a JSON file loadable in chrome://tracing or Perfetto"""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.to_trace_events(), 'displayTimeUnit': 'ms'}, f)
+        print(f"Wrote {self.count} spans to {path}")
+        return path
+
+# Shared profiler used by the launcher and all managers
+profiler = Profiler()
@@ -0,0 +1,37 @@
+import time
+
+class StartupTimer:
+    """Wall-clock time of each startup phase up to the first presented frame.
+
+    Created when this module is first imported, which the launcher does
+    before anything else, so the first phase covers the remaining imports.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.last = self.origin
+        self.phases = []  # (name, seconds) in the order they finished
+        self.finished = False
+
+    def mark(self, name):
+        """Close the phase that started at the previous mark"""
+        if self.finished:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def finish(self, name='first frame'):
+        """Close the last phase; later marks are ignored"""
+        self.mark(name)
+        self.finished = True
+
+    def total(self):
+        return self.last - self.origin
+
+    def print_report(self):
+        for name, seconds in self.phases:
+            print(f"{name:<24} {seconds * 1000:8.1f} ms")
+        print(f"{'time to first frame':<24} {self.total() * 1000:8.1f} ms")
+
+# Shared timer; the launcher marks its phases on it
+startup_timer = StartupTimer()
@@ -0,0 +1,36 @@
+import random
+import numpy as np
+from src.utils.constants import *
+from src.game.level import Level, WALL, FLOOR
+from src.game.level_compiler import pack_level
+from src.game.spawn_index import SpawnIndex
+from src.game.wall_field import WallField, build_field
+from src.entities.monster_manager import MonsterManager
+
+# A 5x5 room (cells 1..5) with a one-cell corridor leading east out of it to x = 10
+ROOM = (1, 6)
+CORRIDOR_Y = 3
+CORRIDOR_END = 10
+
+def room_and_corridor():
+    grid = np.full((7, 12), WALL, dtype=np.uint8)
+    grid[ROOM[0]:ROOM[1], ROOM[0]:ROOM[1]] = FLOOR
+    grid[CORRIDOR_Y, ROOM[1]:CORRIDOR_END + 1] = FLOOR
+    level = Level(pack_level(grid), 'room-and-corridor')
+    return level, WallField(build_field(level.grid), WALL_FIELD_RESOLUTION)
+
+def test_clearance_rejects_corridors_and_accepts_rooms():
+    level, field = room_and_corridor()
+    assert not field.clearance(*level.cell_center(8, CORRIDOR_Y), BOSS_SPAWN_RADIUS)
+    assert field.clearance(*level.cell_center(3, 3), BOSS_SPAWN_RADIUS)
+
+def test_boss_spawns_in_the_room():
+    level, field = room_and_corridor()
+    for seed in range(20):
+        index = SpawnIndex(level)
+        index.move_to(CORRIDOR_END, CORRIDOR_Y)
+        manager = MonsterManager(level.cells, random.Random(seed), 1, index, field)
+        manager.spawn_boss(*level.cell_center(CORRIDOR_END, CORRIDOR_Y))
+        [boss] = manager.monsters
+        cell_x, cell_y = int(boss.x // CELL_SIZE), int(boss.y // CELL_SIZE)
+        assert ROOM[0] <= cell_x < ROOM[1] and ROOM[0] <= cell_y < ROOM[1]
@@ -0,0 +1,21 @@
+import numpy as np
+from src.game.chunked_world import ChunkedWorld, write_world
+
+CHUNK = 16
+REGIONS = 12
+CACHED = 9
+
+def test_lookups_keep_regions_loaded(tmp_path):
+    path = str(tmp_path / 'strip.world')
+    write_world(np.zeros((CHUNK, CHUNK * REGIONS), dtype=np.uint8), path, CHUNK)
+    world = ChunkedWorld(path, budget=CHUNK * CHUNK * CACHED, radius=0)
+    for region in range(CACHED):
+        world[0, region * CHUNK]
+    # Region 0 was loaded first but was just used, so region 1 goes when the cache is full
+    world[0, 0]
+    world[0, CACHED * CHUNK]
+    try:
+        assert 0 in world.regions and 1 not in world.regions
+        assert world.evictions == 1
+    finally:
+        world.close()
@@ -0,0 +1,14 @@
+import random
+import pygame
+from src.utils.constants import *
+from src.game.level import levels, FLOOR
+from src.entities.heart_manager import HeartManager
+
+def test_hearts_spawn_on_plain_floor():
+    pygame.init()
+    for number in range(1, levels.count() + 1):
+        level = levels.get(number)
+        hearts = HeartManager(level.cells, random.Random(number), level, seed=number)
+        assert hearts.spawn_positions
+        for x, y in hearts.spawn_positions:
+            assert level.cells[int(y // CELL_SIZE), int(x // CELL_SIZE)] == FLOOR
@@ -0,0 +1,49 @@
+import pytest
+from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.game.snapshot import read_snapshot, saves, HEADER_FORMAT, SECTION_FORMAT
+
+@pytest.fixture
+def launcher():
+    """The launcher on a headless display, playing the shipped levels"""
+    import Game_Launcher
+    game_clock.use_fixed_step(1 / 60)
+    Game_Launcher.init_display(headless=True)
+    assert Game_Launcher.initialize_game()
+    return Game_Launcher
+
+@pytest.fixture
+def save(launcher, tmp_path):
+    """The bytes of a quick save of the running game, and where to write variants of it"""
+    path = str(tmp_path / 'game.sav')
+    launcher.save_game(path)
+    saves.wait()
+    with open(path, 'rb') as f:
+        return f.read(), path
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_save_loads_back(launcher, save):
+    data, path = save
+    assert read_snapshot(path).level == launcher.current_level
+    assert launcher.load_game(path)
+
+def test_truncated_save_is_rejected(launcher, save):
+    data, path = save
+    for size in range(0, len(data), 7):
+        write(path, data[:size])
+        with pytest.raises(ValueError):
+            read_snapshot(path)
+    assert not launcher.load_game(path)
+
+def test_short_section_is_corrupt(launcher, save):
+    data, path = save
+    # Cut the first section (the world state) down to two bytes, keeping the file consistent
+    tag, size = SECTION_FORMAT.unpack_from(data, HEADER_FORMAT.size)
+    start = HEADER_FORMAT.size + SECTION_FORMAT.size
+    write(path, data[:HEADER_FORMAT.size] + SECTION_FORMAT.pack(tag, 2) + data[start:start + 2] + data[start + size:])
+    with pytest.raises(ValueError, match='corrupt snapshot'):
+        read_snapshot(path)
+    assert not launcher.load_game(path)
@@ -0,0 +1,90 @@
+import math
+import pytest
+from src.utils.constants import *
+from src.utils.game_clock import game_clock
+from src.game.level import levels, FLOOR
+from src.game.input_frame import InputFrame
+from src.game.triggers import REGION_TABLES
+
+# A generated level with treasure, trap, boss and exit rooms
+STRATEGY = 'rooms'
+SIZE = 65
+SEED = 3
+WALK_TICKS = 30  # Long enough to cross the doorway and walk on into the room
+
+@pytest.fixture
+def launcher():
+    """The launcher on a headless display, playing generated levels"""
+    import Game_Launcher
+    levels.use_generator(STRATEGY, SIZE, SIZE, SEED)
+    game_clock.use_fixed_step(1 / 60)
+    Game_Launcher.map_manager.set_seed(SEED)
+    Game_Launcher.init_display(headless=True)
+    assert Game_Launcher.initialize_game()
+    yield Game_Launcher
+    levels.generator = None
+    levels.clear()
+
+def count_calls(launcher, kind):
+    """Wrap the triggers of `kind` so their calls are counted; returns the counter"""
+    calls = []
+    for trigger in launcher.map_manager.triggers.triggers[kind]:
+        def counted(*args, callback=trigger.callback):
+            calls.append(args)
+            return callback(*args)
+        trigger.callback = counted
+    return calls
+
+def walk_into(launcher, kind):
+    """Stand on a floor cell next to a `kind` room and walk into it through handle_input"""
+    manager = launcher.map_manager
+    level = manager.level
+    for cell_x, cell_y in getattr(level, REGION_TABLES[kind]).tolist():
+        for x, y in ((cell_x + 1, cell_y), (cell_x - 1, cell_y), (cell_x, cell_y + 1), (cell_x, cell_y - 1)):
+            if level.in_bounds(x, y) and level.cells[y, x] == FLOOR:
+                break
+        else:
+            continue
+        break
+    else:
+        pytest.fail(f"level has no {kind} cell next to floor")
+    launcher.player_x, launcher.player_y = level.cell_center(x, y)
+    launcher.player_angle = math.atan2(cell_y - y, cell_x - x)
+    # Spawns are placed around the cell the last tick left the player in
+    manager.update_visited_cells(launcher.player_x, launcher.player_y)
+    calls = count_calls(launcher, kind)
+    before = len(manager.monster_manager.monsters)
+    for _ in range(WALK_TICKS):
+        launcher.handle_input(InputFrame(forward=True))
+    return calls, manager.monster_manager.monsters[before:]
+
+def test_treasure_spawns_hearts(launcher):
+    hearts = launcher.map_manager.heart_manager.hearts
+    before = len(hearts)
+    calls, _ = walk_into(launcher, 'treasure')
+    assert len(calls) == 1
+    assert len(launcher.map_manager.heart_manager.hearts) > before
+
+def test_trap_spawns_a_wave(launcher):
+    calls, spawned = walk_into(launcher, 'trap')
+    assert len(calls) == 1
+    assert spawned
+    assert all(monster.level == launcher.map_manager.current_level for monster in spawned)
+
+def test_boss_spawns_once(launcher):
+    calls, spawned = walk_into(launcher, 'boss')
+    assert len(calls) == 1
+    assert [monster.type for monster in spawned] == ['boss']
+    # Leaving the room and coming back doesn't bring a second boss
+    launcher.player_angle += math.pi
+    for _ in range(WALK_TICKS):
+        launcher.handle_input(InputFrame(forward=True))
+    calls, spawned = walk_into(launcher, 'boss')
+    assert not calls and not spawned
+
+def test_exit_moves_to_the_next_level(launcher):
+    level = launcher.current_level
+    calls, _ = walk_into(launcher, 'exit')
+    assert len(calls) == 1
+    assert launcher.current_level == level + 1
+    assert launcher.MAP is launcher.map_manager.level.cells